@@ -0,0 +1,111 @@
+"""Benchmark the matching of square brackets on long, deeply nested strings.
+
+Compares the original scan (`find`/`index` from each opening bracket) with the single-pass
+`get_matching_brackets`, both on a cache miss and on a cache hit.
+
+Usage: python benchmarks/brackets_benchmark.py [--n_tokens 1000] [--repeats 100]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+from typing import List, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pcgsepy.common.str_utils import clear_brackets_cache, get_matching_brackets
+
+
+def scan_matching_brackets(string: str) -> List[Tuple[int, int]]:
+    """The original implementation of `get_matching_brackets`, used as reference.
+
+    Args:
+        string (str): The string.
+
+    Returns:
+        List[Tuple[int, int]]: The list of pair indexes.
+    """
+    brackets = []
+    for i, c in enumerate(string):
+        if c == '[':
+            # find first closing bracket
+            idx_c = string.index(']', i)
+            # update closing bracket position in case of nested brackets
+            ni_o = string.find('[', i + 1)
+            while ni_o != -1 and string.find('[', ni_o) < idx_c:
+                idx_c = string.index(']', idx_c + 1)
+                ni_o = string.find('[', ni_o + 1)
+            # add to list of brackets
+            brackets.append((i, idx_c))
+    return brackets
+
+
+def nested_string(n_tokens: int) -> str:
+    """Create a string of `n_tokens` tokens, with half of them nested one inside the other.
+
+    Args:
+        n_tokens (int): The number of tokens.
+
+    Returns:
+        str: The string.
+    """
+    return '[' * (n_tokens // 2) + 'corridorsimple(1)]' * (n_tokens // 2)
+
+
+def random_string(n_tokens: int,
+                  p_bracket: float = 0.3) -> str:
+    """Create a random string of `n_tokens` tokens with balanced brackets.
+
+    Args:
+        n_tokens (int): The number of tokens.
+        p_bracket (float, optional): The probability of opening (and of closing) a bracket. Defaults to 0.3.
+
+    Returns:
+        str: The string.
+    """
+    tokens, depth = [], 0
+    for _ in range(n_tokens):
+        r = random.random()
+        if r < p_bracket:
+            tokens.append('[')
+            depth += 1
+        elif r < 2 * p_bracket and depth > 0:
+            tokens.append(']')
+            depth -= 1
+        else:
+            tokens.append(random.choice(['corridorsimple(1)', 'RotYcwX', 'thrusters(2)']))
+    return ''.join(tokens) + ']' * depth
+
+
+def uncached_matching_brackets(string: str) -> List[Tuple[int, int]]:
+    """The single-pass `get_matching_brackets`, with the cache cleared before each call.
+
+    Args:
+        string (str): The string.
+
+    Returns:
+        List[Tuple[int, int]]: The list of pair indexes.
+    """
+    clear_brackets_cache()
+    return get_matching_brackets(string=string)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n_tokens", help="Number of tokens of the strings",
+                        type=int, default=1000)
+    parser.add_argument("--repeats", help="Number of repetitions of each measure",
+                        type=int, default=100)
+    args = parser.parse_args()
+
+    random.seed(0)
+    for name, string in [('nested', nested_string(n_tokens=args.n_tokens)),
+                         ('random', random_string(n_tokens=args.n_tokens))]:
+        assert scan_matching_brackets(string) == uncached_matching_brackets(string), f'Mismatching brackets on {name} string.'
+        print(f'{name} string ({args.n_tokens} tokens, {len(string)} characters):')
+        for f_name, f in [('scan', scan_matching_brackets),
+                          ('single pass', uncached_matching_brackets),
+                          ('cached', get_matching_brackets)]:
+            t = min(timeit.repeat(lambda: f(string), number=1, repeat=args.repeats))
+            print(f'\t{f_name:<12}{t * 1e3:.3f}ms')
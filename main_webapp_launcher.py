@@ -14,7 +14,7 @@ else:
 import argparse
 import webbrowser
 
-from pcgsepy.config import ACTIVE_LOGGERS, BIN_N
+from pcgsepy.config import ACTIVE_LOGGERS, BIN_N, N_WORKERS
 from pcgsepy.evo.fitness import (Fitness, box_filling_fitness,
                                  func_blocks_fitness, mame_fitness,
                                  mami_fitness)
@@ -40,6 +40,8 @@ parser.add_argument("--host", help="Specify host address",
                     type=str, default='127.0.0.1')
 parser.add_argument("--port", help="Specify port",
                     type=int, default=8050)
+parser.add_argument("--n_workers", help="Number of worker processes used by the L-system solvers",
+                    type=int, default=N_WORKERS)
 
 args = parser.parse_args()
 
@@ -80,7 +82,8 @@ used_ll_blocks = [
     'MyObjectBuilder_InteriorLight_LargeBlockLight_1corner'
 ]
 
-lsystem = get_default_lsystem(used_ll_blocks=used_ll_blocks)
+lsystem = get_default_lsystem(used_ll_blocks=used_ll_blocks,
+                              n_workers=args.n_workers)
 
 expander.initialize(rules=lsystem.hl_solver.parser.rules)
 
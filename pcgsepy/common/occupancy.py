@@ -0,0 +1,267 @@
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+
+# bits of each byte in reversed order
+_reversed_bits: npt.NDArray[np.uint8] = np.asarray([int(f'{i:08b}'[::-1], 2) for i in range(256)], dtype=np.uint8)
+# each byte with all bits following (towards the least significant bit) its first set bit also set
+_smeared_bits: npt.NDArray[np.uint8] = np.asarray([(0xFF >> (8 - i.bit_length())) if i else 0 for i in range(256)], dtype=np.uint8)
+# number of set bits of each byte
+_popcounts: npt.NDArray[np.uint8] = np.asarray([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _n_bytes(n: int) -> int:
+    return (n + 7) // 8
+
+
+class OccupancyGrid:
+    __slots__ = ['bits', 'shape']
+
+    def __init__(self,
+                 shape: Tuple[int, int, int],
+                 bits: npt.NDArray[np.uint8] = None) -> None:
+        """Create a 3D occupancy grid, with the occupancy bits packed along the last axis (as in `np.packbits`).
+        Bits beyond the grid shape are always unset, so the packed bytes can be combined directly.
+        The storage may be larger than the shape, to grow the grid as cells are set.
+
+        Args:
+            shape (Tuple[int, int, int]): The XYZ shape of the grid.
+            bits (npt.NDArray[np.uint8], optional): The packed bits. Defaults to `None` (an empty grid).
+        """
+        self.shape = tuple(int(v) for v in shape)
+        self.bits = np.zeros(shape=(*self.shape[:2], _n_bytes(self.shape[2])), dtype=np.uint8) if bits is None else bits
+
+    def __repr__(self) -> str:
+        return f'OccupancyGrid(shape={self.shape}, count={self.count()})'
+
+    @classmethod
+    def from_mask(cls,
+                  mask: npt.NDArray[np.bool8]) -> 'OccupancyGrid':
+        """Create the occupancy grid of a boolean array.
+
+        Args:
+            mask (npt.NDArray[np.bool8]): The 3D boolean array.
+
+        Returns:
+            OccupancyGrid: The occupancy grid.
+        """
+        return cls(shape=mask.shape,
+                   bits=np.packbits(mask, axis=-1))
+
+    @property
+    def packed(self) -> npt.NDArray[np.uint8]:
+        """Get the packed bits within the grid shape.
+
+        Returns:
+            npt.NDArray[np.uint8]: The packed bits.
+        """
+        return self.bits[:self.shape[0], :self.shape[1], :_n_bytes(self.shape[2])]
+
+    def to_mask(self) -> npt.NDArray[np.bool8]:
+        """Convert the occupancy grid to a boolean array.
+
+        Returns:
+            npt.NDArray[np.bool8]: The 3D boolean array.
+        """
+        return np.unpackbits(self.packed, axis=-1, count=self.shape[2]).astype(bool)
+
+    def copy(self) -> 'OccupancyGrid':
+        return OccupancyGrid(shape=self.shape,
+                             bits=self.packed.copy())
+
+    def _with_bits(self,
+                   bits: npt.NDArray[np.uint8]) -> 'OccupancyGrid':
+        # clear the bits beyond the grid shape
+        pad = 8 * bits.shape[-1] - self.shape[2]
+        if pad:
+            bits[..., -1] &= np.uint8((0xFF << pad) & 0xFF)
+        return OccupancyGrid(shape=self.shape,
+                             bits=bits)
+
+    def _grow(self,
+              shape: Tuple[int, int, int]) -> None:
+        """Grow the grid to the given shape, doubling the storage when needed.
+
+        Args:
+            shape (Tuple[int, int, int]): The new XYZ shape.
+        """
+        needed = (shape[0], shape[1], _n_bytes(shape[2]))
+        if any(n > c for n, c in zip(needed, self.bits.shape)):
+            capacity = tuple(max(n, 2 * c) if n > c else c for n, c in zip(needed, self.bits.shape))
+            bits = np.zeros(shape=capacity, dtype=np.uint8)
+            bits[:self.bits.shape[0], :self.bits.shape[1], :self.bits.shape[2]] = self.bits
+            self.bits = bits
+        self.shape = shape
+
+    def set(self,
+            idxs: npt.NDArray[np.int64]) -> None:
+        """Set the given cells as occupied, growing the grid if needed.
+
+        Args:
+            idxs (npt.NDArray[np.int64]): The (N, 3) XYZ indices of the cells.
+
+        Raises:
+            ValueError: Raised if any index is negative.
+        """
+        idxs = np.asarray(idxs, dtype=np.int64).reshape(-1, 3)
+        if idxs.shape[0] == 0:
+            return
+        if np.any(idxs < 0):
+            raise ValueError('invalid entry in coordinates array')
+        shape = tuple(max(s, int(m) + 1) for s, m in zip(self.shape, idxs.max(axis=0)))
+        if shape != self.shape:
+            self._grow(shape=shape)
+        np.bitwise_or.at(self.bits, (idxs[:, 0], idxs[:, 1], idxs[:, 2] >> 3), (0x80 >> (idxs[:, 2] & 7)).astype(np.uint8))
+
+    def test(self,
+             idxs: npt.NDArray[np.int64]) -> npt.NDArray[np.bool8]:
+        """Test whether the given cells are occupied. Cells outside the grid are not occupied.
+
+        Args:
+            idxs (npt.NDArray[np.int64]): The (N, 3) XYZ indices of the cells.
+
+        Returns:
+            npt.NDArray[np.bool8]: Whether each cell is occupied.
+        """
+        idxs = np.asarray(idxs, dtype=np.int64).reshape(-1, 3)
+        res = np.zeros(shape=idxs.shape[0], dtype=bool)
+        within = np.all((idxs >= 0) & (idxs < np.asarray(self.shape)), axis=1)
+        i = idxs[within]
+        res[within] = (self.bits[i[:, 0], i[:, 1], i[:, 2] >> 3] & (0x80 >> (i[:, 2] & 7))) != 0
+        return res
+
+    def count(self) -> int:
+        """Count the occupied cells.
+
+        Returns:
+            int: The number of occupied cells.
+        """
+        return int(_popcounts[self.packed].sum(dtype=np.int64))
+
+    def any(self) -> bool:
+        return bool(self.packed.any())
+
+    def _shift_bits(self,
+                    bits: npt.NDArray[np.uint8],
+                    offset: int) -> npt.NDArray[np.uint8]:
+        """Shift the packed bits along the last axis, filling with unset bits.
+
+        Args:
+            bits (npt.NDArray[np.uint8]): The packed bits.
+            offset (int): The number of cells to shift by (positive towards higher indices).
+
+        Returns:
+            npt.NDArray[np.uint8]: The shifted packed bits.
+        """
+        n = bits.shape[-1]
+        q, r = divmod(abs(offset), 8)
+        out = np.zeros_like(bits)
+        if q >= n:
+            return out
+        if offset >= 0:
+            out[..., q:] = bits[..., :n - q]
+            if r:
+                carry = np.zeros_like(out)
+                carry[..., 1:] = out[..., :-1] << (8 - r)
+                out = (out >> r) | carry
+        else:
+            out[..., :n - q] = bits[..., q:]
+            if r:
+                carry = np.zeros_like(out)
+                carry[..., :-1] = out[..., 1:] >> (8 - r)
+                out = (out << r) | carry
+        return out
+
+    def shift(self,
+              offset: int,
+              axis: int) -> 'OccupancyGrid':
+        """Shift the occupancy along an axis, keeping the grid shape. Cells shifted out of the grid are dropped.
+
+        Args:
+            offset (int): The number of cells to shift by (positive towards higher indices).
+            axis (int): The axis.
+
+        Returns:
+            OccupancyGrid: The shifted occupancy grid.
+        """
+        packed = self.packed
+        if axis == 2:
+            return self._with_bits(bits=self._shift_bits(bits=packed, offset=offset))
+        out = np.zeros_like(packed)
+        n = packed.shape[axis]
+        if abs(offset) < n:
+            src = [slice(None)] * 3
+            dst = [slice(None)] * 3
+            src[axis] = slice(0, n - offset) if offset >= 0 else slice(-offset, n)
+            dst[axis] = slice(offset, n) if offset >= 0 else slice(0, n + offset)
+            out[tuple(dst)] = packed[tuple(src)]
+        return OccupancyGrid(shape=self.shape,
+                             bits=out)
+
+    def flip(self,
+             axis: int) -> 'OccupancyGrid':
+        """Mirror the occupancy along an axis.
+
+        Args:
+            axis (int): The axis.
+
+        Returns:
+            OccupancyGrid: The mirrored occupancy grid.
+        """
+        packed = self.packed
+        if axis == 2:
+            bits = _reversed_bits[packed[..., ::-1]]
+            # the reversed bits are aligned to the end of the last byte
+            return self._with_bits(bits=self._shift_bits(bits=bits, offset=-(8 * bits.shape[-1] - self.shape[2])))
+        return OccupancyGrid(shape=self.shape,
+                             bits=np.flip(packed, axis=axis).copy())
+
+    def prefix_or(self,
+                  axis: int,
+                  reverse: bool = False) -> 'OccupancyGrid':
+        """Mark the cells preceded (or, if `reverse`, followed) by an occupied cell along an axis, including the occupied cell itself.
+
+        Args:
+            axis (int): The axis.
+            reverse (bool, optional): Whether to look at the following cells instead. Defaults to False.
+
+        Returns:
+            OccupancyGrid: The occupancy grid of the marked cells.
+        """
+        if reverse:
+            return self.flip(axis=axis).prefix_or(axis=axis).flip(axis=axis)
+        packed = self.packed
+        if axis == 2:
+            # set all bits after the first one within each byte, then all bytes after the first non-empty one
+            seen = np.logical_or.accumulate(packed != 0, axis=-1)
+            bits = _smeared_bits[packed]
+            bits[..., 1:][seen[..., :-1]] = 0xFF
+            return self._with_bits(bits=bits)
+        return OccupancyGrid(shape=self.shape,
+                             bits=np.bitwise_or.accumulate(packed, axis=axis))
+
+    def __and__(self,
+                other: 'OccupancyGrid') -> 'OccupancyGrid':
+        return OccupancyGrid(shape=self.shape,
+                             bits=self.packed & other.packed)
+
+    def __or__(self,
+               other: 'OccupancyGrid') -> 'OccupancyGrid':
+        return OccupancyGrid(shape=self.shape,
+                             bits=self.packed | other.packed)
+
+    def __xor__(self,
+                other: 'OccupancyGrid') -> 'OccupancyGrid':
+        return OccupancyGrid(shape=self.shape,
+                             bits=self.packed ^ other.packed)
+
+    def __invert__(self) -> 'OccupancyGrid':
+        return self._with_bits(bits=~self.packed)
+
+    def __eq__(self,
+               other: 'OccupancyGrid') -> bool:
+        if isinstance(other, OccupancyGrid):
+            return self.shape == other.shape and np.array_equal(self.packed, other.packed)
+        return False
@@ -1,6 +1,6 @@
 from copy import copy
 import re
-from typing import Tuple
+from typing import List, Optional, Tuple
 from functools import total_ordering
 
 
@@ -51,4 +51,111 @@ def extract_regex(lhs: str) -> str:
     r = copy(lhs)
     for k, v in char_to_re.items():
         r = r.replace(k, v)
-    return re.compile(r)
\ No newline at end of file
+    return re.compile(r)
+
+
+class LHSMatcher:
+    __slots__ = ['lhs', 'regex']
+
+    def __init__(self,
+                 lhs: List[str]) -> None:
+        """Create a matcher for all the LHS rules at once, compiled as a single alternation.
+        Alternatives are ordered from the longest LHS (LHS match fixed-length strings), so each scan
+        returns non-overlapping matches with the longest match at each position (ties go to the first LHS).
+
+        Args:
+            lhs (List[str]): The LHS rules (human-readable).
+        """
+        self.lhs = sorted(lhs, key=len, reverse=True)
+        self.regex = re.compile('|'.join([f'({extract_regex(x).pattern})' for x in self.lhs])) if self.lhs else None
+
+    def finditer(self,
+                 string: str) -> List[MyMatch]:
+        """Find all matches in a single scan of the string.
+
+        Args:
+            string (str): The string.
+
+        Returns:
+            List[MyMatch]: The sorted, non-overlapping matches.
+        """
+        if self.regex is None:
+            return []
+        return [MyMatch(lhs=self.lhs[match.lastindex - 1],
+                        span=match.span(),
+                        lhs_string=match.group()) for match in self.regex.finditer(string)]
+
+
+class LHSTrie:
+    __slots__ = ['root']
+
+    def __init__(self,
+                 lhs: List[str]) -> None:
+        """Create a prefix trie over the LHS strings.
+        When more than one LHS matches at the same position, the one that comes first in `lhs` wins.
+
+        Args:
+            lhs (List[str]): The LHS strings, in order of priority.
+        """
+        self.root = {}
+        for priority, k in enumerate(lhs):
+            if not k:
+                continue
+            node = self.root
+            for c in k:
+                node = node.setdefault(c, {})
+            node.setdefault(None, (priority, k))
+
+    def match(self,
+              string: str,
+              start: int) -> Optional[str]:
+        """Find the LHS matching the string at the given position.
+
+        Args:
+            string (str): The string.
+            start (int): The starting position.
+
+        Returns:
+            Optional[str]: The matching LHS with the highest priority, or `None` if no LHS matches.
+        """
+        node, best = self.root, None
+        for i in range(start, len(string)):
+            node = node.get(string[i])
+            if node is None:
+                break
+            found = node.get(None)
+            if found is not None and (best is None or found[0] < best[0]):
+                best = found
+        return best[1] if best is not None else None
+
+
+class AtomsTokenizer:
+    __slots__ = ['atoms', 'ids', 'regex']
+
+    def __init__(self,
+                 atoms: List[str]) -> None:
+        """Create a tokenizer for the given atoms, compiled once as a single alternation.
+        Atoms are tried in the given order (the first matching atom wins), and each atom can be
+        followed by a parenthesized argument (eg: the multiplicity of a tile).
+
+        Args:
+            atoms (List[str]): The atoms.
+        """
+        self.atoms = list(atoms)
+        self.ids = {atom: i for i, atom in enumerate(self.atoms)}
+        self.regex = re.compile('(' + '|'.join([re.escape(atom) for atom in self.atoms]) + r')(?:\(([^)]*)\))?') if self.atoms else None
+
+    def tokenize(self,
+                 string: str) -> List[Tuple[int, Tuple[int, int], Tuple[int, int]]]:
+        """Tokenize the string in a single scan. Characters that do not match any atom are skipped.
+
+        Args:
+            string (str): The string.
+
+        Returns:
+            List[Tuple[int, Tuple[int, int], Tuple[int, int]]]: The token ids, their spans, and the spans of their arguments (`(-1, -1)` if the token has no argument).
+        """
+        if self.regex is None:
+            return []
+        ids = self.ids
+        return [(ids[match[1]], match.span(1), match.span(2)) for match in self.regex.finditer(string)]
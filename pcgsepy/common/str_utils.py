@@ -1,4 +1,16 @@
-from typing import List, Tuple
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+
+_brackets_re = re.compile(r'[\[\]]')
+# partner arrays of the most recent strings
+_partners_cache: Dict[str, npt.NDArray[np.int32]] = {}
+# memory used by the cached strings and partner arrays
+_partners_cache_bytes = 0
+_MAX_PARTNERS_CACHE_BYTES = 64 * 2 ** 20
 
 
 def get_atom_indexes(string: str,
@@ -19,6 +31,54 @@ def get_atom_indexes(string: str,
     return indexes
 
 
+def get_brackets_partners(string: str) -> npt.NDArray[np.int32]:
+    """Get the index of the matching square bracket of each character, in a single pass.
+    Partner arrays are cached by string, so repeated calls on the same string are not recomputed. The cache is bounded by
+    the memory of its strings and arrays: the oldest entries are evicted first.
+
+    Args:
+        string (str): The string.
+
+    Returns:
+        npt.NDArray[np.int32]: The index of the matching bracket (`-1` for other characters).
+
+    Raises:
+        ValueError: Raised if a bracket is unmatched.
+    """
+    global _partners_cache_bytes
+    partners = _partners_cache.get(string, None)
+    if partners is None:
+        partners = np.full(shape=len(string), fill_value=-1, dtype=np.int32)
+        stack = []
+        for match in _brackets_re.finditer(string):
+            i = match.start()
+            if match[0] == '[':
+                stack.append(i)
+            elif stack:
+                j = stack.pop()
+                partners[i], partners[j] = j, i
+            else:
+                raise ValueError(f'Unmatched closing bracket at index {i}.')
+        if stack:
+            raise ValueError(f'Unmatched opening bracket at index {stack[-1]}.')
+        partners.flags.writeable = False
+        size = len(string) + partners.nbytes
+        if size <= _MAX_PARTNERS_CACHE_BYTES:
+            while _partners_cache_bytes + size > _MAX_PARTNERS_CACHE_BYTES:
+                oldest = next(iter(_partners_cache))
+                _partners_cache_bytes -= len(oldest) + _partners_cache.pop(oldest).nbytes
+            _partners_cache[string] = partners
+            _partners_cache_bytes += size
+    return partners
+
+
+def clear_brackets_cache() -> None:
+    """Remove all cached partner arrays."""
+    global _partners_cache_bytes
+    _partners_cache.clear()
+    _partners_cache_bytes = 0
+
+
 def get_matching_brackets(string: str) -> List[Tuple[int, int]]:
     """Get indexes of matching square brackets.
 
@@ -26,18 +86,11 @@ def get_matching_brackets(string: str) -> List[Tuple[int, int]]:
         string (str): The string.
 
     Returns:
-        List[Tuple[int, int]]: The list of pair indexes.
+        List[Tuple[int, int]]: The list of pair indexes, sorted by opening bracket.
+
+    Raises:
+        ValueError: Raised if a bracket is unmatched.
     """
-    brackets = []
-    for i, c in enumerate(string):
-        if c == '[':
-            # find first closing bracket
-            idx_c = string.index(']', i)
-            # update closing bracket position in case of nested brackets
-            ni_o = string.find('[', i + 1)
-            while ni_o != -1 and string.find('[', ni_o) < idx_c:
-                idx_c = string.index(']', idx_c + 1)
-                ni_o = string.find('[', ni_o + 1)
-            # add to list of brackets
-            brackets.append((i, idx_c))
-    return brackets
+    partners = get_brackets_partners(string=string)
+    opens = np.flatnonzero(partners > np.arange(partners.shape[0]))
+    return list(zip(opens.tolist(), partners[opens].tolist()))
@@ -1,44 +1,74 @@
 from enum import Enum
-from functools import cached_property
+from itertools import permutations, product
 from multiprocessing.sharedctypes import Value
 from os import stat
-from typing import Any, Dict, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import numpy.typing as npt
 
 
 class Vec:
+    __slots__ = ['x', 'y', 'z']
+
     def __init__(self,
                  x: Union[int, float],
                  y: Union[int, float],
                  z: Optional[Union[int, float]] = None):
-        """Create a vector.
+        """Create a vector. Vectors are immutable: all operations return a new vector.
 
         Args:
             x (Union[int, float]): The X value.
             y (Union[int, float]): The Y value.
             z (Optional[Union[int, float]], optional): The Z value. Defaults to None.
         """
-        self.x = x
-        self.y = y
-        self.z = z
+        _set_x(self, x)
+        _set_y(self, y)
+        _set_z(self, z)
+
+    def __setattr__(self,
+                    name: str,
+                    value: Any) -> None:
+        raise AttributeError(f'Vec is immutable, cannot set {name}.')
+
+    def __delattr__(self,
+                    name: str) -> None:
+        raise AttributeError(f'Vec is immutable, cannot delete {name}.')
 
     def __str__(self) -> str:
         return str(self.as_dict())
 
     def __repr__(self) -> str:
-        return str(self.__dict__)
+        return str({'x': self.x, 'y': self.y, 'z': self.z})
 
     def __eq__(self,
                other: 'Vec') -> bool:
         if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
+            return self.x == other.x and self.y == other.y and self.z == other.z
         else:
             return False
 
     def __hash__(self) -> int:
-        return hash(self.as_tuple())
+        return hash((self.x, self.y) if self.z is None else (self.x, self.y, self.z))
+
+    def __copy__(self) -> 'Vec':
+        return self
+
+    def __deepcopy__(self,
+                     memo: Dict[int, Any]) -> 'Vec':
+        return self
+
+    def __reduce__(self):
+        return self.__class__, (self.x, self.y, self.z)
+
+    def __setstate__(self,
+                     state: Any) -> None:
+        # support vectors pickled before `Vec` was slotted, with state as `__dict__`
+        if isinstance(state, tuple):
+            state = state[1]
+        _set_x(self, state['x'])
+        _set_y(self, state['y'])
+        _set_z(self, state['z'])
     
     @classmethod
     def v2i(cls,
@@ -206,24 +236,6 @@ class Vec:
                    y=np.floor(self.y),
                    z=np.floor(self.z) if self.z is not None else None)
     
-    @cached_property
-    def max(self) -> Union[int, float]:
-        """Compute the largest dimension of the vector.
-
-        Returns:
-            Union[int, float]: The largest dimension.
-        """
-        return max(self.x, self.y) if self.z is None else max(self.x, self.y, self.z)
-
-    @cached_property
-    def min(self) -> Union[int, float]:
-        """Compute the smallest dimension of the vector.
-
-        Returns:
-            Union[int, float]: The smallest dimension.
-        """
-        return min(self.x, self.y) if self.z is None else min(self.x, self.y, self.z)
-
     def abs(self) -> "Vec":
         """Compute the absolute value of the vector.
 
@@ -394,6 +406,234 @@ class Vec:
                    z=min(v1.z, v2.z) if v1.z is not None and v2.z is not None else None)
 
 
+# slot setters, used to initialize the immutable vectors
+_set_x = Vec.x.__set__
+_set_y = Vec.y.__set__
+_set_z = Vec.z.__set__
+
+
+class VecArray:
+    __slots__ = ['arr']
+
+    def __init__(self,
+                 arr: Union[npt.NDArray[np.int32], npt.NDArray[np.float32]]) -> None:
+        """Create a batch of 3D vectors, backed by a (N, 3) NumPy array.
+        Methods have the same names and semantics of the `Vec` methods, applied to all vectors at once.
+
+        Args:
+            arr (Union[npt.NDArray[np.int32], npt.NDArray[np.float32]]): The (N, 3) array.
+        """
+        self.arr = np.asarray(arr).reshape(-1, 3)
+
+    def __len__(self) -> int:
+        return self.arr.shape[0]
+
+    def __getitem__(self,
+                    i: int) -> Vec:
+        return Vec.from_np(self.arr[i])
+
+    def __iter__(self):
+        return iter(self.to_vecs())
+
+    def __eq__(self,
+               other: 'VecArray') -> bool:
+        if isinstance(other, self.__class__):
+            return np.array_equal(self.arr, other.arr)
+        else:
+            return False
+
+    def __repr__(self) -> str:
+        return f'VecArray({self.arr.tolist()})'
+
+    @classmethod
+    def from_vecs(cls,
+                  vecs: List[Vec]) -> 'VecArray':
+        """Create a batch of vectors from a list of `Vec`.
+
+        Args:
+            vecs (List[Vec]): The vectors.
+
+        Returns:
+            VecArray: The batch of vectors.
+        """
+        return cls(np.asarray([v.as_tuple() for v in vecs]).reshape(-1, 3))
+
+    @classmethod
+    def from_tuples(cls,
+                    tups: List[Tuple[int, int, int]]) -> 'VecArray':
+        """Create a batch of vectors from a list of tuples.
+
+        Args:
+            tups (List[Tuple[int, int, int]]): The tuples.
+
+        Returns:
+            VecArray: The batch of vectors.
+        """
+        return cls(np.asarray(tups).reshape(-1, 3))
+
+    def to_vecs(self) -> List[Vec]:
+        """Convert the batch to a list of `Vec`.
+
+        Returns:
+            List[Vec]: The vectors.
+        """
+        return [Vec(x, y, z) for x, y, z in self.arr.tolist()]
+
+    def as_array(self) -> Union[npt.NDArray[np.int32], npt.NDArray[np.float32]]:
+        """Get the vectors as (N, 3) NumPy array.
+
+        Returns:
+            Union[npt.NDArray[np.int32], npt.NDArray[np.float32]]: The vectors as NumPy array.
+        """
+        return self.arr
+
+    def as_tuple(self) -> List[Tuple[int, int, int]]:
+        """Convert the vectors to tuples.
+
+        Returns:
+            List[Tuple[int, int, int]]: The vectors as tuples.
+        """
+        return list(map(tuple, self.arr.tolist()))
+
+    def to_veci(self) -> 'VecArray':
+        """Convert the vectors to int type.
+
+        Returns:
+            VecArray: The vectors of ints.
+        """
+        return VecArray(np.rint(self.arr).astype(np.int32))
+
+    def round(self,
+              n: int = 1) -> 'VecArray':
+        """Round the vectors values to a given precision.
+
+        Args:
+            n (int, optional): The rounding precision. Defaults to 1.
+
+        Returns:
+            VecArray: The rounded vectors.
+        """
+        return VecArray(np.round(self.arr, n))
+
+    def floor(self) -> 'VecArray':
+        """Apply the floor function to the vectors.
+
+        Returns:
+            VecArray: The floored vectors.
+        """
+        return VecArray(np.floor(self.arr))
+
+    def abs(self) -> 'VecArray':
+        """Compute the absolute value of the vectors.
+
+        Returns:
+            VecArray: The positive vectors.
+        """
+        return VecArray(np.abs(self.arr))
+
+    def bbox(self) -> Union[npt.NDArray[np.int32], npt.NDArray[np.float32]]:
+        """Compute the bounding box volume of each vector.
+
+        Returns:
+            Union[npt.NDArray[np.int32], npt.NDArray[np.float32]]: The bounding box volumes.
+        """
+        return np.prod(self.arr, axis=1)
+
+    def add(self,
+            v: Union[float, int]) -> 'VecArray':
+        """Add a scalar to the vectors.
+
+        Args:
+            v (Union[float, int]): The scalar.
+
+        Returns:
+            VecArray: The new vectors.
+        """
+        return VecArray(self.arr + v)
+
+    def sum(self,
+            other: Union[Vec, 'VecArray']) -> 'VecArray':
+        """Compute the sum with another vector (broadcasted) or batch of vectors.
+
+        Args:
+            other (Union[Vec, VecArray]): The other vector(s).
+
+        Returns:
+            VecArray: The resulting vectors.
+        """
+        return VecArray(self.arr + _as_batch(other))
+
+    def diff(self,
+             other: Union[Vec, 'VecArray']) -> 'VecArray':
+        """Compute the difference with another vector (broadcasted) or batch of vectors.
+
+        Args:
+            other (Union[Vec, VecArray]): The other vector(s).
+
+        Returns:
+            VecArray: The resulting vectors.
+        """
+        return VecArray(self.arr - _as_batch(other))
+
+    def dot(self,
+            other: Union[Vec, 'VecArray']) -> 'VecArray':
+        """Compute the element-wise product with another vector (broadcasted) or batch of vectors.
+
+        Args:
+            other (Union[Vec, VecArray]): The other vector(s).
+
+        Returns:
+            VecArray: The resulting vectors.
+        """
+        return VecArray(self.arr * _as_batch(other))
+
+    def scale(self,
+              v: float) -> 'VecArray':
+        """Scale the vectors by a value.
+
+        Args:
+            v (float): The scale factor.
+
+        Returns:
+            VecArray: The scaled vectors.
+        """
+        return VecArray(self.arr * v)
+
+    def opposite(self) -> 'VecArray':
+        """Invert the direction of the vectors along all dimensions.
+
+        Returns:
+            VecArray: The opposite vectors.
+        """
+        return self.scale(v=-1)
+
+    @property
+    def is_zero(self) -> npt.NDArray[np.bool8]:
+        return np.all(self.arr == 0, axis=1)
+
+    @staticmethod
+    def max(v1: 'VecArray',
+            v2: Union[Vec, 'VecArray']) -> 'VecArray':
+        return VecArray(np.maximum(v1.arr, _as_batch(v2)))
+
+    @staticmethod
+    def min(v1: 'VecArray',
+            v2: Union[Vec, 'VecArray']) -> 'VecArray':
+        return VecArray(np.minimum(v1.arr, _as_batch(v2)))
+
+
+def _as_batch(v: Union[Vec, VecArray]) -> npt.NDArray[Any]:
+    """Get the array of a vector or batch of vectors, for broadcasting.
+
+    Args:
+        v (Union[Vec, VecArray]): The vector(s).
+
+    Returns:
+        npt.NDArray[Any]: The array.
+    """
+    return v.arr if isinstance(v, VecArray) else np.asarray(v.as_tuple())
+
+
 class Orientation(Enum):
     """Enum of different orientations. Values are the same used in the Space Engineer's API."""
     UP = Vec.v3i(0, 1, 0)
@@ -414,6 +654,11 @@ orientation_from_str = {
 }
 
 
+# Directions and their indices, in the same order of `Orientation`
+_directions: List[Orientation] = list(Orientation)
+_direction_index: Dict[Vec, int] = {o.value: i for i, o in enumerate(_directions)}
+
+
 def orientation_from_vec(vec: Vec) -> Orientation:
     """Get the orientation given its Vec.
 
@@ -426,6 +671,9 @@ def orientation_from_vec(vec: Vec) -> Orientation:
     Returns:
         Orientation: The corresponding orientation.
     """
+    i = _direction_index.get(vec, None)
+    if i is not None:
+        return _directions[i]
     if vec.x == 0:
         if vec.y == 0:
             if vec.z == -1:
@@ -453,8 +701,8 @@ def orientation_from_vec(vec: Vec) -> Orientation:
 character_camera_dist = Vec.v3f(0., 1.6369286, 0.)
 
 
-def get_rotation_matrix(forward: Vec,
-                        up: Vec) -> npt.NDArray[np.float32]:
+def _compute_rotation_matrix(forward: Vec,
+                             up: Vec) -> npt.NDArray[np.float32]:
     """Compute the rotation matrix from the forward and up vectors.
 
     Args:
@@ -472,6 +720,103 @@ def get_rotation_matrix(forward: Vec,
     return np.column_stack((x, y, -z))
 
 
+# All 24 valid (forward, up) block orientations, indexed by orientation code
+orientation_codes: List[Tuple[Orientation, Orientation]] = [(f, u) for f in _directions for u in _directions if f.value.dot(u.value).is_zero]
+_orientation_code_index: Dict[Tuple[Vec, Vec], int] = {(f.value, u.value): i for i, (f, u) in enumerate(orientation_codes)}
+# Rotation matrix of each orientation code
+rotation_matrices_table: npt.NDArray[np.float32] = np.stack([_compute_rotation_matrix(forward=f.value, up=u.value) for f, u in orientation_codes])
+rotation_matrices_table.setflags(write=False)
+_rotation_codes: Dict[bytes, int] = {np.rint(m).astype(np.int8).tobytes(): i for i, m in enumerate(rotation_matrices_table)}
+# `composition_table[a, b]` is the code of the rotation `R_a @ R_b`
+composition_table: npt.NDArray[np.uint8] = np.asarray([[_rotation_codes[np.rint(ma @ mb).astype(np.int8).tobytes()] for mb in rotation_matrices_table] for ma in rotation_matrices_table], dtype=np.uint8)
+# `inverse_table[a]` is the code of the rotation `R_a^-1`
+inverse_table: npt.NDArray[np.uint8] = np.asarray([_rotation_codes[np.rint(m.T).astype(np.int8).tobytes()] for m in rotation_matrices_table], dtype=np.uint8)
+# `face_table[a, d]` is the index of the direction `d` once rotated by `R_a`
+face_table: npt.NDArray[np.uint8] = np.asarray([[_direction_index[Vec.from_np(np.rint(m @ d.value.as_array()).astype(int))] for d in _directions] for m in rotation_matrices_table], dtype=np.uint8)
+# `opposite_table[d]` is the index of the direction opposite to `d`
+opposite_table: npt.NDArray[np.uint8] = np.asarray([_direction_index[d.value.opposite()] for d in _directions], dtype=np.uint8)
+
+
+def direction_index(vec: Vec) -> int:
+    """Get the index of a direction vector.
+
+    Args:
+        vec (Vec): The direction vector.
+
+    Raises:
+        ValueError: Raised if the vector is not a valid direction.
+
+    Returns:
+        int: The index of the direction.
+    """
+    i = _direction_index.get(vec, None)
+    if i is None:
+        raise ValueError(f'Vector {vec} is not a valid orientation vector.')
+    return i
+
+
+def orientation_code(forward: Vec,
+                     up: Vec) -> int:
+    """Get the code of a block orientation.
+
+    Args:
+        forward (Vec): The forward vector.
+        up (Vec): The up vector.
+
+    Raises:
+        ValueError: Raised if the vectors are not a valid block orientation.
+
+    Returns:
+        int: The orientation code.
+    """
+    code = _orientation_code_index.get((forward, up), None)
+    if code is None:
+        raise ValueError(f'Vectors {forward} and {up} are not a valid block orientation.')
+    return code
+
+
+def orientation_from_code(code: int) -> Tuple[Orientation, Orientation]:
+    """Get the forward and up orientations of an orientation code.
+
+    Args:
+        code (int): The orientation code.
+
+    Returns:
+        Tuple[Orientation, Orientation]: The forward and up orientations.
+    """
+    return orientation_codes[code]
+
+
+def get_rotation_matrix(forward: Vec,
+                        up: Vec) -> npt.NDArray[np.float32]:
+    """Compute the rotation matrix from the forward and up vectors.
+
+    Args:
+        forward (Vec): The forward vector.
+        up (Vec): The up vector.
+
+    Returns:
+        npt.NDArray[np.float32]: The rotation matrix.
+    """
+    code = _orientation_code_index.get((forward, up), None)
+    if code is not None:
+        return rotation_matrices_table[code]
+    return _compute_rotation_matrix(forward=forward,
+                                    up=up)
+
+
+def get_rotation_matrix_from_code(code: int) -> npt.NDArray[np.float32]:
+    """Get the rotation matrix of an orientation code.
+
+    Args:
+        code (int): The orientation code.
+
+    Returns:
+        npt.NDArray[np.float32]: The (read-only) rotation matrix.
+    """
+    return rotation_matrices_table[code]
+
+
 def rotate(rotation_matrix: npt.NDArray[np.float32],
            vector: Vec) -> Vec:
     """Rotate a vector using a rotation matrix.
@@ -486,3 +831,194 @@ def rotate(rotation_matrix: npt.NDArray[np.float32],
     v = vector.as_array()
     v = np.dot(rotation_matrix, v)
     return Vec.from_np(v)
+
+
+def rotate_direction(code: int,
+                     direction: int) -> int:
+    """Rotate a direction by the rotation of an orientation code.
+
+    Args:
+        code (int): The orientation code.
+        direction (int): The direction index.
+
+    Returns:
+        int: The index of the rotated direction.
+    """
+    return int(face_table[code, direction])
+
+
+def compose_orientations(code1: int,
+                         code2: int) -> int:
+    """Compose the rotations of two orientation codes (`R_code1 @ R_code2`).
+
+    Args:
+        code1 (int): The first orientation code.
+        code2 (int): The second orientation code.
+
+    Returns:
+        int: The orientation code of the composed rotation.
+    """
+    return int(composition_table[code1, code2])
+
+
+def invert_orientation(code: int) -> int:
+    """Get the orientation code of the inverse rotation.
+
+    Args:
+        code (int): The orientation code.
+
+    Returns:
+        int: The orientation code of the inverse rotation.
+    """
+    return int(inverse_table[code])
+
+
+class Transform:
+    __slots__ = ['matrix', 'translation']
+
+    def __init__(self,
+                 matrix: Optional[npt.NDArray[np.int64]] = None,
+                 translation: Optional[npt.NDArray[np.int64]] = None) -> None:
+        """Create an axis-aligned rigid transform: a signed permutation of the axes followed by a translation.
+        Transforms are applied to row vectors as `v @ matrix.T + translation`.
+
+        Args:
+            matrix (Optional[npt.NDArray[np.int64]], optional): The 3x3 signed permutation matrix. Defaults to the identity.
+            translation (Optional[npt.NDArray[np.int64]], optional): The XYZ translation. Defaults to no translation.
+
+        Raises:
+            ValueError: Raised if the matrix is not a signed permutation matrix.
+        """
+        self.matrix = np.eye(3, dtype=np.int64) if matrix is None else np.asarray(matrix, dtype=np.int64)
+        self.translation = np.zeros(3, dtype=np.int64) if translation is None else np.asarray(translation, dtype=np.int64)
+        if not (np.all(np.abs(self.matrix).sum(axis=0) == 1) and np.all(np.abs(self.matrix).sum(axis=1) == 1)):
+            raise ValueError(f'Matrix {self.matrix.tolist()} is not a signed permutation matrix.')
+
+    def __repr__(self) -> str:
+        return f'Transform(matrix={self.matrix.tolist()}, translation={self.translation.tolist()})'
+
+    def __eq__(self,
+               other: 'Transform') -> bool:
+        if isinstance(other, self.__class__):
+            return np.array_equal(self.matrix, other.matrix) and np.array_equal(self.translation, other.translation)
+        else:
+            return False
+
+    @classmethod
+    def rotation(cls,
+                 along: int,
+                 k: int) -> 'Transform':
+        """Create the rotation around an axis _k_ times ccw by 90 degrees.
+
+        Args:
+            along (int): The axis to rotate along (0, 1, 2).
+            k (int): How many times to rotate for in the ccw direction.
+
+        Returns:
+            Transform: The rotation.
+        """
+        i, j = [a for a in range(3) if a != along % 3]
+        r = np.eye(3, dtype=np.int64)
+        r[[i, i, j, j], [i, j, i, j]] = [0, -1, 1, 0]
+        return cls(matrix=np.linalg.matrix_power(r, k % 4))
+
+    @classmethod
+    def translate(cls,
+                  translation: Tuple[int, int, int]) -> 'Transform':
+        """Create a translation.
+
+        Args:
+            translation (Tuple[int, int, int]): The XYZ translation.
+
+        Returns:
+            Transform: The translation.
+        """
+        return cls(translation=translation)
+
+    @property
+    def is_rotation(self) -> bool:
+        """Check if the transform preserves handedness (ie: it is one of the 24 axis-aligned rotations, plus translation).
+
+        Returns:
+            bool: Whether the matrix is a proper rotation.
+        """
+        return round(np.linalg.det(self.matrix)) == 1
+
+    def compose(self,
+                other: 'Transform') -> 'Transform':
+        """Compose this transform with another one, applied after this one.
+
+        Args:
+            other (Transform): The transform to apply after this one.
+
+        Returns:
+            Transform: The composed transform.
+        """
+        return Transform(matrix=other.matrix @ self.matrix,
+                         translation=other.matrix @ self.translation + other.translation)
+
+    def inverse(self) -> 'Transform':
+        """Get the inverse transform.
+
+        Returns:
+            Transform: The inverse transform.
+        """
+        return Transform(matrix=self.matrix.T,
+                         translation=-(self.matrix.T @ self.translation))
+
+    def apply(self,
+              points: npt.NDArray[np.int64]) -> npt.NDArray[np.int64]:
+        """Apply the transform to points.
+
+        Args:
+            points (npt.NDArray[np.int64]): The (N, 3) points.
+
+        Returns:
+            npt.NDArray[np.int64]: The transformed points.
+        """
+        return points @ self.matrix.T + self.translation
+
+    def apply_vectors(self,
+                      vectors: npt.NDArray[np.int64]) -> npt.NDArray[np.int64]:
+        """Apply the transform to direction vectors (the translation is ignored).
+
+        Args:
+            vectors (npt.NDArray[np.int64]): The (N, 3) vectors.
+
+        Returns:
+            npt.NDArray[np.int64]: The transformed vectors.
+        """
+        return vectors @ self.matrix.T
+
+    def bounds(self,
+               lo: Tuple[int, int, int],
+               hi: Tuple[int, int, int]) -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
+        """Transform an axis-aligned bounding box.
+
+        Args:
+            lo (Tuple[int, int, int]): The minimum XYZ coordinates.
+            hi (Tuple[int, int, int]): The maximum XYZ coordinates.
+
+        Returns:
+            Tuple[Tuple[int, int, int], Tuple[int, int, int]]: The transformed minimum and maximum XYZ coordinates.
+        """
+        corners = self.apply(np.asarray([lo, hi], dtype=np.int64))
+        return tuple(corners.min(axis=0).tolist()), tuple(corners.max(axis=0).tolist())
+
+
+def _get_axis_aligned_rotations() -> List[Transform]:
+    """Enumerate all signed permutation matrices that are proper rotations.
+
+    Returns:
+        List[Transform]: The 24 axis-aligned rotations.
+    """
+    rotations = []
+    for p in permutations(range(3)):
+        for signs in product([1, -1], repeat=3):
+            m = np.eye(3, dtype=np.int64)[list(p)] * np.asarray(signs)[:, None]
+            if round(np.linalg.det(m)) == 1:
+                rotations.append(Transform(matrix=m))
+    return rotations
+
+
+axis_aligned_rotations = _get_axis_aligned_rotations()
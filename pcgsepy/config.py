@@ -33,6 +33,10 @@ REQ_TILES = config['L-SYSTEM'].get('req_tiles').split(',')
 N_ITERATIONS = config['L-SYSTEM'].getint('n_iterations')
 # number of axioms generated at each expansion step
 N_SPE = config['L-SYSTEM'].getint('n_axioms_generated')
+# number of worker processes used by the solvers (0 to solve in the main process)
+N_WORKERS = config['L-SYSTEM'].getint('n_workers')
+# number of tasks sent to a worker at once
+WORKERS_CHUNKSIZE = config['L-SYSTEM'].getint('workers_chunksize')
 
 # initial mutation probability
 MUTATION_INITIAL_P = config['GENOPS'].getfloat('mutations_initial_p')
@@ -51,6 +55,8 @@ N_GENS = config['FI2POP'].getint('n_generations')
 MAX_STRING_LEN = config['FI2POP'].getint('max_string_len')
 # maximum patience when generating new pools
 GEN_PATIENCE = config['FI2POP'].getint('gen_patience')
+# maximum number of attempts when generating new pools (-1 for unlimited attempts)
+GEN_MAX_ATTEMPTS = config['FI2POP'].getint('gen_max_attempts')
 
 # use or don't use the bounding box fitness
 USE_BBOX = config['FITNESS'].get('use_bounding_box')
@@ -62,6 +68,8 @@ MAME_MEAN = config['FITNESS'].getfloat('mame_mean')
 MAME_STD = config['FITNESS'].getfloat('mame_std')
 MAMI_MEAN = config['FITNESS'].getfloat('mami_mean')
 MAMI_STD = config['FITNESS'].getfloat('mami_std')
+# maximum absolute error of the tabulated (normalized) KDE fitnesses
+KDE_TABLE_TOL = config['FITNESS'].getfloat('kde_table_tolerance')
 MAX_X_SIZE = config['MAPELITES'].getint('max_x_size')
 MAX_Y_SIZE = config['MAPELITES'].getint('max_y_size')
 MAX_Z_SIZE = config['MAPELITES'].getint('max_z_size')
@@ -91,6 +99,8 @@ N_EPOCHS = config['MAPELITES'].getint('n_epochs')
 X_RANGE = tuple([int(x) for x in config['MAPELITES'].get('x_range').split(',')])
 Y_RANGE = tuple([int(x) for x in config['MAPELITES'].get('y_range').split(',')])
 Z_RANGE = tuple([int(x) for x in config['MAPELITES'].get('z_range').split(',')])
+# maximum number of evaluated solutions remembered by the archive
+EVALUATIONS_CACHE_SIZE = config['MAPELITES'].getint('evaluations_cache_size')
 
 # number of experiments to run
 N_RUNS = config['EXPERIMENT'].getint('n_runs')
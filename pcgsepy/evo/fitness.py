@@ -1,31 +1,33 @@
 import math
-import pickle
 from typing import Any, Callable, Dict, Tuple
 
 import numpy as np
-from pcgsepy.config import BBOX_X, BBOX_Y, BBOX_Z
+from pcgsepy.config import BBOX_X, BBOX_Y, BBOX_Z, KDE_TABLE_TOL
+from pcgsepy.evo.kde_table import KDETable
 from pcgsepy.lsystem.solution import CandidateSolution
-from scipy.stats import gaussian_kde
-
-# load pickled estimators
-with open('./estimators/futo.pkl', 'rb') as f:
-    futo_es: gaussian_kde = pickle.load(f)
-with open('./estimators/tovo.pkl', 'rb') as f:
-    tovo_es: gaussian_kde = pickle.load(f)
-with open('./estimators/mame.pkl', 'rb') as f:
-    mame_es: gaussian_kde = pickle.load(f)
-with open('./estimators/mami.pkl', 'rb') as f:
-    mami_es: gaussian_kde = pickle.load(f)
-# Compute max values for estimators to normalize fitnesses
-# values are chosen upon inspection.
-x = np.linspace(0, 0.5, int(0.5 / 0.005))
-futo_max = float(np.max(futo_es.evaluate(x)))
-x = np.linspace(0, 1, int(1 / 0.005))
-tovo_max = float(np.max(tovo_es.evaluate(x)))
-x = np.linspace(0, 6, int(6 / 0.005))
-mame_max = float(np.max(mame_es.evaluate(x)))
-x = np.linspace(0, 10, int(10 / 0.005))
-mami_max = float(np.max(mami_es.evaluate(x)))
+
+# load the tabulated pickled estimators (tables are built and cached on first use)
+# max values for estimators to normalize fitnesses are chosen upon inspection.
+futo_es = KDETable.load_or_build(filename='./estimators/futo.pkl',
+                                 max_range=(0, 0.5),
+                                 max_step=0.005,
+                                 tol=KDE_TABLE_TOL)
+tovo_es = KDETable.load_or_build(filename='./estimators/tovo.pkl',
+                                 max_range=(0, 1),
+                                 max_step=0.005,
+                                 tol=KDE_TABLE_TOL)
+mame_es = KDETable.load_or_build(filename='./estimators/mame.pkl',
+                                 max_range=(0, 6),
+                                 max_step=0.005,
+                                 tol=KDE_TABLE_TOL)
+mami_es = KDETable.load_or_build(filename='./estimators/mami.pkl',
+                                 max_range=(0, 10),
+                                 max_step=0.005,
+                                 tol=KDE_TABLE_TOL)
+futo_max = futo_es.max
+tovo_max = tovo_es.max
+mame_max = mame_es.max
+mami_max = mami_es.max
 
 
 def bounding_box_fitness(cs: CandidateSolution) -> float:
@@ -56,7 +58,7 @@ def box_filling_fitness(cs: CandidateSolution) -> float:
     Returns:
         float: The fitness value.
     """
-    return tovo_es.evaluate(sum([b.volume for b in cs.content._blocks.values()]) / math.prod(cs.content.as_array.shape))[0] / tovo_max
+    return tovo_es(sum([b.volume for b in cs.content._blocks.values()]) / math.prod(cs.content.as_array.shape)) / tovo_max
 
 
 def func_blocks_fitness(cs: CandidateSolution) -> float:
@@ -73,7 +75,7 @@ def func_blocks_fitness(cs: CandidateSolution) -> float:
     for b in cs.content._blocks.values():
         fu += b.volume if not b.block_type.startswith('MyObjectBuilder_CubeBlock_') else 0
         to += b.volume
-    return futo_es.evaluate(fu / to)[0] / futo_max
+    return futo_es(fu / to) / futo_max
 
 
 def mame_fitness(cs: CandidateSolution) -> float:
@@ -87,7 +89,7 @@ def mame_fitness(cs: CandidateSolution) -> float:
         float: The fitness value.
     """
     largest_axis, medium_axis, _ = reversed(sorted(list(cs.content.as_array.shape)))
-    return mame_es.evaluate(largest_axis / medium_axis)[0] / mame_max
+    return mame_es(largest_axis / medium_axis) / mame_max
 
 
 def mami_fitness(cs: CandidateSolution) -> float:
@@ -101,7 +103,7 @@ def mami_fitness(cs: CandidateSolution) -> float:
         float: The fitness value.
     """
     largest_axis, _, smallest_axis = reversed(sorted(list(cs.content.as_array.shape)))
-    return mami_es.evaluate(largest_axis / smallest_axis)[0] / mami_max
+    return mami_es(largest_axis / smallest_axis) / mami_max
 
 
 fitness_functions = {
@@ -0,0 +1,326 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from pcgsepy.common.regex_handler import LHSMatcher
+from pcgsepy.lsystem.rules import StochasticRules
+
+
+# argument value of tokens without argument
+NO_ARG = -1
+# argument pattern of LHS tokens matching any single digit (`x`, `X` or `Y`)
+ANY_DIGIT = -2
+
+
+def rules_atoms(rules: StochasticRules) -> List[str]:
+    """Get the atoms used in the rules.
+    Atoms concatenated without arguments (eg: `RotYcwXcorridorsimple`) are split on the other atoms they start or end with.
+
+    Args:
+        rules (StochasticRules): The set of rules.
+
+    Returns:
+        List[str]: The atoms, sorted.
+    """
+    atoms = set()
+    for s in rules.get_lhs() + rules.get_all_rhs():
+        atoms.update([x for x in re.split(r'\([^)]*\)|\[|\]', s) if x])
+    split = True
+    while split:
+        split = False
+        for x in sorted(atoms, key=len, reverse=True):
+            for y in atoms:
+                if x != y and (x.startswith(y) or x.endswith(y)):
+                    atoms.remove(x)
+                    atoms.add(x[len(y):] if x.startswith(y) else x[:-len(y)])
+                    split = True
+                    break
+            if split:
+                break
+    return sorted(atoms)
+
+
+class TokenVocabulary:
+    __slots__ = ['names', 'ids', 'regex', 'open_id', 'close_id', 'genomes', 'max_genomes']
+
+    def __init__(self,
+                 atoms: List[str],
+                 max_genomes: int = 10000) -> None:
+        """Create the vocabulary of the token genomes.
+        Strings are tokenized in a single scan, trying the longest atoms first. Each atom can be followed by a numerical
+        argument. Text between atoms is kept as opaque tokens, added to the vocabulary when first seen, so every string
+        can be converted back and forth.
+
+        Args:
+            atoms (List[str]): The atoms (brackets are always included).
+            max_genomes (int, optional): The maximum number of interned genomes. Defaults to `10000`.
+        """
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        for atom in ['[', ']', *atoms]:
+            self._get_id(name=atom)
+        self.open_id, self.close_id = self.ids['['], self.ids[']']
+        atoms = sorted(self.names, key=len, reverse=True)
+        self.regex = re.compile('(' + '|'.join([re.escape(atom) for atom in atoms]) + r')(?:\((0|[1-9]\d*)\))?')
+        self.genomes: Dict[str, 'TokenGenome'] = {}
+        self.max_genomes = max_genomes
+
+    def _get_id(self,
+                name: str) -> int:
+        i = self.ids.get(name, None)
+        if i is None:
+            if len(self.names) > np.iinfo(np.int16).max:
+                raise OverflowError(f'Too many tokens in the vocabulary: cannot add {name!r} as an int16 token id.')
+            i = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+    def tokenize(self,
+                 string: str) -> Tuple[List[int], List[int]]:
+        """Tokenize the string.
+
+        Args:
+            string (str): The string.
+
+        Returns:
+            Tuple[List[int], List[int]]: The token ids and their arguments (`NO_ARG` if the token has no argument).
+        """
+        tokens, args, pos = [], [], 0
+        for match in self.regex.finditer(string):
+            if match.start() > pos:
+                tokens.append(self._get_id(name=string[pos:match.start()]))
+                args.append(NO_ARG)
+            tokens.append(self.ids[match[1]])
+            args.append(int(match[2]) if match[2] is not None else NO_ARG)
+            pos = match.end()
+        if pos < len(string):
+            tokens.append(self._get_id(name=string[pos:]))
+            args.append(NO_ARG)
+        return tokens, args
+
+    def intern(self,
+               string: str) -> 'TokenGenome':
+        """Get the genome of the string, tokenizing it only the first time it is seen.
+        Genomes are never modified, so the same genome is shared by all equal strings. Genomes created by editing other
+        genomes are interned once their string is first computed.
+
+        Args:
+            string (str): The string.
+
+        Returns:
+            TokenGenome: The genome.
+        """
+        genome = self.genomes.get(string, None)
+        if genome is None:
+            tokens, args = self.tokenize(string=string)
+            genome = TokenGenome(vocabulary=self,
+                                 tokens=np.asarray(tokens, dtype=np.int16),
+                                 args=np.asarray(args, dtype=np.int32),
+                                 string=string)
+            self._store(genome=genome)
+        return genome
+
+    def _store(self,
+               genome: 'TokenGenome') -> None:
+        if len(self.genomes) >= self.max_genomes:
+            self.genomes.clear()
+        # only genomes whose string is already known are stored
+        self.genomes[genome._string] = genome
+
+
+class TokenGenome:
+    __slots__ = ['vocabulary', 'tokens', 'args', '_partners', '_string']
+
+    def __init__(self,
+                 vocabulary: TokenVocabulary,
+                 tokens: npt.NDArray[np.int16],
+                 args: npt.NDArray[np.int32],
+                 string: Optional[str] = None) -> None:
+        """Create a genome as an array of tokens.
+
+        Args:
+            vocabulary (TokenVocabulary): The vocabulary of the tokens.
+            tokens (npt.NDArray[np.int16]): The token ids.
+            args (npt.NDArray[np.int32]): The argument of each token (`NO_ARG` if the token has no argument).
+            string (Optional[str], optional): The string of the genome, if known. Defaults to `None`.
+        """
+        self.vocabulary = vocabulary
+        self.tokens = tokens
+        self.args = args
+        self._partners: npt.NDArray[np.int32] = None
+        self._string = string
+
+    def __len__(self) -> int:
+        return self.tokens.shape[0]
+
+    def __str__(self) -> str:
+        return self.to_string()
+
+    def __repr__(self) -> str:
+        return f'TokenGenome({self.to_string()!r})'
+
+    def token_string(self,
+                     i: int) -> str:
+        """Get the string of a single token.
+
+        Args:
+            i (int): The token index.
+
+        Returns:
+            str: The token string.
+        """
+        name, arg = self.vocabulary.names[self.tokens[i]], self.args[i]
+        return name if arg == NO_ARG else f'{name}({arg})'
+
+    def to_string(self) -> str:
+        """Convert the genome to its string, interning the genome the first time.
+
+        Returns:
+            str: The string.
+        """
+        if self._string is None:
+            names = self.vocabulary.names
+            self._string = ''.join([names[t] if a == NO_ARG else f'{names[t]}({a})' for t, a in zip(self.tokens.tolist(), self.args.tolist())])
+            self.vocabulary._store(genome=self)
+        return self._string
+
+    @property
+    def partners(self) -> npt.NDArray[np.int32]:
+        """Get the index of the matching bracket of each token, computed on first use.
+
+        Returns:
+            npt.NDArray[np.int32]: The index of the matching bracket (`-1` for tokens that are not matched brackets).
+        """
+        if self._partners is None:
+            partners = np.full(shape=len(self), fill_value=-1, dtype=np.int32)
+            open_id, close_id = self.vocabulary.open_id, self.vocabulary.close_id
+            stack = []
+            for i, t in zip(np.flatnonzero((self.tokens == open_id) | (self.tokens == close_id)).tolist(),
+                            self.tokens[(self.tokens == open_id) | (self.tokens == close_id)].tolist()):
+                if t == open_id:
+                    stack.append(i)
+                elif stack:
+                    j = stack.pop()
+                    partners[i], partners[j] = j, i
+            self._partners = partners
+        return self._partners
+
+    def brackets(self) -> List[Tuple[int, int]]:
+        """Get the indexes of the matching brackets.
+
+        Returns:
+            List[Tuple[int, int]]: The indexes of each opening bracket and of its closing bracket, sorted.
+        """
+        partners = self.partners
+        opens = np.flatnonzero((self.tokens == self.vocabulary.open_id) & (partners >= 0))
+        return list(zip(opens.tolist(), partners[opens].tolist()))
+
+    def replace(self,
+                spans: List[Tuple[int, int]],
+                genomes: List['TokenGenome']) -> 'TokenGenome':
+        """Replace the tokens in each span with the tokens of the corresponding genome.
+
+        Args:
+            spans (List[Tuple[int, int]]): The sorted, non-overlapping spans (`end` excluded) of tokens.
+            genomes (List[TokenGenome]): The replacement genomes.
+
+        Returns:
+            TokenGenome: The new genome.
+        """
+        tokens, args, pos = [], [], 0
+        for (start, end), genome in zip(spans, genomes):
+            tokens.extend([self.tokens[pos:start], genome.tokens])
+            args.extend([self.args[pos:start], genome.args])
+            pos = end
+        tokens.append(self.tokens[pos:])
+        args.append(self.args[pos:])
+        return TokenGenome(vocabulary=self.vocabulary,
+                           tokens=np.concatenate(tokens),
+                           args=np.concatenate(args))
+
+    def splice(self,
+               start: int,
+               end: int,
+               other: 'TokenGenome',
+               other_start: int,
+               other_end: int) -> 'TokenGenome':
+        """Replace a span of tokens with a span of tokens of another genome.
+
+        Args:
+            start (int): The start of the span.
+            end (int): The end of the span (excluded).
+            other (TokenGenome): The other genome.
+            other_start (int): The start of the span in the other genome.
+            other_end (int): The end of the span in the other genome (excluded).
+
+        Returns:
+            TokenGenome: The new genome.
+        """
+        return self.replace(spans=[(start, end)],
+                            genomes=[TokenGenome(vocabulary=other.vocabulary,
+                                                 tokens=other.tokens[other_start:other_end],
+                                                 args=other.args[other_start:other_end])])
+
+
+class TokenMatcher:
+    __slots__ = ['vocabulary', 'lhs', 'patterns']
+
+    def __init__(self,
+                 vocabulary: TokenVocabulary,
+                 lhs_matcher: LHSMatcher) -> None:
+        """Create a matcher of the LHS rules on token genomes, from the matcher of the same rules on strings.
+        The LHS are tried in the same order as in `lhs_matcher` (the longest LHS first at each position, ties go to the
+        first LHS) and matches do not overlap. `x`, `X` and `Y` arguments match any single-digit argument.
+
+        Args:
+            vocabulary (TokenVocabulary): The vocabulary of the genomes.
+            lhs_matcher (LHSMatcher): The matcher of the LHS rules on strings (eg: `StochasticRules.matcher`).
+        """
+        self.vocabulary = vocabulary
+        self.lhs = lhs_matcher.lhs
+        self.patterns: List[Tuple[npt.NDArray[np.int16], npt.NDArray[np.int32]]] = []
+        for x in self.lhs:
+            tokens, args = [], []
+            # alternating atoms and arguments, each argument applying to the last atom before it
+            parts = re.split(r'\(([^)]*)\)', x)
+            for i, part in enumerate(parts):
+                if i % 2 == 0:
+                    part_tokens, part_args = vocabulary.tokenize(string=part)
+                    tokens.extend(part_tokens)
+                    args.extend(part_args)
+                else:
+                    args[-1] = ANY_DIGIT if part in ['x', 'X', 'Y'] else int(part)
+            self.patterns.append((np.asarray(tokens, dtype=np.int16), np.asarray(args, dtype=np.int32)))
+
+    def finditer(self,
+                 genome: TokenGenome) -> List[Tuple[int, int, str]]:
+        """Find all matches in the genome.
+
+        Args:
+            genome (TokenGenome): The genome.
+
+        Returns:
+            List[Tuple[int, int, str]]: The sorted, non-overlapping matches as token spans (`end` excluded) and matching LHS.
+        """
+        n = len(genome)
+        best = np.full(shape=n, fill_value=-1, dtype=np.int64)
+        # lower priority patterns first, so higher priority ones overwrite them
+        for p in reversed(range(len(self.patterns))):
+            tokens, args = self.patterns[p]
+            m = tokens.shape[0]
+            if m == 0 or m > n:
+                continue
+            matched = np.ones(shape=n - m + 1, dtype=bool)
+            for k in range(m):
+                matched &= genome.tokens[k:n - m + 1 + k] == tokens[k]
+                a = genome.args[k:n - m + 1 + k]
+                matched &= ((a >= 0) & (a <= 9)) if args[k] == ANY_DIGIT else (a == args[k])
+            best[:n - m + 1][matched] = p
+        matches, pos = [], 0
+        for i in np.flatnonzero(best >= 0).tolist():
+            if i >= pos:
+                p = best[i]
+                pos = i + self.patterns[p][0].shape[0]
+                matches.append((i, pos, self.lhs[p]))
+        return matches
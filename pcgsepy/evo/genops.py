@@ -2,13 +2,14 @@ import logging
 import math
 from random import choices, random, sample
 import re
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import numpy as np
-from pcgsepy.common.regex_handler import MyMatch, extract_regex
-from pcgsepy.common.str_utils import get_matching_brackets
+import numpy.typing as npt
+from pcgsepy.common.regex_handler import extract_regex
 from pcgsepy.config import (CROSSOVER_P, MUTATION_DECAY, MUTATION_INITIAL_P,
                             PL_HIGH, PL_LOW)
+from pcgsepy.evo.genome import TokenMatcher, TokenVocabulary, rules_atoms
 from pcgsepy.lsystem.rules import StochasticRules
 from pcgsepy.lsystem.solution import CandidateSolution, string_merging
 
@@ -45,10 +46,67 @@ def roulette_wheel_selection(pop: List[CandidateSolution],
     raise EvoException('Unable to find valid solution')
 
 
+class RouletteWheel:
+    __slots__ = ['weights', 'cumulative', 'rng']
+
+    def __init__(self,
+                 pop: List[CandidateSolution],
+                 minimize: bool = False,
+                 rng: Optional[np.random.Generator] = None) -> None:
+        """Create a roulette wheel (fitness proportional selection) over a population.
+        The cumulative fitness is computed once, so any number of selections can be drawn in batch.
+
+        Args:
+            pop (List[CandidateSolution]): The list of solutions from which select from.
+            minimize (bool, optional): Whether lower fitness values are better. Defaults to False.
+            rng (Optional[np.random.Generator], optional): The random generator. Defaults to `None` (seeded from NumPy's global random state).
+        """
+        self.weights = np.asarray([cs.c_fitness for cs in pop], dtype=np.float64)
+        if minimize:
+            self.weights = 1 / (self.weights + 1e-6)
+        self.cumulative = np.cumsum(self.weights)
+        self.rng = rng if rng is not None else np.random.default_rng(np.random.randint(0, 2 ** 32, dtype=np.uint32))
+
+    def select(self,
+               n: int,
+               k: int = 1,
+               replace: bool = True) -> npt.NDArray[np.int64]:
+        """Select `n` groups of `k` solutions.
+
+        Args:
+            n (int): The number of groups.
+            k (int, optional): The number of solutions in each group. Defaults to 1.
+            replace (bool, optional): Whether the same solution can appear more than once in a group. Defaults to True.
+
+        Raises:
+            EvoException: Raised if there are not enough solutions to select from.
+
+        Returns:
+            npt.NDArray[np.int64]: The (n, k) indexes of the selected solutions.
+        """
+        size = self.weights.shape[0]
+        if size == 0 or (not replace and k > size):
+            raise EvoException(f'Unable to select {k} solutions from {size} solutions.')
+        if replace:
+            # first solution whose cumulative fitness reaches the draw, as in `roulette_wheel_selection`
+            u = self.rng.random(size=(n, k)) * self.cumulative[-1]
+            return np.minimum(np.searchsorted(self.cumulative, u, side='left'), size - 1)
+        # sequential selection without replacement is equivalent to picking the largest keys u^(1/w) (Efraimidis-Spirakis)
+        u = self.rng.random(size=(n, size))
+        with np.errstate(divide='ignore'):
+            keys = np.log(u) / self.weights
+        keys[:, self.weights <= 0] = -np.inf
+        return np.argsort(-keys, axis=1, kind='stable')[:, :k]
+
+
 class SimplifiedExpander:
     def __init__(self):
         self.rules: StochasticRules = None
         self.compiled_lhs = None
+        self._vocabulary: TokenVocabulary = None
+        self._matcher: TokenMatcher = None
+        # version of the rules the vocabulary and the matcher were built from
+        self._version: int = None
 
     def initialize(self,
                    rules: StochasticRules):
@@ -58,7 +116,27 @@ class SimplifiedExpander:
             rules (StochasticRules): The set of expansion rules.
         """
         self.rules = rules
-        self.compiled_lhs = [extract_regex(lhs) for lhs in rules.get_lhs()]
+        self._version = None
+        self._update()
+
+    def _update(self) -> None:
+        """Rebuild the vocabulary and the matcher if the rules changed since they were built."""
+        if self.rules is not None and self._version != self.rules.version:
+            self.compiled_lhs = [extract_regex(lhs) for lhs in self.rules.get_lhs()]
+            self._vocabulary = TokenVocabulary(atoms=rules_atoms(rules=self.rules))
+            self._matcher = TokenMatcher(vocabulary=self._vocabulary,
+                                         lhs_matcher=self.rules.matcher)
+            self._version = self.rules.version
+
+    @property
+    def vocabulary(self) -> TokenVocabulary:
+        self._update()
+        return self._vocabulary
+
+    @property
+    def matcher(self) -> TokenMatcher:
+        self._update()
+        return self._matcher
 
 
 # module-scoped uninitialized variable
@@ -88,46 +166,36 @@ def mutate(cs: CandidateSolution,
             # ...[RotYccwZ corridorsimple corridorsimple][RotYcwZ corridorsimple corridorsimple]...
             # ->
             # ...[RotYccwZ [RotYcwX corridorsimple] corridorsimple][RotYcwZ [RotYcwX corridorsimple] corridorsimple]...
-            # get all matches with regex
-            matches: List[MyMatch] = []
-            for r, rule in zip(expander.compiled_lhs, expander.rules.get_lhs()):
-                matches.extend([MyMatch(lhs=rule,
-                                        span=match.span(),
-                                        lhs_string=match.group()) for match in r.finditer(string=cs.hls_mod[module]['string'])])
-            logging.getLogger('genops').debug(f'[{__name__}.mutate] {len(matches)=}')
-            # sort matches in-place
-            matches.sort()
-            if matches:
-                # filter out matches
-                filtered_matches = [matches[0]]
-                for match in matches:
-                    logging.getLogger('genops').debug(f'[{__name__}.mutate] {match=}; {filtered_matches=}')
-                    if match.start != filtered_matches[-1].start:
-                        filtered_matches.append(match)
-                        logging.getLogger('genops').debug(f'[{__name__}.mutate] {match=} appended')
+            genome = expander.vocabulary.intern(string=cs.hls_mod[module]['string'])
+            # get all non-overlapping matches in a single scan of the tokens
+            filtered_matches = expander.matcher.finditer(genome=genome)
+            logging.getLogger('genops').debug(f'[{__name__}.mutate] {len(filtered_matches)=}')
+            if filtered_matches:
                 p = max(MUTATION_INITIAL_P / math.exp(n_iteration * MUTATION_DECAY), 0)
                 to_mutate = math.ceil(p * len(filtered_matches))
                 for_mutation = sample(population=filtered_matches,
                                       k=to_mutate)
                 for_mutation = sorted(for_mutation)
                 logging.getLogger('genops').debug(f'[{__name__}.mutate] {p=}; {to_mutate=} {len(for_mutation)=}')
-                offset = 0
-                for match in for_mutation:
-                    rhs = expander.rules.get_rhs(lhs=match.lhs)
+                rhss = []
+                for start, end, lhs in for_mutation:
+                    rhs = expander.rules.get_rhs(lhs=lhs)
                     # update numerical parameters
                     if '(x)' in rhs or '(X)' in rhs or '(Y)' in rhs:
-                        n = [m for m in re.compile(r'\d').finditer(match.lhs_string)]
-                        n = int(n[0].group()) if n else None
+                        n = [a for a in genome.args[start:end].tolist() if a >= 0]
+                        n = n[0] if n else None
                         # update rhs to include parameters
                         rhs = rhs.replace('(x)', f'({n})')
                         rhs_n = np.random.randint(PL_LOW, PL_HIGH)
                         rhs = rhs.replace('(X)', f'({rhs_n})')
                         if n is not None:
                             rhs = rhs.replace('(Y)', f'({max(1, n - rhs_n)})')
-                    # apply expansion in string
-                    cs.hls_mod[module]['string'] = cs.hls_mod[module]['string'][:match.start + offset] + rhs + cs.hls_mod[module]['string'][match.end + offset:]
-                    offset += len(rhs) - len(match.lhs_string)
-                    mutated |= True
+                    rhss.append(expander.vocabulary.intern(string=rhs))
+                # apply all expansions at once
+                genome = genome.replace(spans=[(start, end) for start, end, _ in for_mutation],
+                                        genomes=rhss)
+                cs.hls_mod[module]['string'] = genome.to_string()
+                mutated |= len(for_mutation) > 0
     if not mutated:
         logging.getLogger('genops').error(f'[{__name__}.mutate] No mutation could be applied to {cs.string}.')
         raise EvoException(f'No mutation could be applied to {cs.string}.')
@@ -156,17 +224,17 @@ def crossover(a1: CandidateSolution,
     childs = []
     for module in a1.hls_mod.keys():
         if a1.hls_mod[module]['mutable']:
-            string1 = a1.hls_mod[module]['string'][:]
-            string2 = a2.hls_mod[module]['string'][:]
-            idxs1 = get_matching_brackets(string=string1)
-            idxs2 = get_matching_brackets(string=string2)
+            genome1 = expander.vocabulary.intern(string=a1.hls_mod[module]['string'])
+            genome2 = expander.vocabulary.intern(string=a2.hls_mod[module]['string'])
+            idxs1 = genome1.brackets()
+            idxs2 = genome2.brackets()
             logging.getLogger('genops').debug(f'[{__name__}.crossover] brackets1: {len(idxs1)=}.')
             logging.getLogger('genops').debug(f'[{__name__}.crossover] brackets2: {len(idxs2)=}.')
             if not idxs1:
-                idxs1 = [match.span() for match in atoms_re.finditer(string=string1)]
+                idxs1 = [(i, i) for i in range(len(genome1)) if atoms_re.fullmatch(genome1.token_string(i))]
                 logging.getLogger('genops').debug(f'[{__name__}.crossover] Extended brackets1: {len(idxs1)=}.')
             if not idxs2:
-                idxs2 = [match.span() for match in atoms_re.finditer(string=string2)]
+                idxs2 = [(i, i) for i in range(len(genome2)) if atoms_re.fullmatch(genome2.token_string(i))]
                 logging.getLogger('genops').debug(f'[{__name__}.crossover] Extended brackets2: {len(idxs2)=}.')
             if len(idxs1) == 0 or len(idxs2) == 0:
                 logging.getLogger('genops').debug(f'[{__name__}.crossover] Module {module} skipped.')
@@ -174,14 +242,13 @@ def crossover(a1: CandidateSolution,
             else:
                 ws1 = [CROSSOVER_P for _ in range(len(idxs1))]
                 ws2 = [CROSSOVER_P for _ in range(len(idxs2))]
-                s1 = string1[:]
-                s2 = string2[:]
+                # swap the selected tokens spans (brackets included)
                 idx1 = choices(population=idxs1, weights=ws1, k=1)[0]
-                b1 = string1[idx1[0]:idx1[1] + 1]
                 idx2 = choices(population=idxs2, weights=ws2, k=1)[0]
-                b2 = string2[idx2[0]:idx2[1] + 1]
-                s1 = s1[:idx1[0]] + s1[idx1[0]:].replace(b1, b2, 1)
-                s2 = s2[:idx2[0]] + s2[idx2[0]:].replace(b2, b1, 1)
+                s1 = genome1.splice(start=idx1[0], end=idx1[1] + 1,
+                                    other=genome2, other_start=idx2[0], other_end=idx2[1] + 1).to_string()
+                s2 = genome2.splice(start=idx2[0], end=idx2[1] + 1,
+                                    other=genome1, other_start=idx1[0], other_end=idx1[1] + 1).to_string()
                 for solution, mutated in [(a1, s1), (a2, s2)]:
                     modified_hls_mod = dict(solution.hls_mod)
                     modified_hls_mod[module]['string'] = mutated
@@ -0,0 +1,142 @@
+import hashlib
+import logging
+import math
+import os
+import pickle
+from typing import Tuple, Union
+
+import numpy as np
+import numpy.typing as npt
+from scipy.stats import gaussian_kde
+
+
+def kde_pdf(kde: gaussian_kde,
+            x: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """Evaluate a one-dimensional Gaussian KDE exactly, in blocks of points.
+
+    Args:
+        kde (gaussian_kde): The KDE.
+        x (npt.NDArray[np.float64]): The points.
+
+    Returns:
+        npt.NDArray[np.float64]: The density at each point.
+    """
+    data, weights, var = kde.dataset[0], kde.weights, float(kde.covariance[0, 0])
+    norm = 1 / math.sqrt(2 * math.pi * var)
+    res = np.empty(shape=x.shape[0], dtype=np.float64)
+    for i in range(0, x.shape[0], 4096):
+        d = x[i:i + 4096, np.newaxis] - data[np.newaxis, :]
+        res[i:i + 4096] = norm * (np.exp(-0.5 * d * d / var) @ weights)
+    return res
+
+
+class KDETable:
+    __slots__ = ['start', 'step', 'values', 'max', 'points']
+
+    def __init__(self,
+                 start: float,
+                 step: float,
+                 values: npt.NDArray[np.float64],
+                 max_value: float) -> None:
+        """Create a lookup table of a one-dimensional density, linearly interpolated between equally spaced points.
+        The density is 0 outside the table.
+
+        Args:
+            start (float): The first point of the table.
+            step (float): The distance between points.
+            values (npt.NDArray[np.float64]): The density at each point.
+            max_value (float): The maximum density, used to normalize the fitness.
+        """
+        self.start = start
+        self.step = step
+        self.values = values
+        self.max = max_value
+        self.points = start + step * np.arange(values.shape[0])
+
+    def __call__(self,
+                 x: Union[float, npt.NDArray[np.float64]]) -> Union[float, npt.NDArray[np.float64]]:
+        """Evaluate the density.
+
+        Args:
+            x (Union[float, npt.NDArray[np.float64]]): The point(s).
+
+        Returns:
+            Union[float, npt.NDArray[np.float64]]: The density at the point(s).
+        """
+        return np.interp(x, self.points, self.values, left=0., right=0.)
+
+    @staticmethod
+    def from_kde(kde: gaussian_kde,
+                 max_range: Tuple[float, float],
+                 max_step: float,
+                 tol: float) -> 'KDETable':
+        """Tabulate a one-dimensional Gaussian KDE.
+        The absolute error of the density divided by its maximum is at most `tol`: half of it is left to the truncated tails,
+        half to the linear interpolation (at most `step^2 / 8 * max|f''|`, where `|f''|` is at most `1 / (sqrt(2 pi) var^1.5)`).
+
+        Args:
+            kde (gaussian_kde): The KDE.
+            max_range (Tuple[float, float]): The range where the maximum of the KDE is searched.
+            max_step (float): The distance between points when searching the maximum.
+            tol (float): The maximum absolute error of the normalized density.
+
+        Returns:
+            KDETable: The table.
+        """
+        # maximum found as in the original fitness functions
+        x = np.linspace(max_range[0], max_range[1], int(max_range[1] / max_step))
+        max_value = float(np.max(kde_pdf(kde=kde, x=x)))
+        abs_tol = tol * max_value
+        var = float(kde.covariance[0, 0])
+        sigma = math.sqrt(var)
+        # the density is below `abs_tol / 2` farther than `k` standard deviations from all datapoints
+        k = math.sqrt(max(2 * math.log(2 / (math.sqrt(2 * math.pi) * sigma * abs_tol)), 1.))
+        start, end = float(kde.dataset.min()) - k * sigma, float(kde.dataset.max()) + k * sigma
+        step = math.sqrt(8 * (abs_tol / 2) * math.sqrt(2 * math.pi) * var * sigma)
+        n = int(math.ceil((end - start) / step)) + 1
+        values = kde_pdf(kde=kde, x=start + step * np.arange(n))
+        return KDETable(start=start,
+                        step=step,
+                        values=values,
+                        max_value=max_value)
+
+    @staticmethod
+    def load_or_build(filename: str,
+                      max_range: Tuple[float, float],
+                      max_step: float,
+                      tol: float) -> 'KDETable':
+        """Load the table of a pickled KDE from disk, building and saving it next to the KDE if missing or outdated.
+
+        Args:
+            filename (str): The pickled KDE filename.
+            max_range (Tuple[float, float]): The range where the maximum of the KDE is searched.
+            max_step (float): The distance between points when searching the maximum.
+            tol (float): The maximum absolute error of the normalized density.
+
+        Returns:
+            KDETable: The table.
+        """
+        with open(filename, 'rb') as f:
+            raw = f.read()
+        # the table is rebuilt if the KDE or the table parameters change
+        key = hashlib.md5(raw + repr((tuple(max_range), max_step, tol)).encode()).hexdigest()
+        table_filename = f'{os.path.splitext(filename)[0]}.table.npz'
+        if os.path.exists(table_filename):
+            try:
+                with np.load(table_filename) as table:
+                    if str(table['key']) == key:
+                        return KDETable(start=float(table['start']),
+                                        step=float(table['step']),
+                                        values=table['values'],
+                                        max_value=float(table['max']))
+            except (OSError, KeyError, ValueError) as e:
+                logging.getLogger('fitness').warning(f'[{__name__}.load_or_build] Could not load {table_filename} ({e}).')
+        table = KDETable.from_kde(kde=pickle.loads(raw),
+                                  max_range=max_range,
+                                  max_step=max_step,
+                                  tol=tol)
+        try:
+            np.savez(table_filename, key=key, start=table.start, step=table.step, values=table.values, max=table.max)
+        except OSError as e:
+            logging.getLogger('fitness').warning(f'[{__name__}.load_or_build] Could not save {table_filename} ({e}).')
+        return table
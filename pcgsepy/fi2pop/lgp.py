@@ -8,6 +8,7 @@ from pcgsepy.config import (CROSSOVER_P, MUTATION_DECAY, MUTATION_INITIAL_P, N_G
                             POP_SIZE)
 from pcgsepy.evo.fitness import Fitness
 from pcgsepy.evo.genops import EvoException, roulette_wheel_selection
+from pcgsepy.common.regex_handler import AtomsTokenizer
 from pcgsepy.common.str_utils import get_atom_indexes, get_matching_brackets
 from pcgsepy.fi2pop.utils import reduce_population, subdivide_solutions
 from pcgsepy.lsystem.actions import AtomAction
@@ -39,6 +40,7 @@ class LGPSolver:
         self.alphabet.pop('?')
         self.alphabet.pop('<')
         self.alphabet.pop('>')
+        self.tokenizer = AtomsTokenizer(atoms=list(self.alphabet.keys()))
         
         self.feasible_fitnesses = feasible_fitnesses
         self.lsystem = lsystem
@@ -263,26 +265,11 @@ class LGPSolver:
         Returns:
             List[Dict[str, Any]]: The list of atoms (atom string & parameters).
         """
-        atoms_list = []
-        i = 0
-        while i < len(string):
-            offset = 0
-            for k in self.alphabet.keys():
-                if string[i:].startswith(k):
-                    offset += len(k)
-                    n = '0'
-                    # check if there are parameters (multiplicity)
-                    if i + offset < len(string) and string[i + offset] == '(':
-                        params = string[i + offset:
-                                        string.index(')', i + offset + 1) + 1]
-                        offset += len(params)
-                        n = params.replace('(', '').replace(')', '')
-                    atoms_list.append({'atom': k,
-                                       'n': n})
-                    i += len(k) + (len(f'({n})') if n != '0' else 0) - 1
-                    break
-            i += 1
-        return atoms_list
+        atoms = self.tokenizer.atoms
+        # parameters (multiplicity) default to '0' if not specified
+        return [{'atom': atoms[token_id],
+                 'n': string[params_start:params_end] if params_start != -1 else '0'}
+                for token_id, _, (params_start, params_end) in self.tokenizer.tokenize(string=string)]
 
     def _list_as_string(self,
                         s: List[Dict[str, Any]]) -> str:
@@ -1,11 +1,11 @@
-from typing import List
+from typing import Any, Dict, List
 
 import logging
+import time
 import numpy as np
 
-from pcgsepy.config import GEN_PATIENCE, MAX_STRING_LEN, POP_SIZE
-from pcgsepy.evo.genops import (EvoException, crossover, mutate,
-                                roulette_wheel_selection)
+from pcgsepy.config import GEN_MAX_ATTEMPTS, GEN_PATIENCE, MAX_STRING_LEN, POP_SIZE
+from pcgsepy.evo.genops import EvoException, RouletteWheel, crossover, mutate
 from pcgsepy.lsystem.constraints import ConstraintLevel, ConstraintTime
 from pcgsepy.lsystem.lsystem import LSystem
 from pcgsepy.lsystem.solution import CandidateSolution
@@ -54,17 +54,55 @@ def subdivide_solutions(lcs: List[CandidateSolution],
     logging.getLogger('fi2pop').debug(f'[{__name__}.subdivide_solutions] Final {len(lcs)=}.')
 
 
+class PoolStats:
+    __slots__ = ['n_pools', 'n_attempts', 'n_wasted_attempts', 'n_duplicates', 'time', 'wasted_time']
+
+    def __init__(self) -> None:
+        """Create the statistics of the pools generation.
+        Wasted attempts are those that did not add any offspring to the pool (eg: only duplicates were produced).
+        """
+        self.reset()
+
+    def reset(self) -> None:
+        self.n_pools = 0
+        self.n_attempts = 0
+        self.n_wasted_attempts = 0
+        self.n_duplicates = 0
+        self.time = 0.
+        self.wasted_time = 0.
+
+    def __str__(self) -> str:
+        return f'{self.n_pools} pools; {self.n_attempts} attempts ({self.n_wasted_attempts} wasted, {self.n_duplicates} duplicates); {self.time:.3f}s ({self.wasted_time:.3f}s wasted)'
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'n_pools': self.n_pools,
+            'n_attempts': self.n_attempts,
+            'n_wasted_attempts': self.n_wasted_attempts,
+            'n_duplicates': self.n_duplicates,
+            'time': self.time,
+            'wasted_time': self.wasted_time
+        }
+
+
+# module-scoped statistics of all generated pools
+pool_stats = PoolStats()
+
+
 def create_new_pool(population: List[CandidateSolution],
                     generation: int,
                     n_individuals: int = POP_SIZE,
-                    minimize: bool = False) -> List[CandidateSolution]:
+                    minimize: bool = False,
+                    max_attempts: int = GEN_MAX_ATTEMPTS) -> List[CandidateSolution]:
     """Create a new pool of solutions.
+    Time spent and attempts made (including the wasted ones) are added to `pool_stats`.
 
     Args:
         population (List[CandidateSolution]): Initial population of solutions.
         generation (int): Current generation number.
         n_individuals (int, optional): The number of individuals in the pool. Defaults to POP_SIZE.
         minimize (bool, optional): Whether to minimize or maximize the fitness. Defaults to False.
+        max_attempts (int, optional): The maximum number of attempts (-1 for unlimited attempts). Defaults to GEN_MAX_ATTEMPTS.
 
     Raises:
         EvoException: If same parent is picked twice for crossover.
@@ -73,20 +111,28 @@ def create_new_pool(population: List[CandidateSolution],
         List[CandidateSolution]: The pool of new solutions.
     """
     pool = []
+    # strings of the solutions in the pool, for constant-time duplicates checks
+    pool_strings = set()
     patience = GEN_PATIENCE
-    while len(pool) < n_individuals:
+    attempts = 0
+    pool_stats.n_pools += 1
+    # fitness-proportionate selection, with the parents pairs drawn in blocks
+    wheel = RouletteWheel(pop=population,
+                          minimize=minimize) if len(population) > 1 else None
+    pairs, pair_idx = np.zeros(shape=(0, 2), dtype=np.int64), 0
+    while len(pool) < n_individuals and (max_attempts == -1 or attempts < max_attempts):
+        attempts += 1
+        start = time.perf_counter()
         prev_len_pool = len(pool)
         childs = []
         # apply crossover if possible
         if len(population) > 1:
-            # fitness-proportionate selection
-            p1 = roulette_wheel_selection(pop=population,
-                                          minimize=minimize)
-            new_pop = []
-            new_pop[:] = population[:]
-            new_pop.remove(p1)
-            p2 = roulette_wheel_selection(pop=new_pop,
-                                        minimize=minimize)
+            if pair_idx == pairs.shape[0]:
+                pairs, pair_idx = wheel.select(n=max(1, (n_individuals - len(pool) + 1) // 2),
+                                               k=2,
+                                               replace=False), 0
+            p1, p2 = [population[i] for i in pairs[pair_idx]]
+            pair_idx += 1
             if p1.string != p2.string:
                 # crossover
                 o1, o2 = crossover(a1=p1, a2=p2, n_childs=2)
@@ -124,16 +170,25 @@ def create_new_pool(population: List[CandidateSolution],
                     mutate(cs=o, n_iteration=generation)
                 except EvoException as e:
                     logging.getLogger('fi2pop').error(f'[{__name__}.create_new_pool] xover1p: Parent: {e=}')
-                logging.getLogger('fi2pop').debug(f'[{__name__}.create_new_pool] xover1p: {o not in pool=}; {len(o.string) <= MAX_STRING_LEN=}')
-                if o not in pool and (MAX_STRING_LEN == -1 or len(o.string) <= MAX_STRING_LEN):
+                logging.getLogger('fi2pop').debug(f'[{__name__}.create_new_pool] xover1p: {o.string not in pool_strings=}; {len(o.string) <= MAX_STRING_LEN=}')
+                if o.string in pool_strings:
+                    pool_stats.n_duplicates += 1
+                elif MAX_STRING_LEN == -1 or len(o.string) <= MAX_STRING_LEN:
                     pool.append(o)
+                    pool_strings.add(o.string)
+        elapsed = time.perf_counter() - start
+        pool_stats.n_attempts += 1
+        pool_stats.time += elapsed
         if len(pool) == prev_len_pool:
             patience -= 1
+            pool_stats.n_wasted_attempts += 1
+            pool_stats.wasted_time += elapsed
         else:
             patience = GEN_PATIENCE
         if patience == 0:
             logging.getLogger('fi2pop').debug(f'[{__name__}.create_new_pool] Patience limit reached ({len(pool)=}')
             break
+    logging.getLogger('fi2pop').debug(f'[{__name__}.create_new_pool] {len(pool)=} after {attempts=}; {pool_stats}')
     return pool
 
 
@@ -22,9 +22,9 @@ import numpy as np
 import plotly.graph_objects as go
 from dash import ALL, dcc, html
 from dash.dependencies import Input, Output, State
-from pcgsepy.common.api_call import block_definitions
 from pcgsepy.common.jsonifier import json_dumps
 from pcgsepy.common.vecs import Vec
+from pcgsepy.evo.genops import expander
 from pcgsepy.guis.main_webapp.modals_msgs import (no_selection_error,
                                                   spaceship_population_help,
                                                   spaceship_preview_help,
@@ -41,7 +41,7 @@ from pcgsepy.mapelites.emitters import (ContextualBanditEmitter, Emitter,
                                         HumanPrefMatrixEmitter, KNEmitter, KernelEmitter,
                                         PreferenceBanditEmitter, RandomEmitter, SimpleTabularEmitter)
 from pcgsepy.mapelites.map import MAPElites, get_elite
-from pcgsepy.structure import _is_base_block, _is_transparent_block
+from pcgsepy.structure import _is_base_block, _is_transparent_block, block_registry
 from pcgsepy.xml_conversion import convert_structure_to_xml
 from tqdm import trange
 
@@ -132,12 +132,13 @@ def get_properties_table(cs: Optional[CandidateSolution] = None) -> dbc.Table:
     Returns:
         dbc.Table: The table with the properties.
     """
-    size = str(cs.size) if cs else '-'
-    nblocks = len(cs.content._blocks) if cs else '-'  # cs.n_blocks does not take into account hull
-    vol = cs.content.total_volume if cs else '-'
-    mass = cs.content.mass if cs else '-'
+    stats = cs.content.stats() if cs else {}
+    size = str(stats['size']) if cs else '-'
+    nblocks = stats['n_blocks'] if cs else '-'  # cs.n_blocks does not take into account hull
+    vol = stats['volume'] if cs else '-'
+    mass = stats['mass'] if cs else '-'
     struct_size = struct_sizes[cs.content.grid_size] if cs else '-'
-    armor_blocks, non_armor_blocks = cs.content.blocks_count if cs else (
+    armor_blocks, non_armor_blocks = (stats['armor_blocks'], stats['non_armor_blocks']) if cs else (
         '-', '-')
     cs_unique_blocks = cs.unique_blocks if cs else {}
 
@@ -1341,6 +1342,7 @@ def download_content(curr_content: Dict[str, Any],
                                                     axis=app_settings.symmetry)
             tmp = CandidateSolution(string=elite.string)
             tmp.ll_string = elite.ll_string
+            tmp.ll_program = elite.ll_program
             tmp.base_color = elite.base_color
             app_settings.current_mapelites.lsystem._set_structure(cs=tmp)
             logging.getLogger('webapp').debug(msg=f'[{__name__}.write_archive] Copied threadsafe elite solution, starting hullbuilding...')
@@ -1711,11 +1713,11 @@ def _get_elite_content(mapelites: MAPElites,
 
         cs = [content[i, j, k] for i, j, k in zip(x, y, z)]
         unique_blocks = {v: structure._clean_label(
-            list(block_definitions.keys())[v - 1]) for v in cs}
+            block_registry.get_type(v)) for v in cs}
 
         if not show_voxel:
             ss = [structure._clean_label(
-                list(block_definitions.keys())[v - 1]) for v in cs]
+                block_registry.get_type(v)) for v in cs]
             custom_colors = []
             for (i, j, k) in zip(x, y, z):
                 b = structure._blocks[(
@@ -1759,10 +1761,9 @@ def _get_elite_content(mapelites: MAPElites,
 
             # add voxel plot
             voxels = VoxelData(opaque_blocks)
-            ss = [structure._clean_label(list(block_definitions.keys())[
-                                         v - 1]) for v in voxels.intensities]
+            ss = [structure._clean_label(block_registry.get_type(v)) for v in voxels.intensities]
             indices = {structure._clean_label(
-                n): i + 1 for i, n in enumerate(list(block_definitions.keys()))}
+                n): i + 1 for i, n in enumerate(block_registry.block_types)}
             custom_colors = {}
             for k, v in block_to_colour.items():
                 if k in indices:
@@ -1794,10 +1795,9 @@ def _get_elite_content(mapelites: MAPElites,
                                              fresnel=0.25))
 
             voxels = VoxelData(transparent_blocks)
-            ss = [structure._clean_label(list(block_definitions.keys())[
-                                         v - 1]) for v in voxels.intensities]
+            ss = [structure._clean_label(block_registry.get_type(v)) for v in voxels.intensities]
             indices = {structure._clean_label(
-                n): i + 1 for i, n in enumerate(list(block_definitions.keys()))}
+                n): i + 1 for i, n in enumerate(block_registry.block_types)}
             custom_colors = {}
             for k, v in block_to_colour.items():
                 if k in indices:
@@ -2208,6 +2208,7 @@ def __update_rules(**kwargs: Dict[str, Any]) -> Dict[str, Any]:
     try:
         new_rules.validate()
         app_settings.current_mapelites.lsystem.hl_solver.parser.rules = new_rules
+        expander.initialize(rules=new_rules)
         logging.getLogger('webapp').info(msg=f'L-system rules updated.')
     except AssertionError as e:
         logging.getLogger('webapp').info(
@@ -2663,6 +2664,7 @@ def __toggle_unsafe_mode(**kwargs) -> Dict[str, Any]:
     try:
         new_rules = RuleMaker(ruleset=ruleset).get_rules()
         app_settings.current_mapelites.lsystem.hl_solver.parser.rules = new_rules
+        expander.initialize(rules=new_rules)
         logging.getLogger('webapp').info(msg=f'L-system rules updated.')
     except AssertionError as e:
         logging.getLogger('webapp').warn(msg=f'Failed updating L-system rules ({e}).')
@@ -1,14 +1,14 @@
 import logging
 from scipy.spatial import ConvexHull, Delaunay
-from scipy.ndimage import grey_erosion, binary_erosion, binary_dilation
+from scipy.ndimage import grey_erosion, binary_erosion, binary_dilation, label
 import numpy as np
 import numpy.typing as npt
 from pcgsepy.common.str_utils import get_matching_brackets
 from pcgsepy.common.vecs import Orientation, Vec, orientation_from_vec
 from pcgsepy.structure import Block, Structure, MountPoint
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from itertools import product
-from pcgsepy.common.vecs import rotate, get_rotation_matrix
+from pcgsepy.common.vecs import direction_index, get_rotation_matrix_from_code, opposite_table, orientation_code, rotate, rotate_direction
 from enum import IntEnum
 
 
@@ -33,6 +33,9 @@ block_value_types = {
 
 _orientations = [Orientation.FORWARD, Orientation.BACKWARD, Orientation.UP, Orientation.DOWN, Orientation.LEFT, Orientation.RIGHT]
 _valid_orientations = [(of, ou) for (of, ou) in list(product(_orientations, _orientations)) if of != ou and of != orientation_from_vec(ou.value.opposite())]
+_valid_orientations_index = {oo: i for i, oo in enumerate(_valid_orientations)}
+# mountpoints facing a direction and their limits, indexed by (block type, orientation code, direction index)
+_face_mountpoints: Dict[Tuple[str, int, int], Tuple[List[MountPoint], List[Vec], List[Vec], List[int]]] = {}
 # _smoothing_order = {
 #     BlockValue.BASE_BLOCK: [BlockValue.SLOPE_BLOCK, BlockValue.CORNERSQUARE_BLOCK, BlockValue.CORNER_BLOCK],
 #     BlockValue.CORNERSQUAREINV_BLOCK: [],
@@ -259,31 +262,17 @@ class HullBuilder:
         Returns:
             npt.NDArray[np.float32]: The modified hull array.
         """
-        structure_arr = structure.as_grid_array
-        structure_shape = Vec.from_tuple(structure_arr.shape)
         # mask of all blocks
-        mask = np.zeros_like(structure_arr, dtype=np.uint8)
-        mask[np.nonzero(hull)] = BlockValue.BASE_BLOCK
-        mask[np.nonzero(structure_arr)] = BlockValue.BASE_BLOCK
+        mask = structure.occupancy.to_mask()
+        mask[np.nonzero(hull)] = True
         # pivot position defines the region to keep
         pivot_position = [x for x in structure._blocks.values() if x.block_type == pivot_blocktype][0].position
         pivot_idx = pivot_position.scale(1 / structure.grid_size).to_veci().as_tuple()
-        # get the region to keep defined by blocks connected to pivot position
-        connected_blocks = set()
-        to_check = [pivot_idx]
-        while to_check:
-            to_add = set()
-            for block_position in to_check:
-                if mask[block_position] == BlockValue.BASE_BLOCK:
-                    connected_blocks.add(block_position)
-                    for direction in _orientations:
-                        dpos = Vec.from_tuple(block_position).sum(direction.value)
-                        if 0 <= dpos.x < structure_shape.x and 0 <= dpos.y < structure_shape.y and 0 <= dpos.z < structure_shape.z:
-                            to_add.add(dpos.as_tuple())
-            to_add = to_add.difference(to_add.intersection(connected_blocks))
-            to_check = list(to_add)
-        # disconnected blocks are the difference between all blocks and blocks connected to pivot block
-        disconnected_blocks = set(self._blocks_set.keys()) - connected_blocks
+        # get the region to keep defined by blocks connected (along the axes) to pivot position
+        labels, _ = label(mask)
+        pivot_label = labels[pivot_idx]
+        # disconnected blocks are all blocks not connected to pivot block
+        disconnected_blocks = [idx for idx in self._blocks_set.keys() if pivot_label == 0 or labels[idx] != pivot_label]
         # remove disconnected blocks
         for block_idx in disconnected_blocks:
             hull[block_idx] = BlockValue.AIR_BLOCK
@@ -476,6 +465,30 @@ class HullBuilder:
                     intersect_bbox += 0
         return 1 / intersect_bbox
     
+    def _get_face_mountpoints(self,
+                              block: Block,
+                              code: int,
+                              direction: int) -> Tuple[List[MountPoint], List[Vec], List[Vec], List[int]]:
+        """Get the mountpoints of the block that face the given direction, with their limits.
+        Results only depend on the block type and orientation, so they are computed once and shared.
+
+        Args:
+            block (Block): The block.
+            code (int): The orientation code of the block.
+            direction (int): The direction index.
+
+        Returns:
+            Tuple[List[MountPoint], List[Vec], List[Vec], List[int]]: The mountpoints, their start and end vectors, and the face area(s).
+        """
+        key = (block.block_type, code, direction)
+        if key not in _face_mountpoints:
+            mps = [mp for mp in block.mountpoints if rotate_direction(code=code, direction=direction_index(mp.face)) == direction]
+            starts, ends, planes = self._get_mountpoint_limits(mountpoints=mps,
+                                                               block_center=block.center,
+                                                               rotation_matrix=get_rotation_matrix_from_code(code=code))
+            _face_mountpoints[key] = mps, starts, ends, planes
+        return _face_mountpoints[key]
+
     def _check_valid_placement(self,
                                idx: Tuple[int, int, int],
                                block: Block,
@@ -492,22 +505,21 @@ class HullBuilder:
         Returns:
             bool: Whether the block could be placed with the given orientation when checking in the specified direction.
         """
-        rot_mat = get_rotation_matrix(forward=block.orientation_forward,
-                                      up=block.orientation_up)
-        mp1 = [mp for mp in block.mountpoints if rotate(rot_mat, mp.face) == direction.value]
-        starts1, ends1, planes1 = self._get_mountpoint_limits(mountpoints=mp1,
-                                                              block_center=block.center,
-                                                              rotation_matrix=rot_mat)
+        code = orientation_code(forward=block.orientation_forward,
+                                up=block.orientation_up)
+        d = direction_index(direction.value)
+        mp1, starts1, ends1, planes1 = self._get_face_mountpoints(block=block,
+                                                                  code=code,
+                                                                  direction=d)
         other_block = self.try_and_get_block(idx=idx,
                                              offset=direction.value.scale(structure.grid_size).to_veci(),
                                              structure=structure)
-        opposite_direction = orientation_from_vec(direction.value.opposite())
+        opposite_direction = int(opposite_table[d])
         if other_block is None:
             if mp1 == []:
-                mp2 = [mp for mp in block.mountpoints if rotate(rot_mat, mp.face) == opposite_direction.value]
-                _, _, planes2 = self._get_mountpoint_limits(mountpoints=mp2,
-                                                            block_center=block.center,
-                                                            rotation_matrix=rot_mat)
+                _, _, _, planes2 = self._get_face_mountpoints(block=block,
+                                                              code=code,
+                                                              direction=opposite_direction)
                 val = sum(planes2)  # error as the surface of mountpoints on opposite face
             else:
                 val = sum(planes1)  # erorr as surface of mountpoints of current face
@@ -516,14 +528,12 @@ class HullBuilder:
             if mp1 == []:
                 return False, 0
             else:
-                rot_mat_other = get_rotation_matrix(forward=other_block.orientation_forward,
-                                                    up=other_block.orientation_up)
-                mp2 = [mp for mp in other_block.mountpoints if rotate(rot_mat_other, mp.face) == opposite_direction.value]
+                mp2, starts2, ends2, planes2 = self._get_face_mountpoints(block=other_block,
+                                                                          code=orientation_code(forward=other_block.orientation_forward,
+                                                                                                up=other_block.orientation_up),
+                                                                          direction=opposite_direction)
                 if mp2 == []:
                     return False, 0
-                starts2, ends2, planes2 = self._get_mountpoint_limits(mountpoints=mp2,
-                                                                      block_center=other_block.center,
-                                                                      rotation_matrix=rot_mat_other)
                 all_valid = []
                 for eo1, so1, p1 in zip(ends1, starts1, planes1):
                     assert p1 != 0, f'Mountpoint with empty surface: {mp1} has {so1}-{eo1} (from block {block})'
@@ -599,7 +609,7 @@ class HullBuilder:
             for other_block in neighbourhood:                
                 oo = (orientation_from_vec(other_block.orientation_forward),
                         orientation_from_vec(other_block.orientation_up))
-                priority_scores[_valid_orientations.index(oo)] = priority_scores[_valid_orientations.index(oo)] + (1 if other_block.block_type == block_type else 0)
+                priority_scores[_valid_orientations_index[oo]] = priority_scores[_valid_orientations_index[oo]] + (1 if other_block.block_type == block_type else 0)
             idxs = [x for _, x in sorted(zip(priority_scores, np.arange(len(_valid_orientations)).tolist()))]
             priority_orientations = [_valid_orientations[i] for i in idxs]
             for possible_type in _smoothing_order[block_type]:
@@ -687,9 +697,10 @@ class HullBuilder:
                 new_idx = Vec.from_tuple(idx).sum(direction.value).scale(structure.grid_size).as_tuple()
                 if new_idx in structure._blocks.keys():
                     curr_block = structure._blocks[new_idx]
-                    structure._blocks[new_idx] = Block(block_type=block_value_types[BlockValue.BASE_BLOCK],
-                                                       orientation_forward=orientation_from_vec(curr_block.orientation_forward),
-                                                       orientation_up=orientation_from_vec(curr_block.orientation_up))
+                    structure.replace_block(block=Block(block_type=block_value_types[BlockValue.BASE_BLOCK],
+                                                        orientation_forward=orientation_from_vec(curr_block.orientation_forward),
+                                                        orientation_up=orientation_from_vec(curr_block.orientation_up)),
+                                            grid_position=new_idx)
         logging.getLogger('hullbuilder').debug(f'[{__name__}.add_external_hull] Replaced existing adjacent structure blocks.')
         
         # apply iterative smoothing algorithm
@@ -1,5 +1,7 @@
+import time
+from collections import OrderedDict
 from enum import IntEnum, auto
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from pcgsepy.lsystem.constraints_funcs import *
 from pcgsepy.lsystem.solution import CandidateSolution
@@ -70,3 +72,126 @@ class ConstraintHandler:
                                  f=constraint_funcs[my_args['constraint']],
                                  extra_args=my_args['extra_args'],
                                  needs_ll=my_args['needs_ll'])
+
+
+class ConstraintStats:
+    __slots__ = ['constraint', 'n_evaluations', 'n_rejections', 'n_memo_hits', 'time']
+
+    def __init__(self,
+                 constraint: ConstraintHandler):
+        """Create the running statistics of a constraint.
+
+        Args:
+            constraint (ConstraintHandler): The constraint.
+        """
+        self.constraint = constraint
+        self.n_evaluations = 0
+        self.n_rejections = 0
+        self.n_memo_hits = 0
+        self.time = 0.
+
+    @property
+    def mean_time(self) -> float:
+        return self.time / self.n_evaluations if self.n_evaluations else 0.
+
+    @property
+    def rejection_rate(self) -> float:
+        # smoothed, so that constraints never seen rejecting are still ordered by cost
+        return (self.n_rejections + 1) / (self.n_evaluations + 2)
+
+    @property
+    def score(self) -> float:
+        # expected cost paid per rejection: lower runs first
+        return self.mean_time / self.rejection_rate
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'constraint': str(self.constraint),
+            'extra_args': {k: v for k, v in self.constraint.extra_args.items() if k == 'req_tiles'},
+            'n_evaluations': self.n_evaluations,
+            'n_rejections': self.n_rejections,
+            'n_memo_hits': self.n_memo_hits,
+            'time': self.time,
+            'mean_time': self.mean_time
+        }
+
+
+class ConstraintScheduler:
+    __slots__ = ['stats', 'memo', 'max_memo_size']
+
+    def __init__(self,
+                 max_memo_size: int = 10000):
+        """Create a scheduler that orders constraints by their measured cost and rejection rate
+        and memoizes their results. When full, the least recently used results are evicted first.
+
+        Args:
+            max_memo_size (int, optional): The maximum number of memoized results. Defaults to 10000.
+        """
+        self.stats: Dict[int, ConstraintStats] = {}
+        self.memo: 'OrderedDict[Tuple[ConstraintStats, str, Optional[str]], bool]' = OrderedDict()
+        self.max_memo_size = max_memo_size
+
+    def _get_stats(self,
+                   c: ConstraintHandler) -> ConstraintStats:
+        # the statistics keep a reference to their constraint, so its id is not reused while they are stored
+        stats = self.stats.get(id(c), None)
+        if stats is None or stats.constraint is not c:
+            stats = self.stats[id(c)] = ConstraintStats(constraint=c)
+        return stats
+
+    def order(self,
+              cs: List[ConstraintHandler]) -> List[ConstraintHandler]:
+        """Order the constraints so that cheap and selective constraints come first.
+        Constraints never evaluated come first, so their statistics are collected.
+
+        Args:
+            cs (List[ConstraintHandler]): The constraints.
+
+        Returns:
+            List[ConstraintHandler]: The ordered constraints.
+        """
+        return sorted(cs, key=lambda c: self._get_stats(c).score)
+
+    def evaluate(self,
+                 c: ConstraintHandler,
+                 cs: 'CandidateSolution') -> bool:
+        """Evaluate the constraint on the solution, or reuse the memoized result.
+        Results are memoized on both the high-level and low-level strings, as the latter determines the solution content.
+
+        Args:
+            c (ConstraintHandler): The constraint.
+            cs (CandidateSolution): The solution.
+
+        Returns:
+            bool: Whether the solution satisfies the constraint.
+        """
+        stats = self._get_stats(c)
+        key = (stats, cs.string, cs.ll_string)
+        s = self.memo.get(key, None)
+        if s is not None:
+            self.memo.move_to_end(key)
+            stats.n_memo_hits += 1
+            return s
+        t = time.perf_counter()
+        s = c.constraint(cs=cs,
+                         extra_args=c.extra_args)
+        stats.time += time.perf_counter() - t
+        stats.n_evaluations += 1
+        stats.n_rejections += 0 if s else 1
+        if len(self.memo) >= self.max_memo_size:
+            self.memo.popitem(last=False)
+        self.memo[key] = s
+        return s
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Get the timing statistics of each constraint evaluated so far.
+
+        Returns:
+            List[Dict[str, Any]]: The statistics, in scheduling order.
+        """
+        return [stats.to_json() for stats in sorted(self.stats.values(), key=lambda x: x.score)]
+
+    def reset(self) -> None:
+        """Clear the statistics and the memoized results."""
+        self.stats.clear()
+        self.memo.clear()
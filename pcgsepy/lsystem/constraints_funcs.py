@@ -21,16 +21,19 @@ def intersection_constraint(cs: CandidateSolution,
 
 def symmetry_constraint(cs: CandidateSolution,
                         extra_args: Dict[str, Any]) -> bool:
-    structure = cs.content.as_array
-    is_symmetric = False
+    occupancy = cs.content.footprint_occupancy
     for dim in range(3):
-        is_symmetric |= np.array_equal(structure, np.flip(structure, axis=dim))
-    return is_symmetric
+        # block types are compared only if the occupancy is symmetric
+        if (occupancy ^ occupancy.flip(axis=dim)).count() == 0:
+            structure = cs.content.as_footprint_array
+            if np.array_equal(structure, np.flip(structure, axis=dim)):
+                return True
+    return False
 
 
 def axis_constraint(cs: CandidateSolution,
                     extra_args: Dict[str, Any]) -> bool:
-    volume = cs.content.as_array.shape
+    volume = cs.content.scaled_shape
     largest_axis, medium_axis, smallest_axis = reversed(sorted(list(volume)))
     mame = largest_axis / medium_axis
     mami = largest_axis / smallest_axis
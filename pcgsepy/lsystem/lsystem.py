@@ -1,15 +1,15 @@
 import itertools
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import numpy as np
 import numpy.typing as npt
 from pcgsepy.common.vecs import Orientation, Vec
-from pcgsepy.config import N_SPE
-from pcgsepy.lsystem.constraints import ConstraintHandler
+from pcgsepy.config import N_SPE, WORKERS_CHUNKSIZE
+from pcgsepy.lsystem.constraints import ConstraintHandler, ConstraintLevel
 from pcgsepy.lsystem.solution import CandidateSolution, merge_solutions
 from pcgsepy.lsystem.solver import LSolver
-from pcgsepy.lsystem.structure_maker import LLStructureMaker
+from pcgsepy.lsystem.structure_maker import LLStructureMaker, TileTemplates
 from pcgsepy.structure import Structure
 
 
@@ -177,6 +177,19 @@ class LSystem:
         
         self.all_hl_constraints = set()
         self.all_ll_constraints = set()
+        self._tile_templates: TileTemplates = None
+
+    @property
+    def tile_templates(self) -> TileTemplates:
+        """Get the templates of the low-level expansions of the tiles, built on first use.
+
+        Returns:
+            TileTemplates: The tile templates.
+        """
+        if getattr(self, '_tile_templates', None) is None:
+            self._tile_templates = TileTemplates(tiles=self.ll_solver.parser.rules.get_all_rhs(),
+                                                 atoms_alphabet=self.ll_solver.atoms_alphabet)
+        return self._tile_templates
 
     def enable_sat_check(self):
         """Enable constraints satisfaction"""
@@ -190,6 +203,32 @@ class LSystem:
         for m in self.modules:
             m.check_sat = False
 
+    def set_workers(self,
+                    n_workers: int,
+                    chunksize: int = WORKERS_CHUNKSIZE) -> None:
+        """Set the number of worker processes used by the solvers (shared by all modules).
+
+        Args:
+            n_workers (int): The number of worker processes (`0` to solve in the main process).
+            chunksize (int, optional): The number of tasks sent to a worker at once. Defaults to `WORKERS_CHUNKSIZE`.
+        """
+        for solver in [self.hl_solver, self.ll_solver]:
+            solver.shutdown_workers()
+            solver.n_workers = n_workers
+            solver.chunksize = chunksize
+
+    def seed(self,
+             seed: Optional[int] = None) -> None:
+        """Reseed the random generators used by the solvers' rules to select the RHS.
+
+        Args:
+            seed (Optional[int], optional): The seed. Defaults to `None` (drawn from NumPy's global random state).
+        """
+        if seed is None:
+            seed = np.random.randint(0, 2 ** 32, dtype=np.uint32)
+        for solver, solver_seed in zip([self.hl_solver, self.ll_solver], np.random.SeedSequence(int(seed)).generate_state(2)):
+            solver.parser.rules.seed(seed=int(solver_seed))
+
     def add_hl_constraints(self,
                            cs: List[List[Optional[ConstraintHandler]]]) -> None:
         """Add high-level constraints to each module.
@@ -233,18 +272,53 @@ class LSystem:
         return module.apply_rules(starting_string=starting_string,
                                   iterations=iterations)
 
+    def _iter_solutions_combinations(self,
+                                     lcs: List[List[CandidateSolution]],
+                                     max_combinations: Optional[int] = None) -> Iterator[CandidateSolution]:
+        """Lazily produce the combination of solutions' strings.
+
+        Args:
+            lcs (List[List[CandidateSolution]]): The list of solutions of each module.
+            max_combinations (Optional[int], optional): The maximum number of combinations produced. Defaults to `None` (all combinations).
+
+        Yields:
+            Iterator[CandidateSolution]: The merged solutions.
+        """
+        modules_names, modules_active = [m.name for m in self.modules], [m.active for m in self.modules]
+        # Cartesian product of all strings, return merged string
+        for x in itertools.islice(itertools.product(*lcs), max_combinations):
+            yield merge_solutions(lcs=x, modules_names=modules_names, modules_active=modules_active)
+
     def _produce_solutions_combinations(self,
-                                        lcs: List[CandidateSolution]) -> List[CandidateSolution]:
+                                        lcs: List[List[CandidateSolution]]) -> List[CandidateSolution]:
         """Produce the combination of solutions' strings.
 
         Args:
-            lcs (List[CandidateSolution]): The list of solutions.
+            lcs (List[List[CandidateSolution]]): The list of solutions of each module.
 
         Returns:
             List[CandidateSolution]: The list of solutions.
         """
-        # Cartesian product of all strings, return merged string
-        return [merge_solutions(lcs=x, modules_names=[m.name for m in self.modules], modules_active=[m.active for m in self.modules]) for x in list(itertools.product(*lcs))]
+        return list(self._iter_solutions_combinations(lcs=lcs))
+
+    def _cheap_constraints_sat(self,
+                               module: LSystemModule,
+                               cs: CandidateSolution) -> bool:
+        """Check the hard high-level constraints of the module that do not need the low-level string or the structure.
+
+        Args:
+            module (LSystemModule): The module.
+            cs (CandidateSolution): The (high-level) solution of the module.
+
+        Returns:
+            bool: Whether the solution satisfies all such constraints.
+        """
+        for c in module.hl_constraints:
+            if c.level == ConstraintLevel.HARD_CONSTRAINT and not c.needs_ll:
+                if not c.constraint(cs=cs,
+                                    extra_args=c.extra_args):
+                    return False
+        return True
 
     def _add_ll_strings(self,
                         cs: CandidateSolution) -> CandidateSolution:
@@ -279,20 +353,69 @@ class LSystem:
         structure = Structure(origin=base_position,
                               orientation_forward=orientation_forward,
                               orientation_up=orientation_up)
-        structure = LLStructureMaker(atoms_alphabet=self.ll_solver.atoms_alphabet,
-                                     position=base_position).fill_structure(structure=structure,
-                                                                            string=cs.ll_string)
+        structure_maker = LLStructureMaker(atoms_alphabet=self.ll_solver.atoms_alphabet,
+                                           position=base_position,
+                                           templates=self.tile_templates)
+        # compile the low-level string only once
+        if cs.ll_program is None:
+            cs.ll_program = structure_maker.compile(string=cs.ll_string)
+        structure = structure_maker.fill_structure(structure=structure,
+                                                   string=cs.ll_string,
+                                                   program=cs.ll_program)
 
         cs.set_content(content=structure)
         if make_graph:
             structure.show(title=cs.string)
         return cs
 
+    def iter_solutions(self,
+                       starting_strings: List[str],
+                       iterations: List[int],
+                       create_structures: bool = False,
+                       make_graph: bool = False,
+                       prune: bool = False,
+                       max_combinations: Optional[int] = None) -> Iterator[CandidateSolution]:
+        """Lazily apply the expansion rules for the hierarchical L-system.
+        Modules are expanded once, then their combinations are produced one at a time, so callers can stop consuming them early.
+
+        Args:
+            starting_strings (List[str]): The starting strings (one per module).
+            iterations (List[int]): The number of iterations to expand for (one per module).
+            create_structures (bool, optional): Whether to create structures for each solution. Defaults to False.
+            make_graph (bool, optional): Whether to plot the structure. Defaults to False.
+            prune (bool, optional): Whether to drop the solutions of each module that break its hard high-level constraints not
+                requiring the low-level string, before they are combined. Defaults to False.
+            max_combinations (Optional[int], optional): The maximum number of combinations explored. Defaults to `None` (all combinations).
+
+        Yields:
+            Iterator[CandidateSolution]: The solutions.
+        """
+        assert len(starting_strings) == len(self.modules), f'Assumed wrong number of modules: have {len(self.modules)}, passed {len(starting_strings)}.'
+        assert len(iterations) == len(self.modules), f'Assumed wrong number of modules: have {len(self.modules)}, passed {len(iterations)}.'
+        # create solutions for each module
+        lcs = [self.process_module(module=module,
+                                   starting_string=starting_string,
+                                   iterations=n_iterations) for module, starting_string, n_iterations in zip(self.modules, starting_strings, iterations)]
+        if prune:
+            lcs = [[cs for cs in mcs if self._cheap_constraints_sat(module=module, cs=cs)] for module, mcs in zip(self.modules, lcs)]
+        # combine them
+        for cs in self._iter_solutions_combinations(lcs=lcs,
+                                                    max_combinations=max_combinations):
+            # set low-level string
+            cs = self._add_ll_strings(cs=cs)
+            # if enabled, create the structure
+            if create_structures:
+                cs = self._set_structure(cs=cs,
+                                         make_graph=make_graph)
+            yield cs
+
     def apply_rules(self,
                     starting_strings: List[str],
                     iterations: List[int],
                     create_structures: bool = False,
-                    make_graph: bool = False) -> List[CandidateSolution]:
+                    make_graph: bool = False,
+                    prune: bool = False,
+                    max_combinations: Optional[int] = None) -> List[CandidateSolution]:
         """Apply the expansion rules for the hierarchical L-system.
 
         Args:
@@ -300,22 +423,18 @@ class LSystem:
             iterations (List[int]): The number of iterations to expand for (one per module).
             create_structures (bool, optional): Whether to create structures for each solution. Defaults to False.
             make_graph (bool, optional): Whether to plot the structure. Defaults to False.
+            prune (bool, optional): Whether to drop the solutions of each module that break its cheap hard constraints before they are combined (see `iter_solutions`). Defaults to False.
+            max_combinations (Optional[int], optional): The maximum number of combinations explored. Defaults to `None` (all combinations).
 
         Returns:
             List[CandidateSolution]: The list of solutions.
         """
-        assert len(starting_strings) == len(self.modules), f'Assumed wrong number of modules: have {len(self.modules)}, passed {len(starting_strings)}.'
-        assert len(iterations) == len(self.modules), f'Assumed wrong number of modules: have {len(self.modules)}, passed {len(iterations)}.'
-        # create solutions for each module and combine them
-        solutions = self._produce_solutions_combinations([self.process_module(module=module,
-                                                                              starting_string=starting_string,
-                                                                              iterations=n_iterations) for module, starting_string, n_iterations in zip(self.modules, starting_strings, iterations)])
-        # set low-level strings
-        solutions = list(map(lambda cs: self._add_ll_strings(cs=cs), solutions))
-        # if enabled, create the structures
-        if create_structures:
-            solutions = list(map(lambda cs: self._set_structure(cs=cs, make_graph=make_graph), solutions))
-        return solutions
+        return list(self.iter_solutions(starting_strings=starting_strings,
+                                        iterations=iterations,
+                                        create_structures=create_structures,
+                                        make_graph=make_graph,
+                                        prune=prune,
+                                        max_combinations=max_combinations))
 
     def to_json(self) -> Dict[str, Any]:
         return {
@@ -1,10 +1,12 @@
 import logging
 import re
+from bisect import bisect_left
+from collections import Counter
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List
 
 import numpy as np
-from pcgsepy.common.regex_handler import MyMatch, extract_regex
+from pcgsepy.common.regex_handler import AtomsTokenizer, MyMatch, extract_regex
 from pcgsepy.config import PL_HIGH, PL_LOW
 from pcgsepy.lsystem.actions import Rotations
 from pcgsepy.lsystem.rules import StochasticRules
@@ -19,6 +21,15 @@ class LParser(ABC):
             rules (StochasticRules): The set of expansion rules.
         """
         self.rules = rules
+
+    @property
+    def rules(self) -> StochasticRules:
+        return self._rules
+
+    @rules.setter
+    def rules(self,
+              rules: StochasticRules) -> None:
+        self._rules = rules
         self.compiled_lhs = [extract_regex(lhs) for lhs in rules.get_lhs()]
 
     @abstractmethod
@@ -39,20 +50,8 @@ class HLParser(LParser):
     def expand(self,
                string: str) -> str:
         logging.getLogger('parser').debug(f'[{__name__}.expand] Initial {string=}.')
-        # get all matches with regex
-        matches: List[MyMatch] = []
-        for r, rule in zip(self.compiled_lhs, self.rules.get_lhs()):
-            matches.extend([MyMatch(lhs=rule,
-                                    span=match.span(),
-                                    lhs_string=match.group()) for match in r.finditer(string=string)])
-        logging.getLogger('parser').debug(f'[{__name__}.expand] {len(matches)=}.')
-        # sort matches in-place
-        matches.sort()
-        # filter out matches
-        filtered_matches = [matches[0]]
-        for match in matches:
-            if match.start != filtered_matches[-1].start:
-                filtered_matches.append(match)
+        # get all non-overlapping matches in a single scan
+        filtered_matches: List[MyMatch] = self.rules.matcher.finditer(string=string)
         logging.getLogger('parser').debug(f'[{__name__}.expand] {len(filtered_matches)=}.')
         # expand using filtered_matches
         offset = 0
@@ -84,58 +83,52 @@ class HLtoMLTranslator:
         self.alphabet = alphabet
         self.td = tiles_dims
         self.tbo = tiles_block_offset
+        self.tokenizer = AtomsTokenizer(atoms=list(self.alphabet.keys()))
+        self._rotations = [x.value for x in Rotations]
+        self._rotations_regex = re.compile('|'.join(self._rotations))
+        self._brackets_regex = re.compile(r'\[|\]')
 
     def _string_as_list(self,
                         string: str) -> List[Dict[str, Any]]:
         atoms_list = []
-        i = 0
-        while i < len(string):
-            offset = 0
-            for k in self.alphabet.keys():
-                if string[i:].startswith(k):
-                    offset += len(k)
-                    n = None
-                    # check if there are parameters (multiplicity)
-                    if i + offset < len(string) and string[i + offset] == '(':
-                        params = string[i + offset:
-                                        string.index(')', i + offset + 1) + 1]
-                        offset += len(params)
-                        n = int(params.replace('(', '').replace(')', ''))
-                    atoms_list.append({'atom': k})
-                    if k in self.td.keys():
-                        atoms_list[-1]['n'] = n if n is not None else 1
-
-                    i += len(k) + (len(f'({n})') if n is not None else 0) - 1
-                    break
-            i += 1
+        atoms, td = self.tokenizer.atoms, self.td
+        for token_id, _, (params_start, params_end) in self.tokenizer.tokenize(string=string):
+            k = atoms[token_id]
+            if k in td:
+                # multiplicity defaults to 1 if not specified
+                atoms_list.append({'atom': k,
+                                   'n': int(string[params_start:params_end]) if params_start != -1 else 1})
+            else:
+                atoms_list.append({'atom': k})
         return atoms_list
 
     def _to_midlvl(self,
                    atoms_list: List[Dict[str, Any]]) -> str:
         last_parents = []
-        new_string = ''
+        new_string = []
         rotations = []
+        td = self.td
+        n_atoms = len(atoms_list)
 
         for i, atom in enumerate(atoms_list):
             a = atom['atom']
             n = atom.get('n', None)
             # tile dimensions (either current or parent's)
             if n is None:
-                dims = self.td[last_parents[-1]]
+                dims = td[last_parents[-1]]
             else:
-                dims = self.td[a]
+                dims = td[a]
             # Translate w/ correction to mid-level
             # Placeable tile
-            if a in self.td.keys():
-                new = [f"{a}!({dims.y})" for _ in range(n)]
-                new_string += ''.join(new)
+            if a in td:
+                new_string.append(f"{a}!({dims.y})" * n)
                 # Add closing wall
-                if i + 1 < len(atoms_list) and a.startswith(
+                if i + 1 < n_atoms and a.startswith(
                         'corridor') and atoms_list[i + 1]['atom'] == ']':
-                    new_string += 'corridorwall!(10)'
+                    new_string.append('corridorwall!(10)')
             # Position stack manipulation
             elif a == '[' or a == ']':
-                new_string += a
+                new_string.append(a)
             # Rotation
             elif a.startswith('Rot'):
                 next_tile = None
@@ -144,8 +137,8 @@ class HLtoMLTranslator:
                         next_tile = atoms_list[j]['atom']
                         break
                 rotations.append(a)
-                last_dims = self.td[last_parents[-1]]
-                next_dims = self.td[next_tile]
+                last_dims = td[last_parents[-1]]
+                next_dims = td[next_tile]
                 next_offset = self.tbo[next_tile]
                 c = ''
                 if a == 'RotZccwX':
@@ -172,55 +165,52 @@ class HLtoMLTranslator:
                     c = f'>({next_offset})'
                 elif a == 'RotYccwZ':
                     c = f"!({dims.z - next_offset})<({last_dims.z})"
-                new_string += ''.join([c, a])
+                new_string.append(c)
+                new_string.append(a)
 
             # Parent's stack manipulation
-            if i + 1 < len(atoms_list):
+            if i + 1 < n_atoms:
                 if a != ']' and atoms_list[i + 1]['atom'] == '[':
                     last_parents.append(a)
                 if a == ']' and atoms_list[i + 1].get('n', None) is not None:
                     last_parents.pop(-1)
 
-        return new_string
+        return ''.join(new_string)
 
     def _add_intersections(self,
                            string: str) -> str:
-        brackets = []
-        for i, c in enumerate(string):
-            if c == '[':
-                # find first closing bracket
-                idx_c = string.index(']', i)
-                # update closing bracket position in case of nested brackets
-                ni_o = string.find('[', i + 1)
-                while ni_o != -1 and string.find('[', ni_o) < idx_c:
-                    idx_c = string.index(']', idx_c + 1)
-                    ni_o = string.find('[', ni_o + 1)
-                # add to list of brackets
-                brackets.append((i, idx_c))
+        # match brackets in a single pass
+        brackets, opened = [], []
+        for m in self._brackets_regex.finditer(string):
+            if m.group() == '[':
+                opened.append(m.start())
+            elif opened:
+                brackets.append((opened.pop(-1), m.start()))
+        if opened:
+            raise ValueError(f'Unmatched bracket at {opened[-1]} in {string=}')
+        brackets.sort()
+        closing = set([b[1] for b in brackets])
+        # positions of all rotations (rotations never overlap)
+        rot_matches = [(m.start(), m.group()) for m in self._rotations_regex.finditer(string)]
+        rot_starts = [m[0] for m in rot_matches]
         to_add = {}
         # add intersection types
         for i, b in enumerate(brackets):
-            # get rotation
-            logging.getLogger('parser').debug(f'[{__name__}._add_intersections] {i+1}/{len(brackets)}; checking in substring={string[b[0]:b[1]+1]}')
-            rot_scores = [len(string) for _ in Rotations]
-            rots = [x.value for x in Rotations]
-            for j, r in enumerate(rots):
-                if string.find(r, b[0], b[1]) != -1:
-                    rot_scores[j] = string.index(r, b[0], b[1])
-            if max(rot_scores) != -1:
-                rot = rots[min(range(len(rot_scores)), key=lambda x : rot_scores[x])]
-            logging.getLogger('parser').debug(f'[{__name__}._add_intersections] set {rot=}')
+            # get first rotation in the brackets
+            rot = self._rotations[0]
+            j = bisect_left(rot_starts, b[0])
+            if j < len(rot_matches) and rot_matches[j][0] + len(rot_matches[j][1]) <= b[1]:
+                rot = rot_matches[j][1]
             # check for neighboring rotations
             has_neighbours = False
-            for _, t1 in brackets[:i]:
-                if b[0] == t1 + 1:
-                    has_neighbours = True
-                    if t1 not in to_add.keys():
-                        to_add[b[1]] = [rot]
-                    else:
-                        to_add[b[1]] = [*to_add[t1], rot]
-                        to_add.pop(t1)
-                    break
+            t1 = b[0] - 1
+            if t1 in closing:
+                has_neighbours = True
+                if t1 not in to_add.keys():
+                    to_add[b[1]] = [rot]
+                else:
+                    to_add[b[1]] = [*to_add[t1], rot]
+                    to_add.pop(t1)
             if not has_neighbours:
                 if b[1] not in to_add:
                     to_add[b[1]] = [rot]
@@ -228,13 +218,14 @@ class HLtoMLTranslator:
                     to_add[b[1]].append(rot)
         logging.getLogger('parser').debug(f'[{__name__}._add_intersections] {to_add=}')
         # add to the string
-        offset = 0
+        new_string, last = [], 0
         for i in sorted(list(to_add.keys())):
             rot = ''.join(sorted(list(set(to_add[i]))))
-            s = f'{rot}intersection!(25)'
-            string = string[:i + 1 + offset] + s + string[i + 1 + offset:]
-            offset += len(s)
-        return string
+            new_string.append(string[last:i + 1])
+            new_string.append(f'{rot}intersection!(25)')
+            last = i + 1
+        new_string.append(string[last:])
+        return ''.join(new_string)
 
     def transform(self,
                   string: str) -> str:
@@ -254,13 +245,25 @@ class HLtoMLTranslator:
 class LLParser(LParser):
     def expand(self,
                string: str) -> str:
+        trie = self.rules.trie
+        matches = []
         i = 0
         while i < len(string):
-            for k in reversed(list(self.rules.lhs_alphabet)):
-                if string[i:].startswith(k):
-                    rhs = self.rules.get_rhs(lhs=k)
-                    string = string[:i] + rhs + string[i + len(k):]
-                    i += len(rhs) - 1
-                    break
+            if string[i] in trie.root:
+                lhs = trie.match(string=string, start=i)
+                if lhs is not None:
+                    matches.append((i, lhs))
+                    i += len(lhs)
+                    continue
             i += 1
-        return string
+        # draw the RHS of all matches of the same LHS at once
+        counts = Counter([lhs for _, lhs in matches])
+        rhs = {lhs: iter(self.rules.get_rhs_batch(lhs=lhs, n=n)) for lhs, n in counts.items()}
+        out = []
+        last = 0
+        for i, lhs in matches:
+            out.append(string[last:i])
+            out.append(next(rhs[lhs]))
+            last = i + len(lhs)
+        out.append(string[last:])
+        return ''.join(out)
@@ -1,6 +1,36 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
+import numpy.typing as npt
+from pcgsepy.common.regex_handler import LHSMatcher, LHSTrie
+
+
+# number of uniform draws generated at once by each ruleset
+_RHS_BUFFER_SIZE = 1024
+
+
+def _alias_table(p: List[float]) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.int64]]:
+    """Build the Walker alias table of a discrete distribution (Vose's method).
+
+    Args:
+        p (List[float]): The probabilities (normalized if they do not sum to 1).
+
+    Returns:
+        Tuple[npt.NDArray[np.float64], npt.NDArray[np.int64]]: The acceptance probability and the alias of each outcome.
+    """
+    n = len(p)
+    scaled = np.asarray(p, dtype=np.float64)
+    scaled = scaled * n / scaled.sum()
+    prob, alias = np.ones(n, dtype=np.float64), np.arange(n, dtype=np.int64)
+    small, large = [i for i in range(n) if scaled[i] < 1.], [i for i in range(n) if scaled[i] >= 1.]
+    while small and large:
+        i, j = small.pop(), large[-1]
+        prob[i], alias[i] = scaled[i], j
+        scaled[j] -= 1. - scaled[i]
+        if scaled[j] < 1.:
+            small.append(large.pop())
+    # leftovers are 1 up to numerical errors
+    return prob, alias
 
 
 class StochasticRules:
@@ -8,6 +38,14 @@ class StochasticRules:
         """Create a ruleset"""
         self._rules = {}
         self.lhs_alphabet = set()
+        self._matcher: LHSMatcher = None
+        self._trie: LHSTrie = None
+        self._alias: Dict[str, Tuple[List[float], List[int], npt.NDArray[np.float64], npt.NDArray[np.int64]]] = {}
+        self._rng: Optional[np.random.Generator] = None
+        self._buffer: npt.NDArray[np.float64] = np.zeros(0, dtype=np.float64)
+        self._buffer_idx = 0
+        # number of changes to the rules, so copies of them can be kept up to date
+        self.version = 0
 
     def add_rule(self,
                  lhs: str,
@@ -23,10 +61,14 @@ class StochasticRules:
         if lhs in self._rules.keys():
             self._rules[lhs][0].append(rhs)
             self._rules[lhs][1].append(p)
+            self._get_alias().pop(lhs, None)
         else:
             self._rules[lhs] = ([rhs], [p])
+            self._matcher = None
+            self._trie = None
         lhs = lhs.replace('(x)', '').replace(']', '')
         self.lhs_alphabet.add(lhs)
+        self.version += 1
 
     def rem_rule(self,
                  lhs: str) -> None:
@@ -36,8 +78,12 @@ class StochasticRules:
             lhs (str): The LHS to remove.
         """
         self._rules.pop(lhs)
+        self._get_alias().pop(lhs, None)
+        self._matcher = None
+        self._trie = None
         lhs = lhs.replace('(x)', '').replace(']', '')
         self.lhs_alphabet.pop(lhs)
+        self.version += 1
 
     def get_lhs(self) -> List[str]:
         """Get all the LHS of the rule set.
@@ -47,6 +93,103 @@ class StochasticRules:
         """
         return list(self._rules.keys())
 
+    @property
+    def matcher(self) -> LHSMatcher:
+        """Get the combined matcher of all the LHS, built on first use.
+
+        Returns:
+            LHSMatcher: The matcher.
+        """
+        if getattr(self, '_matcher', None) is None:
+            self._matcher = LHSMatcher(lhs=self.get_lhs())
+        return self._matcher
+
+    @property
+    def trie(self) -> LHSTrie:
+        """Get the prefix trie of the LHS alphabet, built on first use.
+        Priority follows the reversed iteration order of the alphabet.
+
+        Returns:
+            LHSTrie: The trie.
+        """
+        if getattr(self, '_trie', None) is None:
+            self._trie = LHSTrie(lhs=list(reversed(list(self.lhs_alphabet))))
+        return self._trie
+
+    def _get_alias(self) -> Dict[str, Tuple[List[float], List[int], npt.NDArray[np.float64], npt.NDArray[np.int64]]]:
+        if getattr(self, '_alias', None) is None:
+            self._alias = {}
+        return self._alias
+
+    def _alias_table(self,
+                     lhs: str) -> Tuple[List[float], List[int], npt.NDArray[np.float64], npt.NDArray[np.int64]]:
+        """Get the alias table of the given LHS, built on first use.
+
+        Args:
+            lhs (str): The LHS.
+
+        Returns:
+            Tuple[List[float], List[int], npt.NDArray[np.float64], npt.NDArray[np.int64]]: The alias table, both as lists and as arrays.
+        """
+        alias = self._get_alias()
+        table = alias.get(lhs, None)
+        if table is None:
+            prob, aliases = _alias_table(p=self._rules[lhs][1])
+            table = alias[lhs] = (prob.tolist(), aliases.tolist(), prob, aliases)
+        return table
+
+    def seed(self,
+             seed: Optional[int] = None) -> None:
+        """Reset the random generator used to select the RHS.
+        If never set, the generator is seeded on first use, like when `seed` is `None`.
+
+        Args:
+            seed (Optional[int], optional): The seed. Defaults to `None` (drawn from NumPy's global random state, so the
+                draws can be reproduced with `np.random.seed` followed by this method).
+        """
+        if seed is None:
+            seed = np.random.randint(0, 2 ** 32, dtype=np.uint32)
+        self._rng = np.random.default_rng(seed)
+        self._buffer, self._buffer_idx = np.zeros(0, dtype=np.float64), 0
+
+    @property
+    def rng_state(self) -> Tuple[Dict[str, Any], npt.NDArray[np.float64], int]:
+        """Get the state of the random generator, including the draws not yet used.
+
+        Returns:
+            Tuple[Dict[str, Any], npt.NDArray[np.float64], int]: The generator state.
+        """
+        self._get_rng()
+        return self._rng.bit_generator.state, self._buffer.copy(), self._buffer_idx
+
+    @rng_state.setter
+    def rng_state(self,
+                  state: Tuple[Dict[str, Any], npt.NDArray[np.float64], int]) -> None:
+        self._get_rng().bit_generator.state = state[0]
+        self._buffer, self._buffer_idx = state[1].copy(), state[2]
+
+    def _get_rng(self) -> np.random.Generator:
+        if getattr(self, '_rng', None) is None:
+            self.seed()
+        return self._rng
+
+    def _uniforms(self,
+                  n: int) -> npt.NDArray[np.float64]:
+        """Get uniform draws in [0, 1), refilling the buffer in blocks.
+
+        Args:
+            n (int): The number of draws.
+
+        Returns:
+            npt.NDArray[np.float64]: The draws.
+        """
+        rng = self._get_rng()
+        if self._buffer_idx + n > self._buffer.shape[0]:
+            self._buffer, self._buffer_idx = rng.random(max(_RHS_BUFFER_SIZE, n)), 0
+        u = self._buffer[self._buffer_idx:self._buffer_idx + n]
+        self._buffer_idx += n
+        return u
+
     def get_rhs(self,
                 lhs: str) -> str:
         """Get the RHS of the given LHS according to the selection probability.
@@ -57,14 +200,55 @@ class StochasticRules:
         Returns:
             str: The RHS.
         """
-        rhs, p = self._rules[lhs]
-        return np.random.choice(rhs, p=p)
+        rhs = self._rules[lhs][0]
+        if len(rhs) == 1:
+            return rhs[0]
+        prob, alias, _, _ = self._alias_table(lhs=lhs)
+        u = self._uniforms(n=1)[0] * len(rhs)
+        i = int(u)
+        return rhs[i] if u - i < prob[i] else rhs[alias[i]]
+
+    def get_rhs_batch(self,
+                      lhs: str,
+                      n: int) -> List[str]:
+        """Get `n` independent RHS of the given LHS according to the selection probability.
+
+        Args:
+            lhs (str): The LHS.
+            n (int): The number of RHS.
+
+        Returns:
+            List[str]: The RHS.
+        """
+        rhs = self._rules[lhs][0]
+        if len(rhs) == 1:
+            return rhs * n
+        _, _, prob, alias = self._alias_table(lhs=lhs)
+        u = self._uniforms(n=n) * len(rhs)
+        i = u.astype(np.int64)
+        idxs = np.where(u - i < prob[i], i, alias[i])
+        return [rhs[j] for j in idxs.tolist()]
+
+    def get_all_rhs(self) -> List[str]:
+        """Get all the RHS of the rule set.
+
+        Returns:
+            List[str]: The list of RHSs, for all LHSs.
+        """
+        return [rhs for rhs_list, _ in self._rules.values() for rhs in rhs_list]
 
     def validate(self):
-        """Ensure all probabilities for each LHS sum up to 1."""
+        """Ensure all probabilities for each LHS sum up to 1, and precompute the alias tables."""
         for lhs in self._rules.keys():
             p = sum(self._rules[lhs][1])
             assert np.isclose(p, 1., atol=0.01), f'Probability must sum to 1: found {p} for `{lhs}`.'
+            self._alias_table(lhs=lhs)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # copies (and pickles) get their own generator, seeded on first use
+        state = self.__dict__.copy()
+        state['_rng'], state['_buffer'], state['_buffer_idx'] = None, np.zeros(0, dtype=np.float64), 0
+        return state
 
     def __str__(self) -> str:
         return '\n'.join(['\n'.join([f'{k} {p} {o}' for (o, p) in zip(os, ps)]) for (k, (os, ps)) in self._rules.items()])
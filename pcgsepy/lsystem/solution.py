@@ -6,11 +6,12 @@ import numpy as np
 from pcgsepy.common.vecs import Vec
 
 from ..structure import Structure
+from .structure_maker import TurtleProgram
 
 
 class CandidateSolution:
     __slots__ = ['string', '_content', 'age', 'b_descs', 'c_fitness', 'fitness', 'hls_mod',
-                 'is_feasible', 'll_string', 'n_feas_offspring', 'n_offspring', 'ncv',
+                 'is_feasible', '_ll_string', 'll_program', 'n_feas_offspring', 'n_offspring', 'ncv',
                  'parents', 'representation', 'base_color', 'n_blocks', 'content_size']
     
     def __init__(self,
@@ -35,6 +36,17 @@ class CandidateSolution:
         self.n_blocks = 0
         self.content_size = (0, 0, 0)
 
+    @property
+    def ll_string(self) -> str:
+        return self._ll_string
+
+    @ll_string.setter
+    def ll_string(self,
+                  ll_string: str) -> None:
+        self._ll_string = ll_string
+        # the compiled low-level string is no longer valid
+        self.ll_program: Optional[TurtleProgram] = None
+
     def __str__(self) -> str:
         return f'{self.string}; fitness: {self.c_fitness}; is_feasible: {self.is_feasible}'
 
@@ -1,26 +1,72 @@
 import logging
-from typing import Any, Dict, List, Optional, Union
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 
+from pcgsepy.config import N_WORKERS, WORKERS_CHUNKSIZE
 from pcgsepy.lsystem.rules import StochasticRules
 
-from .constraints import ConstraintHandler, ConstraintTime, ConstraintLevel
+from .constraints import ConstraintHandler, ConstraintLevel, ConstraintScheduler, ConstraintTime
 from .parser import HLParser, HLtoMLTranslator, LParser, LLParser
 from .solution import CandidateSolution
 
 
+# the solver copy of each worker process, set once when the worker starts
+_worker_solver: 'LSolver' = None
+
+
+def _init_worker(solver: 'LSolver') -> None:
+    """Initialize a worker process with a copy of the solver (rules and constraints).
+
+    Args:
+        solver (LSolver): The solver.
+    """
+    global _worker_solver
+    _worker_solver = solver
+
+
+def _run_in_worker(task: Tuple[str, Tuple[Any, ...]]) -> Any:
+    """Run a solver task in a worker process.
+
+    Args:
+        task (Tuple[str, Tuple[Any, ...]]): The name of the solver method and its arguments.
+
+    Returns:
+        Any: The result of the task.
+    """
+    f, args = task
+    return getattr(_worker_solver, f)(*args)
+
+
 class LSolver:
 
     def __init__(self,
                  parser: LParser,
                  atoms_alphabet: Dict[str, Any],
-                 extra_args: Dict[str, Any]):
+                 extra_args: Dict[str, Any],
+                 n_workers: int = N_WORKERS,
+                 chunksize: int = WORKERS_CHUNKSIZE):
+        """Create a solver.
+
+        Args:
+            parser (LParser): The parser.
+            atoms_alphabet (Dict[str, Any]): The atoms alphabet.
+            extra_args (Dict[str, Any]): Additional arguments (required by high-level parsers).
+            n_workers (int, optional): The number of worker processes (`0` or `1` to solve in the main process). Each expansion
+                is seeded from the main process random state, so results do not depend on the number of workers. Defaults to `N_WORKERS`.
+            chunksize (int, optional): The number of tasks sent to a worker at once. Defaults to `WORKERS_CHUNKSIZE`.
+        """
         self.parser = parser
         self.atoms_alphabet = atoms_alphabet
         self.constraints = []
         self.inner_loops_during = 5
         self.inner_loops_end = 5
+        self.n_workers = n_workers
+        self.chunksize = chunksize
+        self._pool: ProcessPoolExecutor = None
+        self._pool_key = None
+        self.scheduler = ConstraintScheduler()
         self.translator = None
         if isinstance(self.parser, HLParser):
             self.translator = HLtoMLTranslator(
@@ -51,19 +97,117 @@ class LSolver:
             ConstraintLevel.SOFT_CONSTRAINT: [True, 0],
             ConstraintLevel.HARD_CONSTRAINT: [True, 0],
         }
-        for lev in sat.keys():
-            for c in self.constraints:
-                if c.when == when and c.level == lev:
-                    s = c.constraint(cs=cs,
-                                     extra_args=c.extra_args)
-                    logging.getLogger('solver').debug(f'[{__name__}._forward_expansion] \t{c}:\t{s}.')
-                    sat[lev][0] &= s
-                    if keep_track:
-                        sat[lev][1] += (
-                            1 if lev == ConstraintLevel.HARD_CONSTRAINT else
-                            0.5) if not s else 0
+        # hard constraints first, so that we can stop at the first failure if we don't keep track of violations
+        for lev in [ConstraintLevel.HARD_CONSTRAINT, ConstraintLevel.SOFT_CONSTRAINT]:
+            for c in self.scheduler.order([c for c in self.constraints if c.when == when and c.level == lev]):
+                s = self.scheduler.evaluate(c=c,
+                                            cs=cs)
+                logging.getLogger('solver').debug(f'[{__name__}._forward_expansion] \t{c}:\t{s}.')
+                sat[lev][0] &= s
+                if keep_track:
+                    sat[lev][1] += (
+                        1 if lev == ConstraintLevel.HARD_CONSTRAINT else
+                        0.5) if not s else 0
+                elif not s and lev == ConstraintLevel.HARD_CONSTRAINT:
+                    # remaining constraints are not evaluated
+                    return sat
         return sat
 
+    def constraints_report(self) -> List[Dict[str, Any]]:
+        """Get the timing statistics of the constraints evaluated by the solver.
+
+        Returns:
+            List[Dict[str, Any]]: The statistics of each constraint, in scheduling order.
+        """
+        report = self.scheduler.report()
+        for stats in report:
+            logging.getLogger('solver').debug(f'[{__name__}.constraints_report] {stats}')
+        return report
+
+    def _expand_task(self,
+                     string: str,
+                     seed: int,
+                     dc_check: bool) -> Optional[str]:
+        """Expand a string once with a seeded random state.
+
+        Args:
+            string (str): The string.
+            seed (int): The random seed.
+            dc_check (bool): Whether to check the DURING constraints.
+
+        Returns:
+            Optional[str]: The expanded string, or `None` if it breaks hard constraints.
+        """
+        np.random.seed(seed)
+        self.parser.rules.seed(seed=seed)
+        cs = self._forward_expansion(cs=CandidateSolution(string=string),
+                                     n=1,
+                                     dc_check=dc_check)
+        return cs.string if cs is not None else None
+
+    def _end_check_task(self,
+                        string: str) -> bool:
+        """Check the hard END constraints on a string.
+
+        Args:
+            string (str): The string.
+
+        Returns:
+            bool: Whether the string satisfies the hard END constraints.
+        """
+        logging.getLogger('solver').debug(f'[{__name__}._end_check_task] Finalizing string {string}')
+        return self._check_constraints(cs=CandidateSolution(string=string),
+                                       when=ConstraintTime.END)[ConstraintLevel.HARD_CONSTRAINT][0]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Get the pool of worker processes.
+        The pool is (re)started only when the rules or the constraints change, so these are sent to each worker once.
+
+        Returns:
+            ProcessPoolExecutor: The pool.
+        """
+        rules = self.parser.rules
+        key = (self.n_workers, rules, getattr(rules, 'version', 0), tuple([hash(c) for c in self.constraints]))
+        if self._pool is None or self._pool_key != key:
+            self.shutdown_workers()
+            self._pool = ProcessPoolExecutor(max_workers=self.n_workers,
+                                             initializer=_init_worker,
+                                             initargs=(self, ))
+            self._pool_key = key
+        return self._pool
+
+    def _map(self,
+             f: str,
+             tasks: List[Tuple[Any, ...]]) -> List[Any]:
+        """Run the tasks, distributing them across the worker processes when possible.
+
+        Args:
+            f (str): The name of the solver method to run.
+            tasks (List[Tuple[Any, ...]]): The arguments of each task.
+
+        Returns:
+            List[Any]: The results, in the same order as the tasks.
+        """
+        if self.n_workers > 1 and len(tasks) > 1:
+            return list(self._get_pool().map(_run_in_worker, [(f, args) for args in tasks], chunksize=self.chunksize))
+        # run in the main process without altering its random state
+        state, rules_state = np.random.get_state(), self.parser.rules.rng_state
+        res = [getattr(self, f)(*args) for args in tasks]
+        np.random.set_state(state)
+        self.parser.rules.rng_state = rules_state
+        return res
+
+    def shutdown_workers(self) -> None:
+        """Stop the worker processes, if any."""
+        if getattr(self, '_pool', None) is not None:
+            self._pool.shutdown()
+        self._pool, self._pool_key = None, None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state['_pool'], state['_pool_key'] = None, None
+        return state
+
     def solve(self,
               string: str,
               iterations: int,
@@ -73,25 +217,18 @@ class LSolver:
         # forward expansion + DURING constraints check
         for i in range(iterations):
             logging.getLogger('solver').debug(f'[{__name__}.solve] Expansion {i+1}/{iterations}; current number of strings: {len(all_solutions)}')
-            new_all_solutions = []
-            for cs in all_solutions:
-                for _ in range(strings_per_iteration):
-                    new_cs = CandidateSolution(string=cs.string[:])
-                    new_cs = self._forward_expansion(cs=new_cs,
-                                                     n=1,
-                                                     dc_check=check_sat and i > 0)
-                    if new_cs is not None:
-                        new_all_solutions.append(new_cs)
-            all_solutions = new_all_solutions
+            # one seed per expansion, drawn in order from the main process
+            strings = [cs.string for cs in all_solutions for _ in range(strings_per_iteration)]
+            seeds = np.random.randint(0, 2 ** 32, size=len(strings), dtype=np.uint32)
+            new_strings = self._map(f='_expand_task',
+                                    tasks=[(s, int(seed), check_sat and i > 0) for s, seed in zip(strings, seeds)])
+            all_solutions = [CandidateSolution(string=s) for s in new_strings if s is not None]
             all_solutions = list(set(all_solutions))  # remove duplicates
 
         # END constraints check + possible backtracking
         if check_sat and len([c for c in self.constraints if c.when == ConstraintTime.END]) > 0:
-            to_keep = np.zeros(shape=len(all_solutions), dtype=np.bool8)
-            for i, cs in enumerate(all_solutions):
-                logging.getLogger('solver').debug(f'[{__name__}.solve] Finalizing string {cs.string}')
-                to_keep[i] = self._check_constraints(cs=cs,
-                                                     when=ConstraintTime.END)[ConstraintLevel.HARD_CONSTRAINT][0]
+            to_keep = np.asarray(self._map(f='_end_check_task',
+                                           tasks=[(cs.string, ) for cs in all_solutions]), dtype=np.bool8)
             # remaining strings are SAT
             all_solutions = [cs for i, cs in enumerate(all_solutions) if to_keep[i]]
             
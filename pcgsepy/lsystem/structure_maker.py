@@ -1,16 +1,263 @@
-from ..structure import Structure, Block
-from ..common.vecs import Vec, orientation_from_str, orientation_from_vec
+from ..structure import Structure, Block, _dims_from_bounds, block_registry
+from ..common.vecs import Orientation, Vec, direction_index, orientation_from_str, orientation_from_vec
 from .actions import rotation_matrices, AtomAction
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from functools import reduce
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import numpy.typing as npt
 import re
 
 
+_atoms_pattern = re.compile(r'(\[|\])|(Rot[XYZ]c{1,2}w[XYZ])|((\w+|\W+)(\(.{1,3}\)))')
+_directions: List[Orientation] = list(Orientation)
+
+
+def _split_atom(match: re.Match) -> Tuple[str, List[str]]:
+	"""Get the atom and its parameters from a match of the atoms pattern.
+
+	Args:
+		match (re.Match): The match.
+
+	Returns:
+		Tuple[str, List[str]]: The atom and its parameters.
+	"""
+	g1, g2, _, g4, g5 = match.groups()
+	if g1 is not None:
+		atom, params = (g1, '')
+	elif g2 is not None:
+		atom, params = (g2, '')
+	else:
+		atom, params = (g4, g5)
+	return atom, params.replace('(','').replace(')','').split(',')
+
+
+# opcodes of the turtle bytecode
+_OP_MOVE, _OP_PLACE, _OP_ROTATE, _OP_PUSH, _OP_POP = range(5)
+_opcodes: Dict[AtomAction, int] = {
+	AtomAction.MOVE: _OP_MOVE,
+	AtomAction.PLACE: _OP_PLACE,
+	AtomAction.ROTATE: _OP_ROTATE,
+	AtomAction.PUSH: _OP_PUSH,
+	AtomAction.POP: _OP_POP
+}
+_rotations = list(rotation_matrices.keys())
+_rotation_index = {rotation: i for i, rotation in enumerate(_rotations)}
+_rotations_matrices: npt.NDArray[np.int64] = np.stack([rotation_matrices[rotation] for rotation in _rotations]).astype(np.int64)
+# direction indices once rotated, cached by rotation matrix
+_direction_tables: Dict[bytes, npt.NDArray[np.uint8]] = {}
+
+
+def _get_direction_table(rotation: npt.NDArray[np.int64]) -> npt.NDArray[np.uint8]:
+	"""Get the index of each direction once rotated.
+
+	Args:
+		rotation (npt.NDArray[np.int64]): The rotation matrix.
+
+	Returns:
+		npt.NDArray[np.uint8]: The rotated direction indices, indexed by direction.
+	"""
+	key = rotation.tobytes()
+	table = _direction_tables.get(key, None)
+	if table is None:
+		table = _direction_tables[key] = np.asarray([direction_index(Vec.from_np(rotation.dot(d.value.as_array()))) for d in _directions], dtype=np.uint8)
+	return table
+
+
+class TurtleProgram:
+	__slots__ = ['opcodes', 'vectors', 'args', 'block_ids']
+
+	def __init__(self,
+				 opcodes: npt.NDArray[np.uint8],
+				 vectors: npt.NDArray[np.int64],
+				 args: npt.NDArray[np.uint8],
+				 block_ids: npt.NDArray[np.uint16]):
+		"""Create a compiled low-level string.
+
+		Args:
+			opcodes (npt.NDArray[np.uint8]): The opcode of each instruction.
+			vectors (npt.NDArray[np.int64]): The (N, 3) displacement of each instruction (non-zero for moves only).
+			args (npt.NDArray[np.uint8]): The (N, 2) arguments of each instruction (Forward and Up direction indices for placements, rotation index for rotations).
+			block_ids (npt.NDArray[np.uint16]): The block type ID of each instruction (non-zero for placements only).
+		"""
+		self.opcodes = opcodes
+		self.vectors = vectors
+		self.args = args
+		self.block_ids = block_ids
+
+	def __len__(self) -> int:
+		return len(self.opcodes)
+
+	@classmethod
+	def from_instructions(cls,
+						  instructions: List[Tuple[int, Tuple[int, int, int], Tuple[int, int], int]]) -> 'TurtleProgram':
+		"""Create a program from a list of instructions.
+
+		Args:
+			instructions (List[Tuple[int, Tuple[int, int, int], Tuple[int, int], int]]): The instructions, as (opcode, vector, args, block ID).
+
+		Returns:
+			TurtleProgram: The program.
+		"""
+		opcodes, vectors, args, block_ids = zip(*instructions) if instructions else ((), (), (), ())
+		return cls(opcodes=np.asarray(opcodes, dtype=np.uint8),
+				   vectors=np.asarray(vectors, dtype=np.int64).reshape(-1, 3),
+				   args=np.asarray(args, dtype=np.uint8).reshape(-1, 2),
+				   block_ids=np.asarray(block_ids, dtype=np.uint16))
+
+	@classmethod
+	def concatenate(cls,
+					programs: List['TurtleProgram']) -> 'TurtleProgram':
+		"""Concatenate programs into a single program.
+
+		Args:
+			programs (List[TurtleProgram]): The programs.
+
+		Returns:
+			TurtleProgram: The program.
+		"""
+		if not programs:
+			return cls.from_instructions(instructions=[])
+		return cls(opcodes=np.concatenate([p.opcodes for p in programs]),
+				   vectors=np.concatenate([p.vectors for p in programs]),
+				   args=np.concatenate([p.args for p in programs]),
+				   block_ids=np.concatenate([p.block_ids for p in programs]))
+
+	@classmethod
+	def from_string(cls,
+					string: str,
+					atoms_alphabet: Dict[str, Any],
+					templates: Optional['TileTemplates'] = None) -> 'TurtleProgram':
+		"""Compile a low-level string.
+
+		Args:
+			string (str): The low-level string.
+			atoms_alphabet (Dict[str, Any]): The atoms alphabet.
+			templates (Optional[TileTemplates], optional): The precompiled tiles expansions. Defaults to `None`.
+
+		Returns:
+			TurtleProgram: The program.
+		"""
+		programs, instructions = [], []
+		pos = 0
+		while pos < len(string):
+			# reuse the whole tile expansion, if possible
+			if templates is not None:
+				tile = templates.match(string=string,
+									   pos=pos)
+				if tile is not None:
+					programs.append(cls.from_instructions(instructions=instructions))
+					instructions = []
+					program, pos = tile
+					programs.append(program)
+					continue
+			match = _atoms_pattern.search(string, pos)
+			if match is None:
+				break
+			pos = match.end()
+			atom, params = _split_atom(match=match)
+			action, args = atoms_alphabet[atom]['action'], atoms_alphabet[atom]['args']
+			vector, op_args, block_id = (0, 0, 0), (0, 0), 0
+			if action == AtomAction.MOVE:
+				vector = args.value.scale(int(params[0])).as_tuple()
+			elif action == AtomAction.PLACE:
+				op_args = (direction_index(orientation_from_str[params[0]].value), direction_index(orientation_from_str[params[1]].value))
+				block_id = block_registry.get_id(args[0])
+			elif action == AtomAction.ROTATE:
+				op_args = (_rotation_index[args], 0)
+			instructions.append((_opcodes[action], vector, op_args, block_id))
+		programs.append(cls.from_instructions(instructions=instructions))
+		return cls.concatenate(programs=programs)
+
+	def execute(self,
+				position: Vec) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.uint16], npt.NDArray[np.uint8], npt.NDArray[np.uint8], npt.NDArray[np.int64]]:
+		"""Run the program. Instructions between two rotation or stack instructions are executed at once.
+
+		Args:
+			position (Vec): The starting position.
+
+		Returns:
+			Tuple[npt.NDArray[np.int64], npt.NDArray[np.uint16], npt.NDArray[np.uint8], npt.NDArray[np.uint8], npt.NDArray[np.int64]]: The grid positions, block type IDs, Forward and Up direction indices of the placed blocks (in placement order), and the final position.
+		"""
+		position = np.asarray(position.as_tuple(), dtype=np.int64)
+		rotations, history, rotation = [], [], None
+		positions, block_ids, forwards, ups = [], [], [], []
+		n = len(self.opcodes)
+		start = 0
+		for stop in np.flatnonzero(self.opcodes >= _OP_ROTATE).tolist() + [n]:
+			if stop > start:
+				vectors = self.vectors[start:stop]
+				if rotation is not None:
+					vectors = vectors.dot(rotation.T)
+				path = np.cumsum(vectors, axis=0) + position
+				placed = self.opcodes[start:stop] == _OP_PLACE
+				if placed.any():
+					args = self.args[start:stop][placed]
+					if rotation is not None:
+						args = _get_direction_table(rotation=rotation)[args]
+					positions.append(path[placed])
+					block_ids.append(self.block_ids[start:stop][placed])
+					forwards.append(args[:, 0])
+					ups.append(args[:, 1])
+				position = path[-1]
+			if stop < n:
+				opcode = self.opcodes[stop]
+				if opcode == _OP_ROTATE:
+					rotations.append(_rotations_matrices[self.args[stop, 0]])
+				elif opcode == _OP_PUSH:
+					history.append(position)
+				else:
+					position = history.pop(-1)
+					if rotations:
+						rotations.pop(-1)
+				rotation = reduce(np.dot, rotations) if rotations else None
+			start = stop + 1
+		if not positions:
+			return np.zeros((0, 3), dtype=np.int64), np.zeros(0, dtype=np.uint16), np.zeros(0, dtype=np.uint8), np.zeros(0, dtype=np.uint8), position
+		return np.concatenate(positions), np.concatenate(block_ids), np.concatenate(forwards), np.concatenate(ups), position
+
+
+class TileTemplates:
+	__slots__ = ['templates', 'regex']
+
+	def __init__(self,
+				 tiles: List[str],
+				 atoms_alphabet: Dict[str, Any]):
+		"""Precompile the low-level expansions of the tiles.
+
+		Args:
+			tiles (List[str]): The low-level expansions of the tiles.
+			atoms_alphabet (Dict[str, Any]): The atoms alphabet.
+		"""
+		self.templates: Dict[str, TurtleProgram] = {tile: TurtleProgram.from_string(string=tile,
+																					atoms_alphabet=atoms_alphabet) for tile in tiles}
+		self.regex = re.compile('|'.join([re.escape(tile) for tile in sorted(self.templates.keys(), key=len, reverse=True)])) if self.templates else None
+
+	def match(self,
+			  string: str,
+			  pos: int) -> Optional[Tuple[TurtleProgram, int]]:
+		"""Match a tile expansion at the given position of the string.
+
+		Args:
+			string (str): The low-level string.
+			pos (int): The position.
+
+		Returns:
+			Optional[Tuple[TurtleProgram, int]]: The compiled tile expansion and the position after it, or `None` if no tile matches.
+		"""
+		if self.regex is None:
+			return None
+		match = self.regex.match(string, pos)
+		if match is None:
+			return None
+		return self.templates[match.group()], match.end()
+
+
 class StructureMaker(ABC):
 
 	def __init__(self, atoms_alphabet, position: Vec):
-		self.pattern = re.compile(r'(\[|\])|(Rot[XYZ]c{1,2}w[XYZ])|((\w+|\W+)(\(.{1,3}\)))')
+		self.pattern = _atoms_pattern
 		self.atoms_alphabet = atoms_alphabet
 		self._calls = {
 			AtomAction.PLACE: self._place,
@@ -37,8 +284,7 @@ class StructureMaker(ABC):
 		n = int(action_args['parameters'][0])
 		if self.rotations:
 			dpos = self._apply_rotation(arr=dpos)
-		for _ in range(n):
-			self.position = self.position.sum(dpos)
+		self.position = self.position.sum(dpos.scale(n))
 
 	def _push(self, action_args: Any) -> None:
 		self.position_history.append(self.position)
@@ -62,6 +308,14 @@ class StructureMaker(ABC):
 
 class LLStructureMaker(StructureMaker):
 
+	def __init__(self,
+				 atoms_alphabet,
+				 position: Vec,
+				 templates: Optional[TileTemplates] = None):
+		super().__init__(atoms_alphabet=atoms_alphabet,
+						 position=position)
+		self.templates = templates
+
 	def _place(self, action_args: Any) -> None:
 		orientation_forward, orientation_up = action_args['parameters'][0], action_args['parameters'][1]
 		orientation_forward = orientation_from_str[orientation_forward]
@@ -75,26 +329,46 @@ class LLStructureMaker(StructureMaker):
 		self.structure.add_block(block=block,
 								 grid_position=self.position.as_tuple())
 
+	def compile(self,
+				string: str) -> TurtleProgram:
+		"""Compile the low-level string.
+
+		Args:
+			string (str): The low-level string.
+
+		Returns:
+			TurtleProgram: The compiled string.
+		"""
+		return TurtleProgram.from_string(string=string,
+										 atoms_alphabet=self.atoms_alphabet,
+										 templates=self.templates)
+
 	def fill_structure(self,
 					   structure: Structure,
 					   string: str,
-					   additional_args: Dict[str, Any] = {}) -> Structure:
+					   additional_args: Dict[str, Any] = {},
+					   program: Optional[TurtleProgram] = None) -> Structure:
 		self.additional_args = additional_args
 		self.structure = structure
-		for g1, g2, _, g4, g5 in [match.groups() for match in self.pattern.finditer(string=string)]:
-			if g1 is not None:
-				atom, params = (g1, '')
-			elif g2 is not None:
-				atom, params = (g2, '')
-			else:
-				atom, params = (g4, g5)
-			params = params.replace('(','').replace(')','').split(',')
-			action, args = self.atoms_alphabet[atom]['action'], self.atoms_alphabet[atom]['args']
-			self._calls[action]({
-				'action_args': args,
-    			'parameters': params,
-				'string': atom
-				})
-		self.structure.sanify()
+		if program is None:
+			program = self.compile(string=string)
+		positions, block_ids, forwards, ups, position = program.execute(position=self.position)
+		self.position = Vec.v3i(*position.tolist())
+		if len(self.structure._blocks) == 0:
+			# the structure is only made of the new blocks, so it is sanified before adding them
+			if len(block_ids) > 0:
+				min_dims, _ = _dims_from_bounds(lo=positions.min(axis=0).tolist(),
+												hi=positions.max(axis=0).tolist())
+				positions = positions - np.asarray(min_dims, dtype=np.int64)
+			self.structure.add_blocks(positions=positions,
+									  block_ids=block_ids,
+									  forwards=forwards,
+									  ups=ups)
+		else:
+			self.structure.add_blocks(positions=positions,
+									  block_ids=block_ids,
+									  forwards=forwards,
+									  ups=ups)
+			self.structure.sanify()
 		
 		return self.structure
@@ -0,0 +1,188 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from pcgsepy.config import EVALUATIONS_CACHE_SIZE
+from pcgsepy.lsystem.solution import CandidateSolution
+
+
+class EvaluationOutcome:
+    __slots__ = ['is_feasible', 'c_fitness', 'b_descs', 'fitness', 'representation', 'ncv',
+                 'll_string', 'base_color', 'n_blocks', 'content_size', 'cost']
+
+    def __init__(self,
+                 cs: CandidateSolution,
+                 cost: float = 0.) -> None:
+        """Create the outcome of the evaluation of a solution.
+
+        Args:
+            cs (CandidateSolution): The evaluated solution.
+            cost (float, optional): The time spent evaluating the solution, in seconds. Defaults to `0.`.
+        """
+        self.is_feasible = cs.is_feasible
+        self.c_fitness = cs.c_fitness
+        self.b_descs = cs.b_descs
+        self.fitness = cs.fitness
+        self.representation = cs.representation
+        self.ncv = cs.ncv
+        self.ll_string = cs.ll_string
+        self.base_color = cs.base_color
+        self.n_blocks = cs.n_blocks
+        self.content_size = cs.content_size
+        self.cost = cost
+
+    def apply(self,
+              cs: CandidateSolution) -> CandidateSolution:
+        """Assign the outcome to a solution with the same string.
+        The content is not set: it is rebuilt from the low-level string when needed.
+
+        Args:
+            cs (CandidateSolution): The solution.
+
+        Returns:
+            CandidateSolution: The updated solution.
+        """
+        cs.is_feasible = self.is_feasible
+        cs.c_fitness = self.c_fitness
+        cs.b_descs = self.b_descs
+        cs.fitness = self.fitness
+        cs.representation = self.representation
+        cs.ncv = self.ncv
+        cs.ll_string = self.ll_string
+        cs.base_color = self.base_color
+        cs.n_blocks = self.n_blocks
+        cs.content_size = self.content_size
+        return cs
+
+
+class EvaluationsCache:
+    __slots__ = ['max_size', 'outcomes', 'n_lookups', 'n_hits', 'time_saved',
+                 '_step_lookups', '_step_hits', '_step_time_saved']
+
+    def __init__(self,
+                 max_size: int = EVALUATIONS_CACHE_SIZE) -> None:
+        """Create the cache of the evaluations done by the archive.
+        Offsprings whose string was already evaluated are not built nor evaluated again: they receive the recorded outcome
+        (feasibility, fitness, behavior descriptors) and go through the archive like any other offspring. Solutions rejected
+        while building them are recorded with no outcome, and their duplicates are discarded. When full, the oldest strings are evicted first.
+
+        Args:
+            max_size (int, optional): The maximum number of strings recorded. Defaults to `EVALUATIONS_CACHE_SIZE`.
+        """
+        self.max_size = max_size
+        # insertion-ordered outcomes of the evaluated strings
+        self.outcomes: Dict[str, Optional[EvaluationOutcome]] = {}
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.n_lookups = 0
+        self.n_hits = 0
+        self.time_saved = 0.
+        self._step_lookups = 0
+        self._step_hits = 0
+        self._step_time_saved = 0.
+
+    def clear(self) -> None:
+        """Forget all evaluations (eg: when the fitness changes)."""
+        self.outcomes.clear()
+
+    def __len__(self) -> int:
+        return len(self.outcomes)
+
+    def __contains__(self,
+                     string: str) -> bool:
+        return string in self.outcomes
+
+    def lookup(self,
+               lcs: List[CandidateSolution]) -> Tuple[List[CandidateSolution], List[CandidateSolution]]:
+        """Split the solutions into the ones already evaluated and the ones to evaluate.
+        The solutions already evaluated receive their recorded outcome; the ones previously rejected are discarded.
+
+        Args:
+            lcs (List[CandidateSolution]): The solutions.
+
+        Returns:
+            Tuple[List[CandidateSolution], List[CandidateSolution]]: The solutions with a reused outcome and the solutions never evaluated.
+        """
+        reused, new_lcs = [], []
+        for cs in lcs:
+            if cs.string in self.outcomes:
+                outcome = self.outcomes[cs.string]
+                if outcome is not None:
+                    reused.append(outcome.apply(cs))
+                    self._step_time_saved += outcome.cost
+                self._step_hits += 1
+            else:
+                new_lcs.append(cs)
+        self._step_lookups += len(lcs)
+        return reused, new_lcs
+
+    def _store(self,
+               string: str,
+               outcome: Optional[EvaluationOutcome]) -> None:
+        if string not in self.outcomes and len(self.outcomes) >= self.max_size:
+            # evict the oldest string
+            self.outcomes.pop(next(iter(self.outcomes)))
+        self.outcomes[string] = outcome
+
+    def record(self,
+               lcs: List[CandidateSolution],
+               costs: Optional[List[float]] = None) -> None:
+        """Record the outcome of the evaluated solutions. Outcomes already recorded are updated, keeping their cost if none is given.
+
+        Args:
+            lcs (List[CandidateSolution]): The evaluated solutions.
+            costs (Optional[List[float]], optional): The time spent evaluating each solution, in seconds. Defaults to `None`.
+        """
+        for i, cs in enumerate(lcs):
+            if costs is not None:
+                cost = costs[i]
+            else:
+                previous = self.outcomes.get(cs.string, None)
+                cost = previous.cost if previous is not None else 0.
+            self._store(string=cs.string,
+                        outcome=EvaluationOutcome(cs=cs,
+                                                  cost=cost))
+
+    def reject(self,
+               lcs: List[CandidateSolution]) -> None:
+        """Record the solutions rejected while building them.
+
+        Args:
+            lcs (List[CandidateSolution]): The rejected solutions.
+        """
+        for cs in lcs:
+            self._store(string=cs.string,
+                        outcome=None)
+
+    def end_step(self) -> Dict[str, Any]:
+        """Close the statistics of the current step.
+
+        Returns:
+            Dict[str, Any]: The number of lookups and hits, the hit rate and the evaluation time saved in the step.
+        """
+        stats = {
+            'lookups': self._step_lookups,
+            'hits': self._step_hits,
+            'hit_rate': self._step_hits / self._step_lookups if self._step_lookups else 0.,
+            'time_saved': self._step_time_saved
+        }
+        self.n_lookups += self._step_lookups
+        self.n_hits += self._step_hits
+        self.time_saved += self._step_time_saved
+        self._step_lookups, self._step_hits, self._step_time_saved = 0, 0, 0.
+        logging.getLogger('mapelites').info(f'[{__name__}.end_step] Reused {stats["hits"]}/{stats["lookups"]} already evaluated offsprings ({stats["hit_rate"]:.1%}); {stats["time_saved"]:.3f}s saved.')
+        return stats
+
+    def report(self) -> Dict[str, Any]:
+        """Get the statistics of all steps.
+
+        Returns:
+            Dict[str, Any]: The number of recorded strings, lookups and hits, the hit rate and the evaluation time saved.
+        """
+        return {
+            'size': len(self.outcomes),
+            'lookups': self.n_lookups,
+            'hits': self.n_hits,
+            'hit_rate': self.n_hits / self.n_lookups if self.n_lookups else 0.,
+            'time_saved': self.time_saved
+        }
@@ -15,7 +15,7 @@ from pcgsepy.config import (ALIGNMENT_INTERVAL, BIN_POP_SIZE, CS_MAX_AGE,
 from pcgsepy.evo.fitness import (Fitness, box_filling_fitness,
                                  func_blocks_fitness, mame_fitness,
                                  mami_fitness)
-from pcgsepy.evo.genops import EvoException
+from pcgsepy.evo.genops import EvoException, expander
 from pcgsepy.fi2pop.utils import create_new_pool, subdivide_solutions
 from pcgsepy.hullbuilder import HullBuilder, enforce_symmetry
 from pcgsepy.lsystem.constraints import ConstraintLevel
@@ -28,6 +28,7 @@ from pcgsepy.mapelites.buffer import Buffer, EmptyBufferException
 from pcgsepy.mapelites.emitters import (Emitter, HumanPrefMatrixEmitter,
                                         RandomEmitter, emitters,
                                         get_emitter_by_str)
+from pcgsepy.mapelites.evaluations import EvaluationsCache
 from pcgsepy.nn.estimators import (GaussianEstimator, prepare_dataset)
 from tqdm import trange
 from typing_extensions import Self
@@ -157,6 +158,8 @@ class MAPElites:
         self.allow_aging = True
         # tracking properties
         self.n_new_solutions = 0
+        # outcomes of the evaluated solutions, to skip duplicate offsprings
+        self.evaluations = EvaluationsCache()
         
         self.x_range, self.y_range, self.z_range = X_RANGE, Y_RANGE, Z_RANGE
         
@@ -273,6 +276,20 @@ class MAPElites:
         cs.age = CS_MAX_AGE
         return cs
 
+    def _evaluate_cs(self,
+                     cs: CandidateSolution) -> Tuple[CandidateSolution, float]:
+        """Prepare a candidate solution and assign its fitness and BCs.
+
+        Args:
+            cs (CandidateSolution): The candidate solution.
+
+        Returns:
+            Tuple[CandidateSolution, float]: The updated candidate solution and the time spent, in seconds.
+        """
+        start = time.perf_counter()
+        cs = self._assign_fitness(cs=self._prepare_cs_content(cs=cs))
+        return cs, time.perf_counter() - start
+
     def _prepare_cs_content(self,
                             cs: CandidateSolution,
                             add_hull: bool = True) -> CandidateSolution:
@@ -475,6 +492,8 @@ class MAPElites:
         # update weights
         for w, f in zip(weights, self.feasible_fitnesses):
             f.weight = w
+        # previously rejected solutions may now be competitive
+        self.evaluations.clear()
         # update solutions fitnesses
         for (_, _), cbin in np.ndenumerate(self.bins):
             for cs in cbin._feasible:
@@ -532,6 +551,7 @@ class MAPElites:
                     break
         # assign solutions to respective bins
         self._update_bins(lcs=[*feasible_pop, *infeasible_pop])
+        self.evaluations.record(lcs=[*feasible_pop, *infeasible_pop])
         # update bins for elites
         self.update_elites()
         # if required, initialize the emitter
@@ -555,6 +575,8 @@ class MAPElites:
         """
         # generate solutions from both populations
         generated: List[CandidateSolution] = []
+        # solutions evaluated in this step (ie: not reusing a recorded outcome)
+        fresh: List[CandidateSolution] = []
         for pop in populations:
             logging.getLogger('mapelites').debug(msg=f'[{__name__}._step] {len(pop)=}')
             if len(pop) > 0:
@@ -564,28 +586,46 @@ class MAPElites:
                                                generation=gen,
                                                n_individuals=BIN_POP_SIZE,
                                                minimize=minimize)
-                    # set low-level strings and structures
-                    new_pool = list(map(lambda cs: self.lsystem._add_ll_strings(cs=cs), new_pool))
-                    new_pool = list(map(lambda cs: self.lsystem._set_structure(cs=cs,
-                                                                               make_graph=False), new_pool))
+                    # reuse the outcome of the solutions already evaluated
+                    reused, new_pool = self.evaluations.lookup(lcs=new_pool)
+                    for cs in reused:
+                        cs.age = CS_MAX_AGE
+                    generated.extend(reused)
+                    # set low-level strings and structures and check feasibility
+                    costs: Dict[str, float] = {}
+                    built, rejected = [], []
+                    for cs in new_pool:
+                        start = time.perf_counter()
+                        self.lsystem._add_ll_strings(cs=cs)
+                        self.lsystem._set_structure(cs=cs,
+                                                    make_graph=False)
+                        checked = [cs]
+                        subdivide_solutions(lcs=checked,
+                                            lsystem=self.lsystem)
+                        costs[cs.string] = time.perf_counter() - start
+                        (built if checked else rejected).append(cs)
+                    self.evaluations.reject(lcs=rejected)
+                    new_pool = built
                     logging.getLogger('mapelites').debug(msg=f'[{__name__}._step] {len(new_pool)=}')
-                    subdivide_solutions(lcs=new_pool,
-                                        lsystem=self.lsystem)
-                    logging.getLogger('mapelites').debug(msg=f'[{__name__}._step] Started preparing solutions')
-                    new_pool = Parallel(n_jobs=-1, prefer="threads")(delayed(self._prepare_cs_content)(cs) for cs in new_pool)
-                    logging.getLogger('mapelites').debug(msg=f'[{__name__}._step] Started assigning fitnesses')
-                    generated.extend(Parallel(n_jobs=-1, prefer="threads")(delayed(self._assign_fitness)(cs) for cs in new_pool))
+                    logging.getLogger('mapelites').debug(msg=f'[{__name__}._step] Started preparing and assigning fitnesses')
+                    evaluated = Parallel(n_jobs=-1, prefer="threads")(delayed(self._evaluate_cs)(cs) for cs in new_pool)
+                    new_pool = [cs for cs, _ in evaluated]
+                    self.evaluations.record(lcs=new_pool,
+                                            costs=[costs[cs.string] + elapsed for cs, elapsed in evaluated])
+                    generated.extend(new_pool)
+                    fresh.extend(new_pool)
                 # evoexceptions are ignored, though it is possible to get stuck here
                 except EvoException as e:
                     logging.getLogger('mapelites').error(msg=f'[{__name__}._step] {e}')
                     pass
         
         generated = list(filter(self._within_range, generated))
+        fresh = list(filter(self._within_range, fresh))
         
         # if possible, train the estimator for fitness acquirement
         if self.estimator is not None:
             # Prepare dataset for estimator
-            xs, ys = prepare_dataset(f_pop=[x for x in generated if x.is_feasible])
+            xs, ys = prepare_dataset(f_pop=[x for x in fresh if x.is_feasible])
             for x, y in zip(xs, ys):
                 self.buffer.insert(x=x,
                                    y=y / self.max_f_fitness)
@@ -606,6 +646,7 @@ class MAPElites:
             logging.getLogger('mapelites').debug(f'[{__name__}._step] Started realignment...')
             if self.estimator.is_trained and gen % ALIGNMENT_INTERVAL == 0:
                 # Reassign previous infeasible fitnesses
+                realigned: List[CandidateSolution] = []
                 for (_, _), cbin in np.ndenumerate(self.bins):
                     for cs in cbin._infeasible:
                         if cs.age > ALIGNMENT_INTERVAL:
@@ -614,8 +655,12 @@ class MAPElites:
                                                             make_graph=False)
                             self._prepare_cs_content(cs)
                             cs.c_fitness = self.compute_fitness(cs=cs)
+                            realigned.append(cs)
+                # duplicates of the realigned solutions reuse the new fitnesses
+                self.evaluations.record(lcs=realigned)
         # metrics tracking
         self.n_new_solutions += len(generated)
+        self.evaluations.end_step()
         return generated
 
     def rand_step(self,
@@ -812,6 +857,19 @@ class MAPElites:
             b._infeasible = list(filter(self._within_range, b._infeasible))
     
     
+    def seed(self,
+             seed: int) -> None:
+        """Seed all the random generators used by MAP-Elites, so that runs can be reproduced.
+
+        Args:
+            seed (int): The seed.
+        """
+        random.seed(seed)
+        np.random.seed(seed)
+        self.lsystem.seed()
+        if expander.rules is not None:
+            expander.rules.seed()
+
     def reset(self,
               lcs: Optional[List[CandidateSolution]] = None) -> None:
         """Reset the current MAP-Elites.
@@ -842,6 +900,7 @@ class MAPElites:
                 self.estimator = QuantileEstimator(xshape=self.estimator.xshape,
                                                    yshape=self.estimator.yshape)
         self.buffer.clear()
+        self.evaluations.clear()
         if self.emitter is not None:
             self.emitter.reset()
         # assign solutions if provided
@@ -8,7 +8,7 @@ import matplotlib
 from matplotlib import pyplot as plt
 
 from pcgsepy.common.vecs import Vec, orientation_from_str
-from pcgsepy.config import COMMON_ATOMS, HL_ATOMS
+from pcgsepy.config import COMMON_ATOMS, HL_ATOMS, N_WORKERS
 from pcgsepy.lsystem.actions import AtomAction, rotations_from_str
 from pcgsepy.lsystem.constraints import (ConstraintHandler, ConstraintLevel,
                                          ConstraintTime)
@@ -46,11 +46,13 @@ def setup_matplotlib(type3_fix: bool = True,
         plt.rc('figure', titlesize=BIGGER_SIZE)  # fontsize of the figure title
 
 
-def get_default_lsystem(used_ll_blocks: List[str]) -> LSystem:
+def get_default_lsystem(used_ll_blocks: List[str],
+                        n_workers: int = N_WORKERS) -> LSystem:
     """Get the default L-system.
 
     Args:
         used_ll_blocks (List[str]): List of game blocks used.
+        n_workers (int, optional): The number of worker processes used by the solvers. Defaults to `N_WORKERS`.
 
     Returns:
         LSystem: The default L-system.
@@ -173,5 +175,6 @@ def get_default_lsystem(used_ll_blocks: List[str]) -> LSystem:
         [sc],
         [sc]
     ])
+    lsystem.set_workers(n_workers=n_workers)
 
     return lsystem
@@ -1,15 +1,17 @@
 import json
 import os
 from copy import deepcopy
-from functools import cached_property
-from typing import Dict, List, Set, Tuple
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 import matplotlib.pyplot as plt
 import numpy as np
 import numpy.typing as npt
+from scipy.ndimage import label
 
 from pcgsepy.common.api_call import block_definitions
-from pcgsepy.common.vecs import Orientation, Vec
+from pcgsepy.common.occupancy import OccupancyGrid
+from pcgsepy.common.vecs import Orientation, Transform, Vec
 
 # Sizes of blocks in grid spaces
 _blocks_sizes = {'Small': 1, 'Normal': 2, 'Large': 5}
@@ -49,7 +51,50 @@ class MountPoint:
         return str(self.__dict__)
 
 
+class BlockType:
+    __slots__ = ['name', 'definition_id', 'cube_size', 'size', 'mass', 'scaled_size', 'volume', 'center', 'mountpoints']
+
+    def __init__(self,
+                 name: str,
+                 definition: Dict[str, Any]) -> None:
+        """Create the (immutable) data shared by all blocks of the same type.
+
+        Args:
+            name (str): The type of the block (unique type from Space Engineers API).
+            definition (Dict[str, Any]): The block definition, as provided by the API.
+        """
+        self.name = name
+        self.definition_id = definition['definition_id']
+        self.cube_size: str = definition['cube_size']
+        self.size = Vec.from_json(definition['size'])
+        self.mass = float(definition['mass'])
+        self.scaled_size = self.size.scale(_blocks_sizes[self.cube_size])
+        self.volume = self.scaled_size.bbox()
+        self.center = self.scaled_size.scale(v=0.5)
+        self.mountpoints: Tuple[MountPoint, ...] = tuple([MountPoint(face=v['Normal'],
+                                                                     start=v['Start'],
+                                                                     end=v['End'],
+                                                                     exclusion_mask=v['ExclusionMask'],
+                                                                     properties_mask=v['PropertiesMask'],
+                                                                     block_size=self.scaled_size) for v in definition['mountpoints']])
+
+    def __copy__(self) -> 'BlockType':
+        return self
+
+    def __deepcopy__(self,
+                     memo: Dict[int, Any]) -> 'BlockType':
+        return self
+
+    def __reduce__(self):
+        return _get_block_type, (self.name, )
+
+    def __repr__(self) -> str:
+        return f'BlockType({self.name})'
+
+
 class Block:
+    __slots__ = ['block_type', 'orientation_forward', 'orientation_up', 'position', 'color', 'type_info']
+
     def __init__(self,
                  block_type: str,
                  orientation_forward: Orientation = Orientation.FORWARD,
@@ -67,76 +112,80 @@ class Block:
         self.orientation_forward = orientation_forward.value
         self.orientation_up = orientation_up.value
         self.position = position
-        self.definition_id = block_definitions[self.block_type]['definition_id']
         self.color = Vec.v3f(x=0.45, y=0.45, z=0.45)  # default block color is #737373
+        self.type_info = _get_block_type(block_type)
+    
+    @property
+    def definition_id(self) -> Dict[str, str]:
+        """Get the definition ID of the block, as provided by the API.
+
+        Returns:
+            Dict[str, str]: The definition ID of the block.
+        """
+        return self.type_info.definition_id
     
-    @cached_property
+    @property
     def cube_size(self) -> float:
         """Get the size of the cube block, as provided by the API.
 
         Returns:
             float: The size of the cube block.
         """
-        return block_definitions[self.block_type]['cube_size']
+        return self.type_info.cube_size
     
-    @cached_property
+    @property
     def size(self) -> Vec:
         """Get the size of the block, as provided by the API.
 
         Returns:
             float: The size of the block.
         """
-        return Vec.from_json(block_definitions[self.block_type]['size'])
+        return self.type_info.size
     
-    @cached_property
+    @property
     def mass(self) -> float:
         """Get the mass of the block, as provided by the API.
 
         Returns:
             float: The mass of the block.
         """
-        return float(block_definitions[self.block_type]['mass'])
+        return self.type_info.mass
     
-    @cached_property
+    @property
     def scaled_size(self) -> Vec:
         """Get the scaled size of the block.
 
         Returns:
             float: The scaled size of the block.
         """
-        return self.size.scale(_blocks_sizes[self.cube_size])
+        return self.type_info.scaled_size
 
-    @cached_property
+    @property
     def volume(self) -> float:
-        """Compute the volume of the block.
+        """Get the volume of the block.
 
         Returns:
             float: The volume of the block.
         """
-        return self.scaled_size.bbox()
+        return self.type_info.volume
     
-    @cached_property
+    @property
     def center(self) -> Vec:
         """Get the center point of the block.
 
         Returns:
             Vec: The center point of the vector.
         """
-        return self.scaled_size.scale(v=0.5)
+        return self.type_info.center
     
-    @cached_property
-    def mountpoints(self) -> List[MountPoint]:
-        """Generate the mountpoints of the block.
+    @property
+    def mountpoints(self) -> Tuple[MountPoint, ...]:
+        """Get the mountpoints of the block.
 
         Returns:
-            List[MountPoint]: The list of mountpoints, one per face.
+            Tuple[MountPoint, ...]: The mountpoints, one per face.
         """
-        return [MountPoint(face=v['Normal'],
-                           start=v['Start'],
-                           end=v['End'],
-                           exclusion_mask=v['ExclusionMask'],
-                           properties_mask=v['PropertiesMask'],
-                           block_size=self.scaled_size) for v in block_definitions[self.block_type]['mountpoints']]
+        return self.type_info.mountpoints
 
     def duplicate(self,
                   new_pos: Vec) -> "Block":
@@ -148,8 +197,13 @@ class Block:
         Returns:
             Block: The duplicated block.
         """
-        new_block = deepcopy(self)
+        new_block = Block.__new__(Block)
+        new_block.block_type = self.block_type
+        new_block.orientation_forward = self.orientation_forward
+        new_block.orientation_up = self.orientation_up
         new_block.position = new_pos
+        new_block.color = self.color
+        new_block.type_info = self.type_info
         return new_block
 
     def __str__(self) -> str:
@@ -166,6 +220,88 @@ class IntersectionException(Exception):
     pass
 
 
+class BlockTypeRegistry:
+    __slots__ = ['block_types', '_ids', 'scaled_sizes', 'masses', '_definitions', '_flyweights']
+
+    def __init__(self,
+                 definitions: Dict[str, Any]) -> None:
+        """Create a registry of block types. Each block type is assigned a stable integer ID (`0` is reserved for air).
+
+        Args:
+            definitions (Dict[str, Any]): The block definitions, as provided by the API.
+        """
+        self.block_types: List[str] = list(definitions.keys())
+        self._definitions = definitions
+        self._flyweights: Dict[str, BlockType] = {}
+        self._ids: Dict[str, int] = {block_type: i + 1 for i, block_type in enumerate(self.block_types)}
+        # scaled sizes of each block type, indexed by block type ID
+        self.scaled_sizes: npt.NDArray[np.int32] = np.zeros(shape=(len(self.block_types) + 1, 3), dtype=np.int32)
+        # masses of each block type, indexed by block type ID
+        self.masses: npt.NDArray[np.float64] = np.zeros(shape=len(self.block_types) + 1, dtype=np.float64)
+        for i, v in enumerate(definitions.values()):
+            self.scaled_sizes[i + 1] = Vec.from_json(v['size']).scale(_blocks_sizes[v['cube_size']]).as_tuple()
+            self.masses[i + 1] = float(v['mass'])
+
+    def __len__(self) -> int:
+        return len(self.block_types)
+
+    def get_id(self,
+               block_type: str) -> int:
+        """Get the ID of the block type.
+
+        Args:
+            block_type (str): The block type.
+
+        Returns:
+            int: The ID of the block type.
+        """
+        return self._ids[block_type]
+
+    def get_type(self,
+                 block_id: int) -> str:
+        """Get the block type from its ID.
+
+        Args:
+            block_id (int): The ID of the block type.
+
+        Returns:
+            str: The block type.
+        """
+        return self.block_types[block_id - 1]
+
+    def get_block_type(self,
+                       block_type: str) -> BlockType:
+        """Get the shared data of the block type, creating it on first use.
+
+        Args:
+            block_type (str): The block type.
+
+        Returns:
+            BlockType: The block type data.
+        """
+        flyweight = self._flyweights.get(block_type, None)
+        if flyweight is None:
+            flyweight = self._flyweights[block_type] = BlockType(name=block_type,
+                                                                 definition=self._definitions[block_type])
+        return flyweight
+
+
+# module-level registry of all known block types
+block_registry = BlockTypeRegistry(definitions=block_definitions)
+
+
+def _get_block_type(block_type: str) -> BlockType:
+    """Get the shared data of the block type from the module-level registry.
+
+    Args:
+        block_type (str): The block type.
+
+    Returns:
+        BlockType: The block type data.
+    """
+    return block_registry.get_block_type(block_type=block_type)
+
+
 def _is_base_block(block_type: str) -> bool:
     """Check if the block is a base block. Base blocks are non-functional, structural blocks.
 
@@ -191,32 +327,82 @@ def _is_transparent_block(block_type: str) -> bool:
     return block_type in ["Window1x1Slope", "Window1x1Flat"]
 
 
+# Coordinates transformations applied by `Structure.rotate`, indexed by `(along, k)`
+_rotate_transforms: Dict[Tuple[int, int], Transform] = {
+    (0, 1): Transform(matrix=[[1, 0, 0], [0, 0, -1], [0, -1, 0]]),
+    (0, 2): Transform(matrix=[[1, 0, 0], [0, -1, 0], [0, 0, 1]]),
+    (0, 3): Transform(matrix=[[1, 0, 0], [0, 0, -1], [0, 1, 0]]),
+    (1, 1): Transform(matrix=[[0, 0, 1], [0, 1, 0], [1, 0, 0]]),
+    (1, 2): Transform(matrix=[[-1, 0, 0], [0, 1, 0], [0, 0, -1]]),
+    (1, 3): Transform(matrix=[[0, 0, -1], [0, 1, 0], [-1, 0, 0]]),
+    (2, 1): Transform(matrix=[[0, 1, 0], [-1, 0, 0], [0, 0, 1]]),
+    (2, 2): Transform(matrix=[[-1, 0, 0], [0, -1, 0], [0, 0, 1]]),
+    (2, 3): Transform(matrix=[[0, -1, 0], [1, 0, 0], [0, 0, 1]]),
+}
+# Orientation vectors transformations applied by `Structure.rotate`, indexed by `(along, k)`.
+# `(0, 1)`, `(0, 2)`, `(1, 1)` and `(1, 3)` above are reflections, which would mirror the blocks, so these are always proper
+# rotations (equal to the coordinates transformations that are not reflections).
+_rotate_orientations: Dict[Tuple[int, int], Transform] = {(along, k): Transform.rotation(along=along, k=-k) for along, k in _rotate_transforms.keys()}
+# Orientation vectors by their XYZ values, used to map transformed orientations back to the shared enum values
+_orientation_vecs: Dict[Tuple[int, int, int], Vec] = {o.value.as_tuple(): o.value for o in Orientation}
+# Orientations as integer codes, used by the array-backed structure
+_orientations: List[Orientation] = list(Orientation)
+_orientation_codes: Dict[Vec, int] = {o.value: i for i, o in enumerate(_orientations)}
+
+
+def _dims_from_bounds(lo: List[int],
+                      hi: List[int]) -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
+    """Compute the minimum and maximum dimensions of a Structure from the bounds of its grid positions.
+    The maximum dimensions are never negative, and the minimum dimensions never exceed the maximum ones.
+
+    Args:
+        lo (List[int]): The minimum XYZ grid coordinates.
+        hi (List[int]): The maximum XYZ grid coordinates.
+
+    Returns:
+        Tuple[Tuple[int, int, int], Tuple[int, int, int]]: The XYZ minimum and maximum dimensions.
+    """
+    max_dims = tuple(max(v, 0) for v in hi)
+    min_dims = tuple(min(v, m) for v, m in zip(lo, max_dims))
+    return min_dims, max_dims
+
+
 class Structure:
     __slots__ = ['origin_coords', 'orientation_forward', 'orientation_up', 'grid_size', '_blocks',
-                 '_has_intersections', '_scaled_arr', '_air_gridmask', '_arr']
+                 '_has_intersections', '_scaled_arr', '_footprint_arr', '_footprint_occupancy', '_air_gridmask', '_arr', '_occupancy', 'enclosed_air',
+                 '_bounds', '_type_counts', '_armor_count', '_mass', '_volume']
     
     def __init__(self, origin: Vec,
                  orientation_forward: Vec,
                  orientation_up: Vec,
-                 grid_size: int = 5) -> None:
+                 grid_size: int = 5,
+                 enclosed_air: bool = False) -> None:
         """Create a Structure object. A Structure is similar to the `GridBlocks` in Space Engineers' API.
+        Bounds, block counts, mass and volume are maintained as blocks are added, so blocks should be set via
+        `add_block` or `replace_block` rather than by writing to `_blocks` directly.
 
         Args:
             origin (Vec): The XYZ origin coordinates of the Structure.
             orientation_forward (Vec): The Forward orientation of the structure as a `Vec` object.
             orientation_up (Vec): The Up orientation of the structure as a `Vec` object.
             grid_size (int): The size of the grid. Defaults to `5.`.
+            enclosed_air (bool): Flag to detect internal air blocks as air fully enclosed by blocks (flood-fill) instead of air with blocks on all 6 sides. Defaults to `False`.
         """
         self.origin_coords = origin
         self.orientation_forward = orientation_forward
         self.orientation_up = orientation_up
         self.grid_size = grid_size
+        self.enclosed_air = enclosed_air
 
         self._blocks: Dict[Tuple(int, int, int), Block] = {}
         self._has_intersections: bool = None
         self._scaled_arr: npt.NDArray[np.uint16] = None
+        self._footprint_arr: npt.NDArray[np.uint16] = None
+        self._footprint_occupancy: OccupancyGrid = None
         self._air_gridmask: npt.NDArray[np.bool8] = None
         self._arr: npt.NDArray[np.uint16] = None
+        self._occupancy: OccupancyGrid = None
+        self._reset_aggregates()
 
     def __repr__(self) -> str:
         return f'{self.grid_size}x Structure with {len(self._blocks.keys())} blocks'
@@ -240,7 +426,213 @@ class Structure:
         if grid_position in self._blocks.keys():
             self._has_intersections = True
         
-        self._blocks[(i, j, k)] = block
+        self.replace_block(block=block,
+                           grid_position=(i, j, k))
+    
+    def add_blocks(self,
+                   positions: npt.NDArray[np.int64],
+                   block_ids: npt.NDArray[np.uint16],
+                   forwards: npt.NDArray[np.uint8],
+                   ups: npt.NDArray[np.uint8]) -> None:
+        """Add many blocks to the structure at once, as if added in order with `add_block`.
+        The counters, aggregates and bounds are updated once for all blocks.
+
+        Args:
+            positions (npt.NDArray[np.int64]): The (N, 3) grid positions of the blocks.
+            block_ids (npt.NDArray[np.uint16]): The (N,) block type IDs.
+            forwards (npt.NDArray[np.uint8]): The (N,) Forward orientation indices (in `Orientation` order).
+            ups (npt.NDArray[np.uint8]): The (N,) Up orientation indices (in `Orientation` order).
+        """
+        if len(block_ids) == 0:
+            return
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+        keys = list(map(tuple, positions.tolist()))
+        # later blocks replace earlier ones at the same grid position
+        last_rows = dict(zip(keys, range(len(keys))))
+        replaced = [self._blocks[k] for k in last_rows if k in self._blocks]
+        if len(last_rows) < len(keys) or replaced:
+            self._has_intersections = True
+        for block in replaced:
+            self._track_block_type(block_type=block.block_type,
+                                   sign=-1)
+        self._blocks.update(self._make_blocks(keys=keys,
+                                              block_ids=block_ids,
+                                              forwards=forwards,
+                                              ups=ups))
+        rows = list(last_rows.values())
+        self._track_new_blocks(positions=positions[rows],
+                               block_ids=np.asarray(block_ids)[rows],
+                               n_new=len(rows) - len(replaced))
+
+    def _make_blocks(self,
+                     keys: List[Tuple[int, int, int]],
+                     block_ids: npt.NDArray[np.uint16],
+                     forwards: npt.NDArray[np.uint8],
+                     ups: npt.NDArray[np.uint8]) -> Iterator[Tuple[Tuple[int, int, int], Block]]:
+        """Create the blocks to add at the given grid positions.
+
+        Args:
+            keys (List[Tuple[int, int, int]]): The grid positions.
+            block_ids (npt.NDArray[np.uint16]): The block type IDs.
+            forwards (npt.NDArray[np.uint8]): The Forward orientation indices.
+            ups (npt.NDArray[np.uint8]): The Up orientation indices.
+
+        Returns:
+            Iterator[Tuple[Tuple[int, int, int], Block]]: The grid positions and their blocks.
+        """
+        block_types = block_registry.block_types
+        orientations = [o.value for o in _orientations]
+        types_info = {block_id: _get_block_type(block_types[block_id - 1]) for block_id in np.unique(block_ids).tolist()}
+        color = Vec.v3f(x=0.45, y=0.45, z=0.45)  # default block color is #737373
+        for key, block_id, forward, up in zip(keys, np.asarray(block_ids).tolist(), np.asarray(forwards).tolist(), np.asarray(ups).tolist()):
+            # same as `Block(...)`, with the block type data looked up once per type
+            block = Block.__new__(Block)
+            block.block_type = block_types[block_id - 1]
+            block.orientation_forward = orientations[forward]
+            block.orientation_up = orientations[up]
+            block.position = Vec.v3i(*key)
+            block.color = color
+            block.type_info = types_info[block_id]
+            yield key, block
+
+    def _track_new_blocks(self,
+                          positions: npt.NDArray[np.int64],
+                          block_ids: npt.NDArray[np.uint16],
+                          n_new: int) -> None:
+        """Update the counters, aggregates and bounds of the structure after a bulk insertion.
+
+        Args:
+            positions (npt.NDArray[np.int64]): The (N, 3) grid positions of the inserted blocks (without repetitions).
+            block_ids (npt.NDArray[np.uint16]): The (N,) block type IDs of the inserted blocks.
+            n_new (int): How many of the positions were not occupied before the insertion.
+        """
+        ids, counts = np.unique(block_ids, return_counts=True)
+        for block_id, count in zip(ids.tolist(), counts.tolist()):
+            # adding `count` blocks of the same type at once
+            self._track_block_type(block_type=block_registry.get_type(block_id),
+                                   sign=count)
+        if n_new > 0:
+            lo, hi = positions.min(axis=0).tolist(), positions.max(axis=0).tolist()
+            if self._bounds is not None:
+                lo, hi = [min(a, b) for a, b in zip(lo, self._bounds[0])], [max(a, b) for a, b in zip(hi, self._bounds[1])]
+                self._bounds = lo, hi
+            elif len(self._blocks) == n_new:
+                self._bounds = lo, hi
+            if self._occupancy is not None:
+                idxs = np.rint(positions / self.grid_size).astype(np.int64)
+                if np.any(idxs < 0):
+                    self._occupancy = None
+                else:
+                    self._occupancy.set(idxs=idxs)
+
+    def replace_block(self,
+                      block: Block,
+                      grid_position: Tuple[int, int, int]) -> None:
+        """Set the block at the given grid position, replacing the existing block (if any).
+        Unlike `add_block`, the block position is left unchanged and no intersection is recorded.
+
+        Args:
+            block (Block): The block to set.
+            grid_position (Tuple[int, int, int]): The position in the grid at which the block is placed.
+        """
+        old_block = self._blocks.get(grid_position, None)
+        if old_block is not None:
+            self._track_block_type(block_type=old_block.block_type,
+                                   sign=-1)
+        self._blocks[grid_position] = block
+        self._track_block_type(block_type=block.block_type,
+                               sign=1)
+        if old_block is None:
+            self._track_position(grid_position=grid_position,
+                                 sign=1)
+            self._track_occupancy(grid_position=grid_position)
+    
+    def _reset_aggregates(self) -> None:
+        """Reset the bounds, counters and aggregates of the structure to those of an empty structure."""
+        self._bounds: Tuple[List[int], List[int]] = None
+        self._type_counts: Dict[str, int] = {}
+        self._armor_count: int = 0
+        self._mass: float = 0.
+        self._volume: int = 0
+    
+    def _track_block_type(self,
+                          block_type: str,
+                          sign: int) -> None:
+        """Update the counters and aggregates of the structure when a block is added (`sign=1`) or removed (`sign=-1`).
+
+        Args:
+            block_type (str): The type of the block.
+            sign (int): Whether the block is added or removed.
+        """
+        self._type_counts[block_type] = self._type_counts.get(block_type, 0) + sign
+        if self._type_counts[block_type] == 0:
+            self._type_counts.pop(block_type)
+        if 'armor' in block_type.lower():
+            self._armor_count += sign
+        type_info = _get_block_type(block_type)
+        self._mass += sign * type_info.mass
+        self._volume += sign * type_info.volume
+    
+    def _track_position(self,
+                        grid_position: Tuple[int, int, int],
+                        sign: int) -> None:
+        """Update the bounds of the structure when a block position is occupied (`sign=1`) or freed (`sign=-1`).
+
+        Args:
+            grid_position (Tuple[int, int, int]): The grid position of the block.
+            sign (int): Whether the position is occupied or freed.
+        """
+        if sign > 0:
+            if self._bounds is None:
+                if len(self._blocks) == 1:
+                    self._bounds = list(grid_position), list(grid_position)
+            else:
+                lo, hi = self._bounds
+                for i, v in enumerate(grid_position):
+                    if v < lo[i]:
+                        lo[i] = v
+                    if v > hi[i]:
+                        hi[i] = v
+        elif self._bounds is not None:
+            lo, hi = self._bounds
+            # removing a block on the boundary may shrink the bounding box
+            if any(v == lo[i] or v == hi[i] for i, v in enumerate(grid_position)):
+                self._bounds = None
+    
+    def _track_occupancy(self,
+                         grid_position: Tuple[int, int, int]) -> None:
+        """Update the occupancy grid (if already computed) when a block position is occupied.
+
+        Args:
+            grid_position (Tuple[int, int, int]): The grid position of the block.
+        """
+        if self._occupancy is not None:
+            idx = np.rint(np.asarray(grid_position) / self.grid_size).astype(np.int64)
+            if np.any(idx < 0):
+                # negative positions are not representable, the occupancy will be recomputed (and fail) on access
+                self._occupancy = None
+            else:
+                self._occupancy.set(idxs=idx)
+    
+    def _compute_bounds(self) -> Tuple[List[int], List[int]]:
+        """Compute the minimum and maximum grid coordinates of the blocks.
+
+        Returns:
+            Tuple[List[int], List[int]]: The minimum and maximum XYZ coordinates.
+        """
+        keys = list(self._blocks.keys())
+        return [min(k[i] for k in keys) for i in range(3)], [max(k[i] for k in keys) for i in range(3)]
+    
+    @property
+    def _grid_bounds(self) -> Tuple[List[int], List[int]]:
+        """Get the minimum and maximum grid coordinates of the blocks.
+
+        Returns:
+            Tuple[List[int], List[int]]: The minimum and maximum XYZ coordinates, or `None` if the structure is empty.
+        """
+        if self._bounds is None and len(self._blocks) > 0:
+            self._bounds = self._compute_bounds()
+        return self._bounds
     
     def set_color(self,
                   color: Vec) -> None:
@@ -255,37 +647,112 @@ class Structure:
     
     @property
     def _max_dims(self) -> Tuple[int, int, int]:
-        """Compute the maximum dimension of the Structure.
+        """Get the maximum dimension of the Structure.
 
         Returns:
             Tuple[int, int, int]: The XYZ maximum dimensions
         """
-        max_x, max_y, max_z = 0, 0, 0
-        for x, y, z in self._blocks.keys():
-            if x > max_x:
-                max_x = x
-            if y > max_y:
-                max_y = y
-            if z > max_z:
-                max_z = z
-        return max_x, max_y, max_z
+        bounds = self._grid_bounds
+        if bounds is None:
+            return 0, 0, 0
+        return _dims_from_bounds(*bounds)[1]
 
     @property
     def _min_dims(self) -> Tuple[int, int, int]:
-        """Compute the minimum dimension of the Structure.
+        """Get the minimum dimension of the Structure.
 
         Returns:
             Tuple[int, int, int]: The XYZ minimum dimensions.
         """
-        min_x, min_y, min_z = self._max_dims
-        for x, y, z in self._blocks.keys():
-            if x < min_x:
-                min_x = x
-            if y < min_y:
-                min_y = y
-            if z < min_z:
-                min_z = z
-        return min_x, min_y, min_z
+        bounds = self._grid_bounds
+        if bounds is None:
+            return 0, 0, 0
+        return _dims_from_bounds(*bounds)[0]
+    
+    def _blocks_as_arrays(self) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.uint16]]:
+        """Get the grid positions and the block type IDs of all blocks in the Structure.
+
+        Returns:
+            Tuple[npt.NDArray[np.int64], npt.NDArray[np.uint16]]: The (N, 3) positions and the (N,) block type IDs.
+        """
+        positions = np.asarray(list(self._blocks.keys()), dtype=np.int64).reshape(-1, 3)
+        ids = np.fromiter((block_registry.get_id(block.block_type) for block in self._blocks.values()),
+                          dtype=np.uint16, count=len(self._blocks))
+        return positions, ids
+
+    def _scatter(self,
+                 arr: npt.NDArray[np.uint16],
+                 flat_idxs: npt.NDArray[np.int64],
+                 ids: npt.NDArray[np.uint16]) -> None:
+        """Write the block type IDs in the array at the given flat indices.
+        Later blocks overwrite earlier ones, and any voxel occupied more than once marks an intersection.
+
+        Args:
+            arr (npt.NDArray[np.uint16]): The array to fill.
+            flat_idxs (npt.NDArray[np.int64]): The flat indices of the occupied voxels.
+            ids (npt.NDArray[np.uint16]): The block type ID of each occupied voxel.
+        """
+        if np.unique(flat_idxs).size != flat_idxs.size:
+            self._has_intersections = True
+        np.put(arr, flat_idxs, ids)
+
+    def _footprint_cells(self,
+                         shape: Tuple[int, int, int],
+                         positions: npt.NDArray[np.int64],
+                         sizes: npt.NDArray[np.int32],
+                         ids: npt.NDArray[np.uint16]) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.uint16]]:
+        """Get all the cells covered by each block, in the blocks order.
+
+        Args:
+            shape (Tuple[int, int, int]): The shape of the array the cells belong to.
+            positions (npt.NDArray[np.int64]): The (N, 3) positions of the blocks, in cells of the array.
+            sizes (npt.NDArray[np.int32]): The (N, 3) sizes of the blocks, in cells of the array.
+            ids (npt.NDArray[np.uint16]): The (N,) block type IDs.
+
+        Returns:
+            Tuple[npt.NDArray[np.int64], npt.NDArray[np.uint16]]: The flat indices of the covered cells and their block type IDs.
+        """
+        shape = np.asarray(shape)
+        # expand each block to the cells it covers, grouping blocks of the same size
+        order, voxels, voxels_ids = [], [], []
+        for size in np.unique(sizes, axis=0):
+            in_group = np.nonzero(np.all(sizes == size, axis=1))[0]
+            offsets = np.stack(np.indices(size), axis=-1).reshape(-1, 3)
+            order.append(np.repeat(in_group, offsets.shape[0]))
+            voxels.append((positions[in_group, None, :] + offsets[None, :, :]).reshape(-1, 3))
+            voxels_ids.append(np.repeat(ids[in_group], offsets.shape[0]))
+        if not voxels:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint16)
+        order, voxels, voxels_ids = np.concatenate(order), np.concatenate(voxels), np.concatenate(voxels_ids)
+        # restore the blocks insertion order so that overlapping blocks are resolved as before
+        sort_idxs = np.argsort(order, kind='stable')
+        voxels, voxels_ids = voxels[sort_idxs], voxels_ids[sort_idxs]
+        # blocks exceeding the array bounds are clipped
+        within = np.all(voxels < shape, axis=1)
+        voxels, voxels_ids = voxels[within], voxels_ids[within]
+        return np.ravel_multi_index(voxels.T, shape), voxels_ids
+
+    def _fill_footprints(self,
+                         arr: npt.NDArray[np.uint16],
+                         positions: npt.NDArray[np.int64],
+                         sizes: npt.NDArray[np.int32],
+                         ids: npt.NDArray[np.uint16]) -> None:
+        """Write the block type IDs in all the cells covered by each block.
+
+        Args:
+            arr (npt.NDArray[np.uint16]): The array to fill.
+            positions (npt.NDArray[np.int64]): The (N, 3) positions of the blocks, in cells of the array.
+            sizes (npt.NDArray[np.int32]): The (N, 3) sizes of the blocks, in cells of the array.
+            ids (npt.NDArray[np.uint16]): The (N,) block type IDs.
+        """
+        flat_idxs, voxels_ids = self._footprint_cells(shape=arr.shape,
+                                                      positions=positions,
+                                                      sizes=sizes,
+                                                      ids=ids)
+        if flat_idxs.size > 0:
+            self._scatter(arr=arr,
+                          flat_idxs=flat_idxs,
+                          ids=voxels_ids)
 
     @property
     def as_array(self) -> npt.NDArray[np.uint16]:
@@ -297,13 +764,70 @@ class Structure:
         """
         if self._scaled_arr is None:
             self._scaled_arr = np.zeros(shape=Vec.from_tuple(self._max_dims).add(v=self.grid_size).as_tuple(), dtype=np.uint16)
-            for (i, j, k), block in self._blocks.items():
-                r = block.scaled_size
-                if np.sum(self._scaled_arr[i:i + r.x, j:j + r.y, k:k + r.z]) != 0:
-                    self._has_intersections = True
-                self._scaled_arr[i:i + r.x, j:j + r.y, k:k + r.z] = list(block_definitions.keys()).index(block.block_type) + 1
+            positions, ids = self._blocks_as_arrays()
+            self._fill_footprints(arr=self._scaled_arr,
+                                  positions=positions,
+                                  sizes=block_registry.scaled_sizes[ids],
+                                  ids=ids)
         return self._scaled_arr
 
+    @property
+    def as_footprint_array(self) -> npt.NDArray[np.uint16]:
+        """Convert the structure to a grid-sized array where each block fills all the grid cells it covers.
+        If all blocks are aligned to the grid, `as_array` is this array upsampled by `grid_size` along each axis,
+        so it has the same occupancy overlaps and mirror symmetries with `grid_size ** 3` times fewer points.
+        Otherwise, `as_array` is returned.
+
+        Returns:
+            npt.NDArray[np.uint16]: The 3D NumPy array.
+        """
+        if self._footprint_arr is None:
+            positions, ids = self._blocks_as_arrays()
+            sizes = block_registry.scaled_sizes[ids]
+            if np.any(positions % self.grid_size) or np.any(sizes % self.grid_size):
+                self._footprint_arr = self.as_array
+            else:
+                self._footprint_arr = np.zeros(shape=tuple([v // self.grid_size + 1 for v in self._max_dims]), dtype=np.uint16)
+                self._fill_footprints(arr=self._footprint_arr,
+                                      positions=positions // self.grid_size,
+                                      sizes=sizes // self.grid_size,
+                                      ids=ids)
+        return self._footprint_arr
+
+    @property
+    def footprint_occupancy(self) -> OccupancyGrid:
+        """Get the bit-packed occupancy of the footprint array (see `as_footprint_array`), without computing it if all blocks
+        are aligned to the grid. Cells covered by more than one block mark an intersection.
+
+        Returns:
+            OccupancyGrid: The occupancy grid.
+        """
+        if self._footprint_occupancy is None:
+            positions, ids = self._blocks_as_arrays()
+            sizes = block_registry.scaled_sizes[ids]
+            if np.any(positions % self.grid_size) or np.any(sizes % self.grid_size):
+                self._footprint_occupancy = OccupancyGrid.from_mask(mask=self.as_footprint_array != 0)
+            else:
+                shape = tuple([v // self.grid_size + 1 for v in self._max_dims])
+                flat_idxs, _ = self._footprint_cells(shape=shape,
+                                                     positions=positions // self.grid_size,
+                                                     sizes=sizes // self.grid_size,
+                                                     ids=ids)
+                self._footprint_occupancy = OccupancyGrid(shape=shape)
+                self._footprint_occupancy.set(idxs=np.stack(np.unravel_index(flat_idxs, shape), axis=-1))
+                if self._footprint_occupancy.count() < flat_idxs.size:
+                    self._has_intersections = True
+        return self._footprint_occupancy
+
+    @property
+    def scaled_shape(self) -> Tuple[int, int, int]:
+        """Get the shape of `as_array` without computing it.
+
+        Returns:
+            Tuple[int, int, int]: The XYZ shape.
+        """
+        return Vec.from_tuple(self._max_dims).add(v=self.grid_size).as_tuple()
+
     @property
     def as_grid_array(self) -> npt.NDArray[np.uint16]:
         """Convert the structure to the grid-sized array.
@@ -314,13 +838,34 @@ class Structure:
         """
         if self._arr is None:
             self._arr = np.zeros(shape=Vec.from_tuple(self._max_dims).scale(v=1 / self.grid_size).to_veci().add(v=1).as_tuple(), dtype=np.uint16)
-            for r, block in self._blocks.items():
-                r = Vec.from_tuple(r).scale(v=1 / self.grid_size).to_veci().as_tuple()
-                if np.sum(self._arr[r]) != 0:
-                    self._has_intersections = True
-                self._arr[r] = list(block_definitions.keys()).index(block.block_type) + 1
+            positions, ids = self._blocks_as_arrays()
+            if ids.size > 0:
+                idxs = np.rint(positions / self.grid_size).astype(np.int64)
+                self._scatter(arr=self._arr,
+                              flat_idxs=np.ravel_multi_index(idxs.T, self._arr.shape),
+                              ids=ids)
         return self._arr
 
+    @property
+    def occupancy(self) -> OccupancyGrid:
+        """Get the bit-packed occupancy of the grid-sized array (see `as_grid_array`).
+        Once computed, it is kept up to date as blocks are added.
+
+        Returns:
+            OccupancyGrid: The occupancy grid.
+
+        Raises:
+            ValueError: Raised if any block has a negative grid position.
+        """
+        if self._occupancy is None:
+            positions, _ = self._blocks_as_arrays()
+            idxs = np.rint(positions / self.grid_size).astype(np.int64)
+            if np.any(idxs < 0):
+                raise ValueError('invalid entry in coordinates array')
+            self._occupancy = OccupancyGrid(shape=Vec.from_tuple(self._max_dims).scale(v=1 / self.grid_size).to_veci().add(v=1).as_tuple())
+            self._occupancy.set(idxs=idxs)
+        return self._occupancy
+
     @property
     def has_intersections(self) -> bool:
         """Check if the Structure contains an intersection between blocks.
@@ -329,7 +874,7 @@ class Structure:
             bool: Whether there is an intersection.
         """
         if self._has_intersections is None:
-            _ = self.as_array
+            _ = self.footprint_occupancy
             if self._has_intersections is None:
                 self._has_intersections = False
         return self._has_intersections
@@ -341,7 +886,7 @@ class Structure:
         Returns:
             float: The volume of the grid.
         """
-        return sum([b.volume for b in self._blocks.values()])
+        return self._volume
     
     @property
     def mass(self) -> float:
@@ -350,7 +895,7 @@ class Structure:
         Returns:
             float: The mass of the grid.
         """
-        return np.round(sum([b.mass for b in self._blocks.values()]), 2)
+        return np.round(self._mass, 2)
     
     @property
     def blocks_count(self) -> Tuple[int, int]:
@@ -359,8 +904,7 @@ class Structure:
         Returns:
             Tuple[int, int]: The number of armor and non-armor blocks.
         """
-        armor_blocks = sum([1 if 'armor' in x.block_type.lower() else 0 for x in self._blocks.values()])
-        return armor_blocks, len(self._blocks) - armor_blocks
+        return self._armor_count, len(self._blocks) - self._armor_count
     
     def unique_blocks_count(self,
                             block_type: str) -> int:
@@ -372,62 +916,101 @@ class Structure:
         Returns:
             int: The number of blocks with the given block type.
         """
-        return sum([1 if x.block_type == block_type else 0 for x in self._blocks.values()])
+        return self._type_counts.get(block_type, 0)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get a snapshot of the structure properties.
+
+        Returns:
+            Dict[str, Any]: The size, number of blocks, armor and non-armor blocks count, volume, mass and count of each block type.
+        """
+        armor_blocks, non_armor_blocks = self.blocks_count
+        return {
+            'size': self._max_dims,
+            'n_blocks': len(self._blocks),
+            'armor_blocks': armor_blocks,
+            'non_armor_blocks': non_armor_blocks,
+            'volume': self.total_volume,
+            'mass': self.mass,
+            'blocks_counts': dict(self._type_counts)
+        }
     
     @property
     def air_blocks_gridmask(self) -> npt.NDArray[np.bool8]:
         """Get the grid array of internal air blocks in the structure.
+        By default, an empty block is internal air if there is at least a block on all 6 sides of it (along the axes).
+        If `enclosed_air` is set, an empty block is internal air if it is not connected to the outside of the grid.
 
         Returns:
             npt.NDArray[np.bool8]: A boolean array where `True` elements are internal air blocks in the grid array.
         """
         if self._air_gridmask is None:
-            self._air_gridmask = np.zeros_like(self.as_grid_array, dtype=np.bool8)
-            # Old code, reliable but very slow
-            # ds = [Vec.v3i(1, 0, 0), Vec.v3i(0, 1, 0), Vec.v3i(0, 0, 1),
-            #     Vec.v3i(-1, 0, 0), Vec.v3i(0, -1, 0), Vec.v3i(0, 0, -1)]
-            # # get existing blocks indices
-            # blocks_idxs = [Vec.from_tuple(k).scale(v=1 / self.grid_size).to_veci() for k in self._blocks.keys()]
-            # # get all indices attached to the blocks indices
-            # next_to_idxs = [b.sum(d) for d in ds for b in blocks_idxs if b.sum(d) not in blocks_idxs]
-            # # internal air cotner blocks have at least 3 blocks next to them
-            # internal_air = [Vec.from_tuple(t) for t in  list({b.as_tuple() : next_to_idxs.count(b) for b in next_to_idxs if next_to_idxs.count(b) > 2}.keys())]
-            # # checking loop
-            # past = blocks_idxs
-            # while internal_air:
-            #     to_check = []
-            #     for idx in internal_air:
-            #         if 0 <= idx.x < self._air_gridmask.shape[0] and 0 <= idx.y < self._air_gridmask.shape[1] and 0 <= idx.z < self._air_gridmask.shape[2] and\
-            #             not self._air_gridmask[idx.as_tuple()]:
-            #                 past.append(idx)
-            #                 if self._blocks.get(idx.scale(self.grid_size).as_tuple(), None) is None:
-            #                     self._air_gridmask[idx.as_tuple()] = True
-            #                     to_check.extend([idx.sum(d) for d in ds if idx.sum(d) not in past])
-            #     internal_air = list(set(to_check))
-            # new code, faster but less readable
-            i1, j1, k1 = self.as_grid_array.shape
-            for (i, j, k) in zip(*np.nonzero(self.as_grid_array == 0)):
-                # basically, check for every empty block index if it's surrounded on all 6 sides by at least a block
-                self._air_gridmask[i, j, k] = np.sum(self.as_grid_array[0:i, j, k]) != 0 and \
-                    np.sum(self.as_grid_array[i:i1, j, k]) != 0 and \
-                    np.sum(self.as_grid_array[i, 0:j, k]) != 0 and \
-                    np.sum(self.as_grid_array[i, j:j1, k]) != 0 and \
-                    np.sum(self.as_grid_array[i, j, 0:k]) != 0 and \
-                    np.sum(self.as_grid_array[i, j, k:k1]) != 0
+            occupied = self.occupancy
+            if self.enclosed_air:
+                occupied = occupied.to_mask()
+                # label connected empty regions, padding the grid so that all outside air is a single region
+                labels, _ = label(np.pad(~occupied, pad_width=1, mode='constant', constant_values=True))
+                self._air_gridmask = (labels != labels[0, 0, 0])[1:-1, 1:-1, 1:-1] & ~occupied
+            else:
+                # an empty block is surrounded if any block was seen before and after it along each axis
+                air = ~occupied
+                for axis in range(3):
+                    air &= occupied.prefix_or(axis=axis)
+                    air &= occupied.prefix_or(axis=axis,
+                                              reverse=True)
+                self._air_gridmask = air.to_mask()
         return self._air_gridmask
     
     def sanify(self) -> None:
         """Correct the structure's blocks to be >=0 on every axis."""
-        min_x, min_y, min_z = self._min_dims
-        updated_blocks = {}
-        for x, y, z in self._blocks.keys():
-            block = self._blocks[(x, y, z)]
-            new_pos = Vec.v3i(x=x - min_x, y=y - min_y, z=z - min_z)
-            block.position = self.origin_coords.sum(new_pos)
-            updated_blocks[new_pos.as_tuple()] = block
-        self._blocks = updated_blocks
+        self._apply_transform(transform=Transform.translate(translation=tuple(-v for v in self._min_dims)),
+                              orientation=None)
+
+    def transform(self,
+                  transform: Transform,
+                  orient_blocks: bool = False) -> None:
+        """Apply an axis-aligned rigid transform to the grid positions of all blocks at once.
+
+        Args:
+            transform (Transform): The transform, in grid coordinates.
+            orient_blocks (bool): Flag to also transform the orientation vectors of the blocks. Defaults to `False`.
+
+        Raises:
+            ValueError: Raised if `orient_blocks` is set and the transform is a reflection, as blocks cannot be mirrored.
+        """
+        if orient_blocks and not transform.is_rotation:
+            raise ValueError(f'Cannot orient blocks with a reflection ({transform}).')
+        self._apply_transform(transform=transform,
+                              orientation=Transform(matrix=transform.matrix) if orient_blocks else None)
+
+    def _apply_transform(self,
+                         transform: Transform,
+                         orientation: Optional[Transform]) -> None:
+        """Apply a transform to the grid positions of all blocks and a rotation to their orientation vectors.
+
+        Args:
+            transform (Transform): The transform, in grid coordinates.
+            orientation (Optional[Transform]): The rotation of the orientation vectors, if any.
+        """
+        blocks = list(self._blocks.values())
+        new_positions = transform.apply(np.asarray(list(self._blocks.keys()), dtype=np.int64).reshape(-1, 3)).tolist()
+        if orientation is not None:
+            # only the 6 orientation vectors are transformed
+            vecs = orientation.apply_vectors(np.asarray([o.value.as_tuple() for o in _orientations], dtype=np.int64)).tolist()
+            rotated = {o.value: _orientation_vecs[tuple(v)] for o, v in zip(_orientations, vecs)}
+            for block in blocks:
+                block.orientation_forward, block.orientation_up = rotated[block.orientation_forward], rotated[block.orientation_up]
+        origin = self.origin_coords
+        for (x, y, z), block in zip(new_positions, blocks):
+            block.position = origin.sum(Vec.v3i(x=x, y=y, z=z))
+        self._blocks = dict(zip(map(tuple, new_positions), blocks))
+        if self._bounds is not None:
+            self._bounds = tuple(list(v) for v in transform.bounds(*self._bounds))
         self._scaled_arr = None
+        self._footprint_arr = None
+        self._footprint_occupancy = None
         self._arr = None
+        self._occupancy = None
         self._air_gridmask = None
 
     def update(self, origin: Vec,
@@ -449,35 +1032,25 @@ class Structure:
     
     def rotate(self,
                along: int,
-               k: int) -> None:
+               k: int,
+               orient_blocks: bool = False) -> None:
         """Rotate the structure along an axis _k_ times ccw.
+        Note that some `(along, k)` combinations also mirror the grid positions, as in the tileset orientation conventions.
+        The orientation vectors of the blocks are always rotated, never mirrored.
 
         Args:
             along (int): The axis to rotate along (0, 1, 2).
             k (int): How many times to rotate for in the ccw direction.
+            orient_blocks (bool): Flag to also rotate the orientation vectors of the blocks. Defaults to `False`.
         """
-        rotated_blocks = {}
         along = along % 3
         k = k % 4
-        if k > 0:
-            for idx, block in self._blocks.items():
-                x, y, z = idx
-                if along == 0:
-                    if k == 1: p1 = Vec(x=x, y=-z, z=-y)
-                    elif k == 2: p1 = Vec(x=x, y=-y, z=z)
-                    elif k == 3: p1 = Vec(x=x, y=-z, z=y)
-                elif along == 1:
-                    if k == 1: p1 = Vec(x=z, y=y, z=x)
-                    elif k == 2: p1 = Vec(x=-x, y=y, z=-z)
-                    elif k == 3: p1 = Vec(x=-z, y=y, z=-x)
-                elif along == 2:
-                    if k == 1: p1 = Vec(x=y, y=-x, z=z)
-                    elif k == 2: p1 = Vec(x=-x, y=-y, z=z)
-                    elif k == 3: p1 = Vec(x=-y, y=x, z=z)
-                rot_idx = p1.as_tuple()
-                rotated_blocks[rot_idx] = block
-            self._blocks = rotated_blocks
-            self.sanify()
+        if k > 0 and self._grid_bounds is not None:
+            # rotate and sanify in a single application
+            rotation = _rotate_transforms[(along, k)]
+            min_dims, _ = _dims_from_bounds(*rotation.bounds(*self._grid_bounds))
+            self._apply_transform(transform=rotation.compose(Transform.translate(translation=tuple(-v for v in min_dims))),
+                                  orientation=_rotate_orientations[(along, k)] if orient_blocks else None)
     
     def get_all_blocks(self,
                        to_place: bool = True,
@@ -543,7 +1116,7 @@ class Structure:
         scatter = ax.scatter(x, y, z, c=cs, cmap='jet', linewidth=0.1)
         legend = scatter.legend_elements(num=len(np.unique(structure[(x, y, z)])) - 1)
         for i, v in zip(range(len(legend[1])), np.unique(structure[(x, y, z)])):
-            legend[1][i] = self._clean_label(list(block_definitions.keys())[v - 1])
+            legend[1][i] = self._clean_label(block_registry.get_type(v))
         ax.legend(*legend,
                   bbox_to_anchor=(1.2, 1),
                   loc="upper left",
@@ -565,3 +1138,435 @@ class Structure:
                         bbox_inches='tight')
         plt.show()
         return ax
+
+
+class _BlockRef(Block):
+    __slots__ = ['structure', 'uid']
+
+    def __init__(self,
+                 structure: 'ArrayStructure',
+                 uid: int) -> None:
+        """Create a reference to a block of an array-backed structure.
+        Its attributes are read from and written to the storage arrays, so changes to it are kept by the structure.
+        The returned `Vec`s are copies: assign them back to update the block.
+
+        Args:
+            structure (ArrayStructure): The array-backed structure.
+            uid (int): The identifier of the block in the structure.
+        """
+        self.structure = structure
+        self.uid = uid
+
+    @property
+    def _row(self) -> int:
+        self.structure._flush()
+        return self.structure._rows[self.uid]
+
+    @property
+    def block_type(self) -> str:
+        return block_registry.get_type(int(self.structure._type_ids[self._row]))
+
+    @block_type.setter
+    def block_type(self,
+                   block_type: str) -> None:
+        row = self._row
+        self.structure._track_block_type(block_type=block_registry.get_type(int(self.structure._type_ids[row])),
+                                         sign=-1)
+        self.structure._type_ids[row] = block_registry.get_id(block_type)
+        self.structure._track_block_type(block_type=block_type,
+                                         sign=1)
+        self.structure._invalidate()
+
+    @property
+    def type_info(self) -> BlockType:
+        return _get_block_type(self.block_type)
+
+    @property
+    def orientation_forward(self) -> Vec:
+        return _orientations[self.structure._forward[self._row]].value
+
+    @orientation_forward.setter
+    def orientation_forward(self,
+                            orientation: Vec) -> None:
+        self.structure._forward[self._row] = _orientation_codes[orientation]
+
+    @property
+    def orientation_up(self) -> Vec:
+        return _orientations[self.structure._up[self._row]].value
+
+    @orientation_up.setter
+    def orientation_up(self,
+                       orientation: Vec) -> None:
+        self.structure._up[self._row] = _orientation_codes[orientation]
+
+    @property
+    def position(self) -> Vec:
+        return Vec.v3f(*self.structure._block_positions[self._row].tolist())
+
+    @position.setter
+    def position(self,
+                 position: Vec) -> None:
+        self.structure._block_positions[self._row] = position.as_tuple()
+
+    @property
+    def color(self) -> Vec:
+        return Vec.v3f(*self.structure._colors[self._row].tolist())
+
+    @color.setter
+    def color(self,
+              color: Vec) -> None:
+        self.structure._colors[self._row] = color.as_tuple()
+
+    def __deepcopy__(self,
+                     memo: Dict[int, Any]) -> Block:
+        # copies are detached from the structure
+        return self.duplicate(new_pos=self.position)
+
+
+class _BlocksView(MutableMapping):
+    __slots__ = ['structure']
+
+    def __init__(self,
+                 structure: 'ArrayStructure') -> None:
+        """Create a dictionary-like view of the blocks of an array-backed structure.
+        Blocks are returned as references to the storage arrays, so changes to them are reflected in the structure.
+
+        Args:
+            structure (ArrayStructure): The array-backed structure.
+        """
+        self.structure = structure
+
+    def __getitem__(self,
+                    key: Tuple[int, int, int]) -> Block:
+        return _BlockRef(structure=self.structure,
+                         uid=int(self.structure._uids[self.structure._index[key]]))
+
+    def __setitem__(self,
+                    key: Tuple[int, int, int],
+                    block: Block) -> None:
+        self.structure.replace_block(block=block,
+                                     grid_position=key)
+
+    def __delitem__(self,
+                    key: Tuple[int, int, int]) -> None:
+        self.structure._remove_block(grid_position=key)
+
+    def __contains__(self,
+                     key: Any) -> bool:
+        return key in self.structure._index
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int]]:
+        return iter(list(self.structure._index.keys()))
+
+    def __len__(self) -> int:
+        return self.structure._n
+
+
+class ArrayStructure(Structure):
+    __slots__ = ['_positions', '_block_positions', '_type_ids', '_forward', '_up', '_colors', '_uids', '_n', '_index',
+                 '_rows', '_next_uid', '_pending_transform', '_pending_orientation']
+
+    def __init__(self, origin: Vec,
+                 orientation_forward: Vec,
+                 orientation_up: Vec,
+                 grid_size: int = 5,
+                 enclosed_air: bool = False,
+                 capacity: int = 256) -> None:
+        """Create a Structure object whose blocks are stored in contiguous NumPy arrays (one row per block).
+        Rows are indexed by grid position, and blocks are only created when accessed.
+        Blocks returned by `_blocks` are references to their row, so changes to them are stored; `get_all_blocks` returns copies.
+        Removing a block moves the last row in its place. Each block keeps an identifier, so references stay valid.
+        Transforms (including `rotate` and `sanify`) are composed lazily and applied at once when the blocks are next accessed.
+
+        Args:
+            origin (Vec): The XYZ origin coordinates of the Structure.
+            orientation_forward (Vec): The Forward orientation of the structure as a `Vec` object.
+            orientation_up (Vec): The Up orientation of the structure as a `Vec` object.
+            grid_size (int): The size of the grid. Defaults to `5.`.
+            enclosed_air (bool): Flag to detect internal air blocks via flood-fill. Defaults to `False`.
+            capacity (int): The initial number of rows allocated. Defaults to `256`.
+        """
+        self._next_uid = 0
+        self._allocate(capacity=capacity)
+        self._pending_transform: Transform = None
+        self._pending_orientation: Transform = None
+        super().__init__(origin=origin,
+                         orientation_forward=orientation_forward,
+                         orientation_up=orientation_up,
+                         grid_size=grid_size,
+                         enclosed_air=enclosed_air)
+
+    @classmethod
+    def from_structure(cls,
+                       structure: Structure) -> 'ArrayStructure':
+        """Create an array-backed copy of a Structure.
+
+        Args:
+            structure (Structure): The structure.
+
+        Returns:
+            ArrayStructure: The array-backed structure.
+        """
+        new_structure = cls(origin=structure.origin_coords,
+                            orientation_forward=structure.orientation_forward,
+                            orientation_up=structure.orientation_up,
+                            grid_size=structure.grid_size,
+                            enclosed_air=structure.enclosed_air,
+                            capacity=max(len(structure._blocks), 1))
+        new_structure._blocks = structure._blocks
+        new_structure._has_intersections = structure._has_intersections
+        return new_structure
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # pending transforms are applied first, and the blocks view is not stored
+        self._flush()
+        return {name: getattr(self, name) for cls in type(self).__mro__ for name in getattr(cls, '__slots__', [])
+                if name != '_blocks' and hasattr(self, name)}
+
+    def __setstate__(self,
+                     state: Dict[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def _allocate(self,
+                  capacity: int) -> None:
+        """Allocate empty storage arrays.
+
+        Args:
+            capacity (int): The number of rows to allocate.
+        """
+        self._positions = np.zeros(shape=(capacity, 3), dtype=np.int64)
+        self._block_positions = np.zeros(shape=(capacity, 3), dtype=np.float64)
+        self._type_ids = np.zeros(shape=capacity, dtype=np.uint16)
+        self._forward = np.zeros(shape=capacity, dtype=np.uint8)
+        self._up = np.zeros(shape=capacity, dtype=np.uint8)
+        self._colors = np.zeros(shape=(capacity, 3), dtype=np.float64)
+        self._uids = np.zeros(shape=capacity, dtype=np.int64)
+        self._n = 0
+        self._index = {}
+        self._rows = {}
+
+    def _grow(self) -> None:
+        """Double the capacity of the storage arrays."""
+        capacity = max(2 * self._positions.shape[0], 1)
+        for name in ['_positions', '_block_positions', '_type_ids', '_forward', '_up', '_colors', '_uids']:
+            arr = getattr(self, name)
+            new_arr = np.zeros(shape=(capacity, *arr.shape[1:]), dtype=arr.dtype)
+            new_arr[:self._n] = arr[:self._n]
+            setattr(self, name, new_arr)
+
+    def _reindex(self) -> None:
+        """Rebuild the index from grid positions to rows, keeping the order of the blocks."""
+        rows = list(self._index.values())
+        self._index = dict(zip(map(tuple, self._positions[rows].tolist()), rows))
+
+    def _invalidate(self) -> None:
+        """Invalidate the cached arrays."""
+        self._scaled_arr = None
+        self._footprint_arr = None
+        self._footprint_occupancy = None
+        self._arr = None
+        self._occupancy = None
+        self._air_gridmask = None
+
+    def _flush(self) -> None:
+        """Apply the pending transforms to the storage arrays."""
+        if self._pending_transform is not None:
+            positions = self._pending_transform.apply(self._positions[:self._n])
+            self._positions[:self._n] = positions
+            self._block_positions[:self._n] = positions + np.asarray(self.origin_coords.as_tuple())
+            self._pending_transform = None
+            self._reindex()
+        if self._pending_orientation is not None:
+            vecs = self._pending_orientation.apply_vectors(np.asarray([o.value.as_tuple() for o in _orientations], dtype=np.int64))
+            codes_map = np.asarray([_orientation_codes[_orientation_vecs[tuple(v)]] for v in vecs.tolist()], dtype=np.uint8)
+            self._forward[:self._n] = codes_map[self._forward[:self._n]]
+            self._up[:self._n] = codes_map[self._up[:self._n]]
+            self._pending_orientation = None
+
+    @property
+    def _blocks(self) -> _BlocksView:
+        self._flush()
+        return _BlocksView(structure=self)
+
+    @_blocks.setter
+    def _blocks(self,
+                blocks: Dict[Tuple[int, int, int], Block]) -> None:
+        if isinstance(blocks, _BlocksView) and blocks.structure is self:
+            return
+        blocks = dict(blocks.items())
+        self._allocate(capacity=max(len(blocks), 1))
+        self._reset_aggregates()
+        self._occupancy = None
+        for grid_position, block in blocks.items():
+            self.replace_block(block=block,
+                               grid_position=grid_position)
+
+    def _get_block(self,
+                   row: int) -> Block:
+        """Materialize the block stored at the given row.
+
+        Args:
+            row (int): The row.
+
+        Returns:
+            Block: The block.
+        """
+        block = Block(block_type=block_registry.get_type(int(self._type_ids[row])),
+                      orientation_forward=_orientations[self._forward[row]],
+                      orientation_up=_orientations[self._up[row]],
+                      position=Vec.v3f(*self._block_positions[row].tolist()))
+        block.color = Vec.v3f(*self._colors[row].tolist())
+        return block
+
+    def _set_block(self,
+                   grid_position: Tuple[int, int, int],
+                   block: Block) -> None:
+        """Store the block at the given grid position, replacing any existing block.
+
+        Args:
+            grid_position (Tuple[int, int, int]): The grid position.
+            block (Block): The block.
+        """
+        grid_position = tuple(int(x) for x in grid_position)
+        row = self._index.get(grid_position, None)
+        if row is None:
+            if self._n == self._positions.shape[0]:
+                self._grow()
+            row = self._n
+            self._n += 1
+            self._index[grid_position] = row
+            self._positions[row] = grid_position
+            self._uids[row] = self._next_uid
+            self._rows[self._next_uid] = row
+            self._next_uid += 1
+        self._block_positions[row] = block.position.as_tuple()
+        self._type_ids[row] = block_registry.get_id(block.block_type)
+        self._forward[row] = _orientation_codes[block.orientation_forward]
+        self._up[row] = _orientation_codes[block.orientation_up]
+        self._colors[row] = block.color.as_tuple()
+
+    def _remove_block(self,
+                      grid_position: Tuple[int, int, int]) -> None:
+        """Remove the block at the given grid position, moving the last row in its place.
+
+        Args:
+            grid_position (Tuple[int, int, int]): The grid position.
+        """
+        self._flush()
+        row = self._index.pop(grid_position)
+        self._track_block_type(block_type=block_registry.get_type(int(self._type_ids[row])),
+                               sign=-1)
+        self._track_position(grid_position=grid_position,
+                             sign=-1)
+        self._rows.pop(int(self._uids[row]))
+        last = self._n - 1
+        if row != last:
+            for arr in [self._positions, self._block_positions, self._type_ids, self._forward, self._up, self._colors, self._uids]:
+                arr[row] = arr[last]
+            self._index[tuple(self._positions[row].tolist())] = row
+            self._rows[int(self._uids[row])] = row
+        self._n -= 1
+        self._occupancy = None
+
+    def add_blocks(self,
+                   positions: npt.NDArray[np.int64],
+                   block_ids: npt.NDArray[np.uint16],
+                   forwards: npt.NDArray[np.uint8],
+                   ups: npt.NDArray[np.uint8]) -> None:
+        if len(block_ids) == 0:
+            return
+        self._flush()
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+        keys = list(map(tuple, positions.tolist()))
+        # later blocks replace earlier ones at the same grid position
+        last_rows = dict(zip(keys, range(len(keys))))
+        replaced = [self._index[k] for k in last_rows if k in self._index]
+        if len(last_rows) < len(keys) or replaced:
+            self._has_intersections = True
+        for row in replaced:
+            self._track_block_type(block_type=block_registry.get_type(int(self._type_ids[row])),
+                                   sign=-1)
+        n_new = len(last_rows) - len(replaced)
+        while self._n + n_new > self._positions.shape[0]:
+            self._grow()
+        dst = []
+        for k in last_rows:
+            row = self._index.get(k, None)
+            if row is None:
+                row = self._index[k] = self._n
+                self._uids[row] = self._next_uid
+                self._rows[self._next_uid] = row
+                self._next_uid += 1
+                self._n += 1
+            dst.append(row)
+        src = list(last_rows.values())
+        self._positions[dst] = positions[src]
+        self._block_positions[dst] = positions[src]
+        self._type_ids[dst] = np.asarray(block_ids)[src]
+        self._forward[dst] = np.asarray(forwards)[src]
+        self._up[dst] = np.asarray(ups)[src]
+        self._colors[dst] = (0.45, 0.45, 0.45)  # default block color is #737373
+        self._track_new_blocks(positions=positions[src],
+                               block_ids=np.asarray(block_ids)[src],
+                               n_new=n_new)
+
+    def replace_block(self,
+                      block: Block,
+                      grid_position: Tuple[int, int, int]) -> None:
+        self._flush()
+        row = self._index.get(grid_position, None)
+        if row is not None:
+            self._track_block_type(block_type=block_registry.get_type(int(self._type_ids[row])),
+                                   sign=-1)
+        self._set_block(grid_position=grid_position,
+                        block=block)
+        self._track_block_type(block_type=block.block_type,
+                               sign=1)
+        if row is None:
+            self._track_position(grid_position=grid_position,
+                                 sign=1)
+            self._track_occupancy(grid_position=grid_position)
+
+    def set_color(self,
+                  color: Vec) -> None:
+        present_ids = np.unique(self._type_ids[:self._n])
+        base_ids = [i for i in present_ids if _is_base_block(block_type=self._clean_label(a=block_registry.get_type(int(i))))]
+        self._colors[:self._n][np.isin(self._type_ids[:self._n], base_ids)] = color.as_tuple()
+
+    def _compute_bounds(self) -> Tuple[List[int], List[int]]:
+        self._flush()
+        positions = self._positions[:self._n]
+        return positions.min(axis=0).tolist(), positions.max(axis=0).tolist()
+
+    def _blocks_as_arrays(self) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.uint16]]:
+        self._flush()
+        # in the order of the blocks (not of the rows), as overlapping blocks are drawn in order
+        rows = np.fromiter(self._index.values(), dtype=np.int64, count=self._n)
+        return self._positions[rows], self._type_ids[rows]
+
+    def _apply_transform(self,
+                         transform: Transform,
+                         orientation: Optional[Transform]) -> None:
+        self._pending_transform = transform if self._pending_transform is None else self._pending_transform.compose(transform)
+        if orientation is not None:
+            self._pending_orientation = orientation if self._pending_orientation is None else self._pending_orientation.compose(orientation)
+        if self._bounds is not None:
+            self._bounds = tuple(list(v) for v in transform.bounds(*self._bounds))
+        self._invalidate()
+
+    def get_all_blocks(self,
+                       to_place: bool = True,
+                       scaled: bool = False) -> List[Block]:
+        if not to_place and not scaled:
+            return list(self._blocks.values())
+        # moved blocks are copies, as in `Structure`
+        self._flush()
+        all_blocks = [self._get_block(row=row) for row in self._index.values()]
+        if to_place:
+            for b in all_blocks:
+                b.position = b.position.scale(grid_to_coords)
+        elif scaled:
+            for b in all_blocks:
+                b.position = b.position.scale(1 / self.grid_size)
+        return all_blocks
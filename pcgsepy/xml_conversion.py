@@ -70,10 +70,9 @@ def rescale_hsv(hsv: Vec) -> Vec:
 	Returns:
 		Vec: The rescaled HSV vector.
 	"""
-	hsv.x = hsv.x / 360
-	hsv.y = (hsv.y / 100) - 0.8
-	hsv.z = (hsv.z / 100) - 0.45	
-	return hsv
+	return Vec(x=hsv.x / 360,
+	           y=(hsv.y / 100) - 0.8,
+	           z=(hsv.z / 100) - 0.45)
 
 
 def convert_xml_to_structure(root_node: ET.Element,